@@ -181,6 +181,17 @@ class APIDashboard:
     def verificar_api_ideam(self):
         """Verifica el estado de los datos de IDEAM en AWS"""
         try:
+            # Responder desde el índice local si un listado vigente de un día
+            # reciente tiene archivos; si no, consultar el bucket
+            indice_path = self.data_dir / "Radar_IDEAM" / "indice_s3.sqlite"
+            if indice_path.exists():
+                from src.data_sources.ideam_indice_s3 import IndiceListadoS3
+                indice = IndiceListadoS3(indice_path)
+                reciente = indice.ultimo_dia_con_datos(datetime.now() - timedelta(days=indice.dias_inmutables))
+                if reciente:
+                    dia, n_archivos, actualizado = reciente
+                    return True, f"Datos disponibles ({n_archivos} archivos del {dia}, listado {actualizado:%H:%M})"
+            
             import boto3
             from botocore.config import Config
             from botocore import UNSIGNED
@@ -657,7 +668,7 @@ def pagina_nueva_consulta():
                     manager = ClimAPIManager()
                     
                     if tipo_consulta == "Completa (todas las APIs)":
-                        resultado = manager.consulta_completa(lat, lon, nombre, asl)
+                        resultado = manager.consulta_completa(lat, lon, nombre, asl, paralelo=True)
                         st.success("✅ Consulta completa realizada exitosamente!")
                         
                     elif tipo_consulta == "Meteoblue":
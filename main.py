@@ -18,7 +18,16 @@ import sys
 from pathlib import Path
 from dotenv import load_dotenv
 from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, as_completed
 import json
+import time
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
 
 # Añadir el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent))
@@ -26,16 +35,39 @@ sys.path.insert(0, str(Path(__file__).parent))
 # Importar clientes
 from src.data_sources.meteoblue import MeteoblueClient
 from src.data_sources.open_meteo import OpenMeteoClient
+from src.data_sources.open_meteo_backfill import OpenMeteoBackfill
 from src.data_sources.openweather import OpenWeatherMapClient
 from src.data_sources.Meteosource import MeteosourceAPI
 from src.data_sources.ideam_radar_downloader import IDEAMRadarDownloader
 from src.data_sources.siata_cliente import SIATADownloader
+from src.data_sources.http_transport import metricas_transporte
 from src.processors.radar_processor import RadarDataProcessor
+from src.data_loaders.record_normalizer import RecordNormalizer
+from src.data_loaders.parquet_store import ParquetStore
 
 
 class ClimAPIManager:
     """Gestor central de todas las APIs climáticas"""
     
+    # Tiempo máximo de espera (segundos) por proveedor en la consulta paralela
+    TIMEOUTS_PROVEEDOR = {
+        "meteoblue": 30,
+        "openmeteo": 30,
+        "openweather": 30,
+        "meteosource": 30
+    }
+    
+    # Peticiones simultáneas por proveedor en la consulta por lotes
+    CONCURRENCIA_PROVEEDOR = {
+        "meteoblue": 2,
+        "openmeteo": 4,
+        "openweather": 4,
+        "meteosource": 2
+    }
+    
+    # Coordenadas por petición a Open-Meteo en la consulta por lotes
+    LOTE_OPENMETEO = 50
+    
     def __init__(self):
         """Inicializa todos los clientes disponibles"""
         load_dotenv()
@@ -44,6 +76,10 @@ class ClimAPIManager:
         self.data_dir = Path("data")
         self.data_dir.mkdir(exist_ok=True)
         
+        # Almacén columnar de registros normalizados; el JSON queda como archivo crudo opcional
+        self.almacen = ParquetStore(self.data_dir / "parquet") if PARQUET_AVAILABLE else None
+        self.archivar_json = True
+        
         # Inicializar clientes
         self.meteoblue = None
         self.openmeteo = None
@@ -175,32 +211,65 @@ class ClimAPIManager:
             print(f"❌ Error en Open-Meteo histórico: {e}")
             return None
     
-    def consultar_openweather(self, lat, lon, location_name):
-        """Consulta OpenWeatherMap para una ubicación"""
+    def backfill_openmeteo_historico(self, ubicaciones, start_date, end_date,
+                                     frecuencia="year", max_workers=4):
+        """
+        Descarga históricos largos de Open-Meteo por bloques reanudables
+        
+        Args:
+            ubicaciones: Lista de dicts (name, lat, lon) o ruta a un CSV
+            frecuencia: Tamaño de bloque ('month' o 'year')
+        
+        Returns:
+            Resumen del backfill (bloques descargados, omitidos y fallidos)
+        """
+        if not self.openmeteo:
+            print("❌ Open-Meteo no está configurado")
+            return None
+        
+        backfill = OpenMeteoBackfill(self.openmeteo,
+                                     output_dir=self.openmeteo.openmeteo_dir / "historico",
+                                     max_workers=max_workers)
+        return backfill.backfill(self._leer_ubicaciones(ubicaciones),
+                                 start_date, end_date, frecuencia=frecuencia)
+    
+    def consultar_openweather(self, lat, lon, location_name, paralelo=False):
+        """
+        Consulta OpenWeatherMap para una ubicación
+        
+        Args:
+            paralelo: Lanzar a la vez las tres peticiones (actual, pronóstico y aire)
+        """
         if not self.openweather:
             print("❌ OpenWeatherMap no está configurado")
             return None
         
         print(f"\n📊 Consultando OpenWeatherMap para {location_name}...")
         try:
-            # Clima actual
-            current = self.openweather.get_current_weather(lat, lon, 
-                                                          location_name=location_name)
-            
-            # Pronóstico 5 días
-            forecast = self.openweather.get_forecast_5day(lat, lon, 
-                                                         location_name=location_name)
+            peticiones = {
+                # Clima actual
+                "current": self.openweather.get_current_weather,
+                # Pronóstico 5 días
+                "forecast": self.openweather.get_forecast_5day,
+                # Calidad del aire
+                "air_quality": self.openweather.get_air_pollution
+            }
             
-            # Calidad del aire
-            air_quality = self.openweather.get_air_pollution(lat, lon, 
-                                                            location_name=location_name)
+            if paralelo:
+                with ThreadPoolExecutor(max_workers=len(peticiones)) as executor:
+                    futuros = {
+                        clave: executor.submit(metodo, lat, lon, location_name=location_name)
+                        for clave, metodo in peticiones.items()
+                    }
+                    datos = {clave: futuro.result() for clave, futuro in futuros.items()}
+            else:
+                datos = {
+                    clave: metodo(lat, lon, location_name=location_name)
+                    for clave, metodo in peticiones.items()
+                }
             
             print(f"✅ Datos OpenWeatherMap obtenidos para {location_name}")
-            return {
-                "current": current,
-                "forecast": forecast,
-                "air_quality": air_quality
-            }
+            return datos
         except Exception as e:
             print(f"❌ Error en OpenWeatherMap: {e}")
             return None
@@ -279,8 +348,17 @@ class ClimAPIManager:
         except Exception as e:
             print(f"❌ Error en SIATA: {e}")
     
-    def consulta_completa(self, lat, lon, location_name, asl=0):
-        """Realiza una consulta completa a todas las APIs disponibles"""
+    def consulta_completa(self, lat, lon, location_name, asl=0, paralelo=False, timeouts=None):
+        """
+        Realiza una consulta completa a todas las APIs disponibles
+        
+        Args:
+            paralelo: Consultar todos los proveedores a la vez; el tiempo total
+                      queda cerca del proveedor más lento en lugar de la suma
+            timeouts: Segundos máximos por proveedor en modo paralelo
+                      (sobrescribe TIMEOUTS_PROVEEDOR); los que no respondan a
+                      tiempo quedan en None y se listan en "sin_respuesta"
+        """
         print(f"\n{'='*70}")
         print(f"CONSULTA COMPLETA PARA: {location_name}")
         print(f"Coordenadas: {lat}°N, {lon}°W")
@@ -296,24 +374,295 @@ class ClimAPIManager:
             "meteosource": None
         }
         
-        # Meteoblue
-        resultados["meteoblue"] = self.consultar_meteoblue(lat, lon, location_name, asl)
-        
-        # Open-Meteo
-        resultados["openmeteo"] = self.consultar_openmeteo(lat, lon, location_name)
+        # Meteosource (convertir nombre a place_id)
+        place_id = self._place_id(location_name)
         
-        # OpenWeatherMap
-        resultados["openweather"] = self.consultar_openweather(lat, lon, location_name)
+        consultas = {
+            "meteoblue": lambda: self.consultar_meteoblue(lat, lon, location_name, asl),
+            "openmeteo": lambda: self.consultar_openmeteo(lat, lon, location_name),
+            "openweather": lambda: self.consultar_openweather(lat, lon, location_name, paralelo=paralelo),
+            "meteosource": lambda: self.consultar_meteosource(place_id, location_name)
+        }
         
-        # Meteosource (convertir nombre a place_id)
-        place_id = location_name.lower().replace(' ', '_').replace('í', 'i').replace('ó', 'o').replace('á', 'a')
-        resultados["meteosource"] = self.consultar_meteosource(place_id, location_name)
+        if paralelo:
+            respuestas, sin_respuesta = self._consultar_en_paralelo(consultas, timeouts)
+            resultados.update(respuestas)
+            resultados["sin_respuesta"] = sin_respuesta
+        else:
+            for proveedor, consulta in consultas.items():
+                resultados[proveedor] = consulta()
         
-        # Guardar resumen
-        self._guardar_resumen_consulta(resultados)
+        # Guardar registros normalizados y, opcionalmente, el resumen crudo en JSON
+        self._guardar_en_almacen(resultados)
+        if self.archivar_json:
+            self._guardar_resumen_consulta(resultados)
         
         return resultados
     
+    def _consultar_en_paralelo(self, consultas, timeouts=None):
+        """
+        Ejecuta las consultas de cada proveedor en hilos separados
+        
+        Cada proveedor tiene su propio plazo contado desde el inicio; si no
+        responde a tiempo su resultado queda en None y no se le sigue esperando.
+        
+        Returns:
+            (dict proveedor -> resultado, lista de proveedores sin respuesta)
+        """
+        timeouts = {**self.TIMEOUTS_PROVEEDOR, **(timeouts or {})}
+        inicio = time.monotonic()
+        
+        executor = ThreadPoolExecutor(max_workers=len(consultas))
+        futuros = {proveedor: executor.submit(consulta) for proveedor, consulta in consultas.items()}
+        
+        respuestas = {}
+        sin_respuesta = []
+        try:
+            for proveedor, futuro in futuros.items():
+                limite = timeouts.get(proveedor, 30)
+                restante = max(limite - (time.monotonic() - inicio), 0)
+                try:
+                    respuestas[proveedor] = futuro.result(timeout=restante)
+                except FuturesTimeoutError:
+                    print(f"⏱️  {proveedor}: sin respuesta tras {limite}s, se continúa sin sus datos")
+                    respuestas[proveedor] = None
+                    sin_respuesta.append(proveedor)
+                except Exception as e:
+                    print(f"❌ Error en {proveedor}: {e}")
+                    respuestas[proveedor] = None
+        finally:
+            # No bloquear por proveedores lentos: sus hilos terminan en segundo plano
+            executor.shutdown(wait=False, cancel_futures=True)
+        
+        print(f"\n⏱️  Consulta paralela completada en {time.monotonic() - inicio:.1f}s")
+        return respuestas, sin_respuesta
+    
+    def metricas_http(self):
+        """Muestra y retorna las métricas de latencia por proveedor REST"""
+        metricas = metricas_transporte()
+        if metricas.empty:
+            print("ℹ️  Aún no se han hecho peticiones HTTP")
+        else:
+            print("\n📈 Métricas HTTP por proveedor:")
+            print(metricas.round(1).to_string(index=False))
+        return metricas
+    
+    @staticmethod
+    def _place_id(location_name):
+        """Convierte un nombre de ubicación al place_id de Meteosource"""
+        return location_name.lower().replace(' ', '_').replace('í', 'i').replace('ó', 'o').replace('á', 'a')
+    
+    @staticmethod
+    def _leer_ubicaciones(ubicaciones):
+        """
+        Normaliza la entrada de consulta_lote a una lista de dicts name/lat/lon/asl
+        
+        Acepta una lista de dicts o la ruta a un CSV con columnas
+        name (o nombre), lat, lon y opcionalmente asl
+        """
+        if isinstance(ubicaciones, (str, Path)):
+            df = pd.read_csv(ubicaciones).rename(columns={"nombre": "name"})
+            ubicaciones = df.to_dict("records")
+        
+        normalizadas = []
+        for ubicacion in ubicaciones:
+            name = ubicacion.get("name") or ubicacion.get("nombre")
+            asl = ubicacion.get("asl", 0)
+            normalizadas.append({
+                "name": str(name),
+                "lat": float(ubicacion["lat"]),
+                "lon": float(ubicacion["lon"]),
+                "asl": int(asl) if pd.notna(asl) else 0
+            })
+        return normalizadas
+    
+    def consulta_lote(self, ubicaciones, concurrencia=None, salida=None):
+        """
+        Consulta todas las APIs disponibles para muchas ubicaciones a la vez
+        
+        Las ubicaciones con las mismas coordenadas (redondeadas a 4 decimales)
+        se consultan una sola vez y su resultado se copia a cada nombre. Cada
+        proveedor tiene su propio pool de hilos limitado por
+        CONCURRENCIA_PROVEEDOR, de modo que el tiempo total depende de la
+        concurrencia configurada y no del número de ubicaciones. Open-Meteo
+        se consulta en bloques de LOTE_OPENMETEO coordenadas por petición.
+        
+        Args:
+            ubicaciones: Lista de dicts (name, lat, lon, asl) o ruta a un CSV
+            concurrencia: Peticiones simultáneas por proveedor
+                          (sobrescribe CONCURRENCIA_PROVEEDOR)
+            salida: Archivo de salida; por defecto data/lotes/consulta_lote_<timestamp>.parquet
+        
+        Returns:
+            DataFrame largo con timestamp, source, location, lat, lon y
+            las variables estándar de RecordNormalizer
+        """
+        ubicaciones = self._leer_ubicaciones(ubicaciones)
+        concurrencia = {**self.CONCURRENCIA_PROVEEDOR, **(concurrencia or {})}
+        
+        # Agrupar ubicaciones por coordenadas (Meteosource consulta por place_id)
+        grupos = {}
+        for ubicacion in ubicaciones:
+            clave = (round(ubicacion["lat"], 4), round(ubicacion["lon"], 4))
+            grupos.setdefault(clave, []).append(ubicacion)
+        
+        place_ids = {}
+        for ubicacion in ubicaciones:
+            place_ids.setdefault(self._place_id(ubicacion["name"]), []).append(ubicacion)
+        
+        print(f"\n{'='*70}")
+        print(f"CONSULTA POR LOTES: {len(ubicaciones)} ubicaciones "
+              f"({len(grupos)} coordenadas únicas)")
+        print(f"{'='*70}")
+        
+        # proveedor -> lista de consultas; cada una retorna [(ubicaciones, DataFrame)]
+        proveedores = {}
+        if self.meteoblue:
+            proveedores["meteoblue"] = [
+                lambda clave=clave, ubic=ubic: [(ubic, RecordNormalizer.from_meteoblue(
+                    self.meteoblue.get_forecast(clave[0], clave[1], ubic[0]["asl"],
+                                                location_name=ubic[0]["name"], save_data=False)))]
+                for clave, ubic in grupos.items()
+            ]
+        if self.openmeteo:
+            # Open-Meteo acepta varias coordenadas por petición
+            pendientes = list(grupos.items())
+            proveedores["openmeteo"] = [
+                lambda bloque=pendientes[i:i + self.LOTE_OPENMETEO]: self._consultar_openmeteo_lote(bloque)
+                for i in range(0, len(pendientes), self.LOTE_OPENMETEO)
+            ]
+        if self.openweather:
+            proveedores["openweather"] = [
+                lambda clave=clave, ubic=ubic: [(ubic, RecordNormalizer.from_openweather(
+                    self.openweather.get_forecast_5day(clave[0], clave[1], location_name=ubic[0]["name"],
+                                                       save_data=False)))]
+                for clave, ubic in grupos.items()
+            ]
+        if self.meteosource:
+            proveedores["meteosource"] = [
+                lambda place_id=place_id, ubic=ubic: [(ubic, RecordNormalizer.from_meteosource(
+                    self.meteosource.get_all_data(place_id)))]
+                for place_id, ubic in place_ids.items()
+            ]
+        
+        if not proveedores:
+            print("❌ No hay proveedores configurados")
+            return pd.DataFrame()
+        
+        inicio = time.monotonic()
+        executors = {
+            proveedor: ThreadPoolExecutor(max_workers=max(1, concurrencia.get(proveedor, 1)),
+                                          thread_name_prefix=proveedor)
+            for proveedor in proveedores
+        }
+        futuros = {
+            executors[proveedor].submit(consulta): proveedor
+            for proveedor, consultas in proveedores.items()
+            for consulta in consultas
+        }
+        
+        tablas = []
+        errores = 0
+        try:
+            for futuro in as_completed(futuros):
+                proveedor = futuros[futuro]
+                try:
+                    respuestas = futuro.result()
+                except Exception as e:
+                    errores += 1
+                    print(f"❌ Error en {proveedor}: {e}")
+                    continue
+                
+                for ubic, df in respuestas:
+                    if df is None or df.empty:
+                        continue
+                    
+                    # Copiar el resultado a cada ubicación con esas coordenadas
+                    for ubicacion in ubic:
+                        tablas.append(df.assign(location=ubicacion["name"],
+                                                lat=ubicacion["lat"], lon=ubicacion["lon"]))
+        finally:
+            for executor in executors.values():
+                executor.shutdown(wait=False, cancel_futures=True)
+        
+        print(f"\n⏱️  {len(futuros)} peticiones en {time.monotonic() - inicio:.1f}s "
+              f"({errores} con error)")
+        
+        if not tablas:
+            print("⚠️  La consulta por lotes no devolvió datos")
+            return pd.DataFrame()
+        
+        resultado = pd.concat(tablas, ignore_index=True)
+        columnas = ['timestamp', 'source', 'location', 'lat', 'lon']
+        resultado = resultado[columnas + [c for c in resultado.columns if c not in columnas]]
+        resultado['source'] = resultado['source'].astype('category')
+        resultado['location'] = resultado['location'].astype('category')
+        
+        self._guardar_lote(resultado, salida)
+        if self.almacen is not None:
+            self.almacen.append(resultado)
+        return resultado
+    
+    def _consultar_openmeteo_lote(self, bloque):
+        """
+        Consulta un bloque de coordenadas únicas en una sola petición a Open-Meteo
+        
+        Args:
+            bloque: Lista de (clave de coordenadas, ubicaciones con esas coordenadas)
+        
+        Returns:
+            Lista de (ubicaciones, DataFrame normalizado)
+        """
+        locations = [{"name": str(i), "lat": clave[0], "lon": clave[1]}
+                     for i, (clave, _) in enumerate(bloque)]
+        result = self.openmeteo.get_forecast_batch(locations, days=7, save_data=False)
+        
+        if result.get("hourly") is None:
+            return []
+        
+        return [
+            (bloque[int(indice)][1], RecordNormalizer.from_openmeteo({"hourly": hourly}))
+            for indice, hourly in result["hourly"].groupby("location", sort=False)
+        ]
+    
+    def _guardar_lote(self, resultado, salida=None):
+        """Guarda el resultado de consulta_lote en un único archivo (Parquet o CSV)"""
+        if salida is None:
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            salida = self.data_dir / "lotes" / f"consulta_lote_{timestamp}.parquet"
+        salida = Path(salida)
+        salida.parent.mkdir(parents=True, exist_ok=True)
+        
+        if salida.suffix == ".parquet" and PARQUET_AVAILABLE:
+            resultado.to_parquet(salida, index=False)
+        else:
+            if salida.suffix == ".parquet":
+                print("⚠️  pyarrow no disponible, se guarda en CSV")
+                salida = salida.with_suffix(".csv")
+            resultado.to_csv(salida, index=False)
+        
+        print(f"💾 Lote guardado en: {salida} ({len(resultado)} registros)")
+        return salida
+    
+    def _guardar_en_almacen(self, resultados):
+        """Normaliza las respuestas de consulta_completa y las agrega al almacén Parquet"""
+        if self.almacen is None:
+            return
+        
+        location = resultados["location"]
+        openweather = resultados.get("openweather") or {}
+        tablas = [
+            RecordNormalizer.from_meteoblue(resultados.get("meteoblue"), location),
+            RecordNormalizer.from_openmeteo(resultados.get("openmeteo"), location),
+            RecordNormalizer.from_openweather(openweather.get("forecast"), location),
+            RecordNormalizer.from_meteosource(resultados.get("meteosource"), location),
+        ]
+        tablas = [t for t in tablas if not t.empty]
+        
+        if tablas:
+            registros = self.almacen.append(pd.concat(tablas, ignore_index=True))
+            print(f"💾 {registros} registros agregados a {self.almacen.base_dir}")
+    
     def _guardar_resumen_consulta(self, resultados):
         """Guarda un resumen de la consulta completa"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -393,7 +742,7 @@ def menu_principal():
             
             # Ejecutar consulta según opción
             if opcion == "1":
-                manager.consulta_completa(lat, lon, name, asl)
+                manager.consulta_completa(lat, lon, name, asl, paralelo=True)
             elif opcion == "2":
                 manager.consultar_meteoblue(lat, lon, name, asl)
             elif opcion == "3":
@@ -410,7 +759,7 @@ def menu_principal():
                 manager.consultar_openweather(lat, lon, name)
             elif opcion == "6":
                 # Meteosource usa place_id en lugar de coordenadas
-                place_id = name.lower().replace(' ', '_').replace('í', 'i').replace('ó', 'o').replace('á', 'a')
+                place_id = manager._place_id(name)
                 manager.consultar_meteosource(place_id, name)
         
         elif opcion == "7":
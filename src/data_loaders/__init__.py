@@ -4,5 +4,8 @@ Módulo de carga de datos de múltiples fuentes
 from .json_loader import JSONDataLoader
 from .file_loader import FileLoader
 from .unified_loader import UnifiedDataLoader
+from .record_normalizer import RecordNormalizer
+from .parquet_store import ParquetStore
+from .load_manifest import LoadManifest
 
-__all__ = ['JSONDataLoader', 'FileLoader', 'UnifiedDataLoader']
+__all__ = ['JSONDataLoader', 'FileLoader', 'UnifiedDataLoader', 'RecordNormalizer', 'ParquetStore', 'LoadManifest']
@@ -2,11 +2,21 @@
 Cargador genérico para archivos CSV, TXT, Excel
 """
 
+import csv
+import os
+import re
 import pandas as pd
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import Union, Dict
+from typing import Union, Dict, Iterable, Iterator, List, Optional, Tuple
 import logging
 
+try:
+    import pyarrow  # noqa: F401
+    PYARROW_AVAILABLE = True
+except ImportError:
+    PYARROW_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
 
@@ -21,13 +31,84 @@ class FileLoader:
         '.parquet': 'read_parquet',
     }
     
+    # Patrones precompilados, en orden de prioridad
+    COLUMN_PATTERNS = [
+        (re.compile(r'temp.*', re.IGNORECASE), 'temperature_C'),
+        (re.compile(r'wind.*speed', re.IGNORECASE), 'windspeed_ms'),
+        (re.compile(r'wind.*dir', re.IGNORECASE), 'winddirection_deg'),
+        (re.compile(r'precip.*', re.IGNORECASE), 'precipitation_mm'),
+        (re.compile(r'humidity|humedad', re.IGNORECASE), 'humidity_percent'),
+        (re.compile(r'pressure|presion', re.IGNORECASE), 'pressure_hPa'),
+        (re.compile(r'cloud.*', re.IGNORECASE), 'cloudiness_percent'),
+    ]
+    
+    # Columnas de identificación que no se reportan como sin mapear
+    PASSTHROUGH_COLUMNS = {'timestamp', 'source', 'location', 'provider', 'date', 'time'}
+    
+    _source_mappings: Dict[str, Dict[str, str]] = {}
+    _mapping_cache: Dict[Tuple, Tuple[Dict[str, str], List[str]]] = {}
+    
+    DELIMITADORES = ',;\t|'
+    BYTES_MUESTRA = 64 * 1024
+    CHUNK_FILAS = 500_000
+    
+    @staticmethod
+    def sniff_delimiter(filepath: Union[str, Path], encoding: str = 'utf-8') -> str:
+        """
+        Detecta el delimitador leyendo solo una muestra del inicio del archivo
+        
+        Returns:
+            Delimitador detectado (',' si no se puede determinar)
+        """
+        with open(filepath, 'r', encoding=encoding, errors='replace') as f:
+            muestra = f.read(FileLoader.BYTES_MUESTRA)
+        
+        # Descartar la última línea, probablemente cortada
+        if '\n' in muestra:
+            muestra = muestra[:muestra.rfind('\n')]
+        
+        try:
+            return csv.Sniffer().sniff(muestra, delimiters=FileLoader.DELIMITADORES).delimiter
+        except csv.Error:
+            return ','
+    
+    @staticmethod
+    def _csv_kwargs(filepath: Path, kwargs: dict) -> dict:
+        """Argumentos de read_csv: delimitador detectado una vez y codificación"""
+        kwargs = dict(kwargs)
+        kwargs.setdefault('encoding', 'utf-8')
+        if kwargs.get('sep') is None and kwargs.get('delimiter') is None:
+            kwargs.pop('delimiter', None)
+            kwargs['sep'] = FileLoader.sniff_delimiter(filepath, kwargs['encoding'])
+        return kwargs
+    
+    @staticmethod
+    def _read_csv(filepath: Path, **kwargs) -> pd.DataFrame:
+        """
+        read_csv con el motor pyarrow (multihilo) si está disponible
+        
+        Si pyarrow no admite alguna opción o falla al parsear, se repite
+        con el motor C de pandas.
+        """
+        if PYARROW_AVAILABLE and 'engine' not in kwargs:
+            try:
+                return pd.read_csv(filepath, engine='pyarrow', **kwargs)
+            except Exception as e:
+                logger.debug(f"Motor pyarrow no aplicable a {filepath.name}: {e}")
+        
+        kwargs.setdefault('engine', 'c')
+        return pd.read_csv(filepath, **kwargs)
+    
     @staticmethod
-    def load_file(filepath: Union[str, Path], **kwargs) -> pd.DataFrame:
+    def load_file(filepath: Union[str, Path], usecols: Optional[List[str]] = None,
+                  dtype: Optional[Dict[str, str]] = None, **kwargs) -> pd.DataFrame:
         """
         Carga archivo automáticamente según extensión
         
         Args:
             filepath: Ruta del archivo
+            usecols: Columnas a leer (None = todas)
+            dtype: Tipos explícitos por columna (evita la inferencia)
             **kwargs: Argumentos adicionales para pandas (delimiter, encoding, etc.)
         
         Returns:
@@ -46,14 +127,20 @@ class FileLoader:
             return pd.DataFrame()
         
         try:
-            handler = getattr(pd, FileLoader.EXTENSION_HANDLERS[ext])
-            
-            # Argumentos por defecto según tipo
             if ext in ['.csv', '.txt']:
-                kwargs.setdefault('encoding', 'utf-8')
-                kwargs.setdefault('sep', None)  # Detectar automáticamente
+                if usecols is not None:
+                    kwargs['usecols'] = usecols
+                if dtype is not None:
+                    kwargs['dtype'] = dtype
+                df = FileLoader._read_csv(filepath, **FileLoader._csv_kwargs(filepath, kwargs))
+            else:
+                handler = getattr(pd, FileLoader.EXTENSION_HANDLERS[ext])
+                if usecols is not None:
+                    kwargs['columns' if ext == '.parquet' else 'usecols'] = usecols
+                df = handler(filepath, **kwargs)
+                if dtype is not None:
+                    df = df.astype(dtype)
             
-            df = handler(filepath, **kwargs)
             logger.info(f"Cargado: {filepath.name} ({len(df)} filas)")
             return df
             
@@ -61,49 +148,163 @@ class FileLoader:
             logger.error(f"Error cargando {filepath}: {e}")
             return pd.DataFrame()
     
+    @staticmethod
+    def iter_file(filepath: Union[str, Path], chunksize: Optional[int] = None,
+                  usecols: Optional[List[str]] = None,
+                  dtype: Optional[Dict[str, str]] = None, **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Lee un CSV/TXT por bloques de filas sin cargarlo completo en memoria
+        
+        Pensado para exportaciones grandes (p. ej. SIATA de varios GB): usar
+        junto con `usecols` y `dtype` para limitar la memoria por bloque.
+        
+        Args:
+            filepath: Ruta del archivo
+            chunksize: Filas por bloque (por defecto CHUNK_FILAS)
+            usecols: Columnas a leer (None = todas)
+            dtype: Tipos explícitos por columna
+        
+        Yields:
+            DataFrames de hasta `chunksize` filas
+        """
+        filepath = Path(filepath)
+        kwargs = FileLoader._csv_kwargs(filepath, kwargs)
+        if usecols is not None:
+            kwargs['usecols'] = usecols
+        if dtype is not None:
+            kwargs['dtype'] = dtype
+        
+        # El motor pyarrow no soporta lectura por bloques
+        kwargs.setdefault('engine', 'c')
+        with pd.read_csv(filepath, chunksize=chunksize or FileLoader.CHUNK_FILAS, **kwargs) as reader:
+            for chunk in reader:
+                yield chunk
+    
+    @staticmethod
+    def load_files(files: Iterable[Union[str, Path]], max_workers: Optional[int] = None,
+                   **kwargs) -> Iterator[pd.DataFrame]:
+        """
+        Carga varios archivos en paralelo (hilos) conservando el orden
+        
+        Args:
+            files: Archivos a cargar
+            max_workers: Hilos (por defecto min(8, núcleos))
+            **kwargs: Argumentos para load_file
+        
+        Yields:
+            Un DataFrame por archivo, en el mismo orden de `files`
+        """
+        files = [Path(f) for f in files]
+        max_workers = max_workers or min(8, os.cpu_count() or 1)
+        
+        if max_workers <= 1 or len(files) <= 1:
+            for file in files:
+                yield FileLoader.load_file(file, **kwargs)
+            return
+        
+        # pandas/pyarrow liberan el GIL al parsear, así que bastan hilos
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            yield from executor.map(lambda file: FileLoader.load_file(file, **kwargs), files)
+    
     @staticmethod
     def load_directory(directory: Union[str, Path], 
-                      pattern: str = "*", **kwargs) -> Dict[str, pd.DataFrame]:
+                      pattern: str = "*", max_workers: Optional[int] = None,
+                      **kwargs) -> Dict[str, pd.DataFrame]:
         """
-        Carga todos los archivos soportados de un directorio
+        Carga todos los archivos soportados de un directorio en paralelo
         
         Returns:
             Diccionario {nombre_archivo: DataFrame}
         """
         directory = Path(directory)
+        files = [file for file in directory.glob(pattern)
+                 if file.suffix.lower() in FileLoader.EXTENSION_HANDLERS]
         result = {}
         
-        for file in directory.glob(pattern):
-            if file.suffix.lower() in FileLoader.EXTENSION_HANDLERS:
-                df = FileLoader.load_file(file, **kwargs)
-                if not df.empty:
-                    result[file.stem] = df
+        for file, df in zip(files, FileLoader.load_files(files, max_workers, **kwargs)):
+            if not df.empty:
+                result[file.stem] = df
         
         return result
     
     @staticmethod
-    def standardize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    def register_mapping(source: str, mapping: Dict[str, str]):
         """
-        Estandariza nombres de columnas climáticas
-        Busca patrones comunes y renombra
-        """
-        replacements = {
-            r'temp.*': 'temperature_C',
-            r'wind.*speed': 'windspeed_ms',
-            r'wind.*dir': 'winddirection_deg',
-            r'precip.*': 'precipitation_mm',
-            r'humidity|humedad': 'humidity_percent',
-            r'pressure|presion': 'pressure_hPa',
-            r'cloud.*': 'cloudiness_percent',
-        }
+        Registra una tabla de nombres propia de una fuente
+        
+        Las entradas se comparan sin distinguir mayúsculas y tienen prioridad
+        sobre los patrones generales de COLUMN_PATTERNS.
+        
+        Args:
+            source: Fuente a la que aplica (ej: 'siata', 'ideam')
+            mapping: {columna_original: columna_estándar}
+        """
+        FileLoader._source_mappings[source] = {str(k).lower(): v for k, v in mapping.items()}
+        # Invalidar los esquemas ya resueltos para esa fuente
+        for clave in [c for c in FileLoader._mapping_cache if c[0] == source]:
+            del FileLoader._mapping_cache[clave]
+    
+    @staticmethod
+    def column_mapping(columns, source: Optional[str] = None) -> Tuple[Dict[str, str], List[str]]:
+        """
+        Resuelve el renombrado de un esquema de columnas
         
+        El resultado se memoiza por (fuente, columnas), así que los esquemas
+        repetidos se resuelven con una sola búsqueda en diccionario.
+        
+        Returns:
+            ({columna: nombre_estándar}, columnas_sin_mapear)
+        """
+        clave = (source, tuple(columns))
+        resultado = FileLoader._mapping_cache.get(clave)
+        if resultado is not None:
+            return resultado
+        
+        tabla = FileLoader._source_mappings.get(source, {})
         new_columns = {}
-        for col in df.columns:
-            col_lower = col.lower()
-            for pattern, new_name in replacements.items():
-                if pd.Series(col_lower).str.contains(pattern, case=False, regex=True).any():
-                    new_columns[col] = new_name
-                    break
+        unmapped = []
+        ocupados = set(clave[1])
+        for col in clave[1]:
+            col_lower = str(col).lower()
+            new_name = tabla.get(col_lower)
+            if new_name is None:
+                new_name = next((nombre for pattern, nombre in FileLoader.COLUMN_PATTERNS
+                                 if pattern.search(col_lower)), None)
+            
+            if new_name == col:
+                continue
+            if new_name is None or new_name in ocupados:
+                # Sin patrón, o el nombre estándar ya lo tiene otra columna (ej: temp_max y temp_min)
+                if col_lower not in FileLoader.PASSTHROUGH_COLUMNS:
+                    unmapped.append(col)
+                continue
+            
+            new_columns[col] = new_name
+            ocupados.add(new_name)
+        
+        resultado = (new_columns, unmapped)
+        FileLoader._mapping_cache[clave] = resultado
+        return resultado
+    
+    @staticmethod
+    def unmapped_columns(df: pd.DataFrame, source: Optional[str] = None) -> List[str]:
+        """Columnas que standardize_columns dejaría sin renombrar"""
+        return FileLoader.column_mapping(df.columns, source)[1]
+    
+    @staticmethod
+    def standardize_columns(df: pd.DataFrame, source: Optional[str] = None) -> pd.DataFrame:
+        """
+        Estandariza nombres de columnas climáticas
+        Usa la tabla registrada de la fuente y luego los patrones comunes
+        
+        Args:
+            df: DataFrame a renombrar
+            source: Fuente de los datos (para su tabla de register_mapping)
+        """
+        new_columns, unmapped = FileLoader.column_mapping(df.columns, source)
+        
+        if unmapped:
+            logger.debug(f"Columnas sin estandarizar ({source or 'general'}): {unmapped}")
         
         if new_columns:
             df = df.rename(columns=new_columns)
@@ -4,14 +4,26 @@ Soporta Meteoblue, OpenMeteo, OpenWeatherMap
 """
 
 import json
+import os
 import pandas as pd
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Dict, List, Optional, Union
+from typing import Dict, Iterator, List, Optional, Union
 from datetime import datetime
 import logging
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# Por debajo de este número de archivos no compensa arrancar procesos
+MIN_ARCHIVOS_PARALELO = 8
+
 
 class JSONDataLoader:
     """Carga y parsea archivos JSON de diferentes fuentes climáticas"""
@@ -20,8 +32,11 @@ class JSONDataLoader:
     
     @staticmethod
     def load_json(filepath: Union[str, Path]) -> Dict:
-        """Carga archivo JSON"""
+        """Carga archivo JSON (con orjson si está instalado)"""
         try:
+            if ORJSON_AVAILABLE:
+                with open(filepath, 'rb') as f:
+                    return orjson.loads(f.read())
             with open(filepath, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except Exception as e:
@@ -145,42 +160,119 @@ class JSONDataLoader:
         
         return df
     
+    @classmethod
+    def parse_file(cls, json_file: Union[str, Path]) -> pd.DataFrame:
+        """
+        Convierte un archivo consulta_completa_*.json en DataFrame
+        
+        Usa la primera fuente soportada que tenga datos en el archivo.
+        """
+        json_file = Path(json_file)
+        logger.debug(f"Procesando: {json_file.name}")
+        
+        raw_data = cls.load_json(json_file)
+        if not raw_data:
+            return pd.DataFrame()
+        
+        location = raw_data.get('location', 'Unknown')
+        
+        # Intentar extraer de cada fuente
+        for source in cls.SUPPORTED_SOURCES:
+            if source in raw_data:
+                method_name = f'extract_{source}'
+                if hasattr(cls, method_name):
+                    df = getattr(cls, method_name)(raw_data, location)
+                    if not df.empty:
+                        df['source'] = source
+                        return df
+        
+        return pd.DataFrame()
+    
+    @classmethod
+    def _iter_parsed(cls, json_files: List[Path],
+                     max_workers: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        DataFrames de cada archivo en orden, parseados en un pool de procesos
+        
+        El pool solo se usa si se pide (max_workers > 1) y hay al menos
+        MIN_ARCHIVOS_PARALELO archivos. Se mantienen como máximo 4 archivos
+        por proceso en vuelo, así la memoria no crece con el número de archivos.
+        """
+        if not max_workers or max_workers <= 1 or len(json_files) < MIN_ARCHIVOS_PARALELO:
+            for json_file in json_files:
+                yield cls.parse_file(json_file)
+            return
+        
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            pendientes = deque()
+            archivos = iter(json_files)
+            
+            for json_file in archivos:
+                pendientes.append(executor.submit(_parse_file, cls, json_file))
+                if len(pendientes) >= max_workers * 4:
+                    break
+            
+            while pendientes:
+                df = pendientes.popleft().result()
+                siguiente = next(archivos, None)
+                if siguiente is not None:
+                    pendientes.append(executor.submit(_parse_file, cls, siguiente))
+                yield df
+    
+    @classmethod
+    def iter_from_directory(cls, directory: Union[str, Path],
+                            pattern: str = "*.json",
+                            batch_rows: int = 100_000,
+                            max_workers: Optional[int] = None) -> Iterator[pd.DataFrame]:
+        """
+        Recorre los JSON de un directorio entregando lotes de tamaño acotado
+        
+        Args:
+            directory: Ruta del directorio
+            pattern: Patrón de búsqueda (ej: "consulta_completa_*.json")
+            batch_rows: Filas aproximadas por lote
+            max_workers: Procesos para parsear (None o 1 = secuencial)
+        
+        Yields:
+            DataFrames de hasta ~batch_rows filas
+        """
+        json_files = sorted(Path(directory).glob(pattern))
+        
+        lote = []
+        filas = 0
+        for df in cls._iter_parsed(json_files, max_workers):
+            if df.empty:
+                continue
+            
+            lote.append(df)
+            filas += len(df)
+            if filas >= batch_rows:
+                yield pd.concat(lote, ignore_index=True)
+                lote, filas = [], 0
+        
+        if lote:
+            yield pd.concat(lote, ignore_index=True)
+    
     @classmethod
     def load_from_directory(cls, directory: Union[str, Path], 
-                           pattern: str = "*.json") -> pd.DataFrame:
+                           pattern: str = "*.json",
+                           max_workers: Optional[int] = None) -> pd.DataFrame:
         """
         Carga todos los JSON de un directorio y retorna DataFrame consolidado
         
         Args:
             directory: Ruta del directorio
             pattern: Patrón de búsqueda (ej: "consulta_completa_*.json")
+            max_workers: Procesos para parsear (None o 1 = secuencial)
         
         Returns:
             DataFrame consolidado de todos los archivos
         """
-        directory = Path(directory)
-        json_files = list(directory.glob(pattern))
-        
-        all_data = []
-        
-        for json_file in json_files:
-            logger.info(f"Procesando: {json_file.name}")
-            
-            raw_data = cls.load_json(json_file)
-            if not raw_data:
-                continue
-            
-            location = raw_data.get('location', 'Unknown')
-            
-            # Intentar extraer de cada fuente
-            for source in cls.SUPPORTED_SOURCES:
-                if source in raw_data:
-                    method_name = f'extract_{source}'
-                    if hasattr(cls, method_name):
-                        df = getattr(cls, method_name)(raw_data, location)
-                        if not df.empty:
-                            df['source'] = source
-                            all_data.append(df)
-                            break
+        all_data = list(cls.iter_from_directory(directory, pattern, max_workers=max_workers))
         
         return pd.concat(all_data, ignore_index=True) if all_data else pd.DataFrame()
+
+
+def _parse_file(cls, json_file: Path) -> pd.DataFrame:
+    """Punto de entrada de los procesos del pool (debe ser una función de módulo)"""
+    return cls.parse_file(json_file)
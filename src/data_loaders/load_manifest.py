@@ -0,0 +1,201 @@
+"""
+Manifiesto de carga incremental para UnifiedDataLoader
+Registra mtime y tamaño de cada archivo de datos y guarda su DataFrame
+ya parseado en una caché Parquet local, para no volver a parsear archivos
+que no cambiaron
+"""
+
+import hashlib
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Union
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow  # noqa: F401
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class LoadManifest:
+    """
+    Manifiesto SQLite + caché Parquet de archivos parseados
+
+    Por archivo guarda mtime, tamaño, ubicación, fuentes y número de filas,
+    de modo que los filtros por ubicación o fuente se resuelven sin abrir
+    archivos que no corresponden. Además registra qué versión (mtime y
+    tamaño) de cada archivo ya consumió cada proceso incremental.
+    """
+
+    def __init__(self, data_dir: Union[str, Path], cache_dir: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            data_dir: Directorio de datos que se indexa
+            cache_dir: Directorio del manifiesto y los Parquet (por defecto data_dir/.cache_carga)
+        """
+        self.data_dir = Path(data_dir)
+        self.cache_dir = Path(cache_dir) if cache_dir else self.data_dir / ".cache_carga"
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.ruta_db = self.cache_dir / "manifiesto.sqlite"
+        self._crear_esquema()
+
+    def _conectar(self):
+        return closing(sqlite3.connect(self.ruta_db, timeout=30))
+
+    def _crear_esquema(self):
+        with self._conectar() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archivos (
+                    ruta TEXT PRIMARY KEY,
+                    tipo TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    tamaño INTEGER NOT NULL,
+                    location TEXT,
+                    sources TEXT,
+                    filas INTEGER NOT NULL,
+                    cache TEXT
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS procesados (
+                    consumidor TEXT NOT NULL,
+                    ruta TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    tamaño INTEGER NOT NULL,
+                    PRIMARY KEY (consumidor, ruta)
+                )
+            """)
+
+    def _ruta_cache(self, ruta: Path) -> Path:
+        return self.cache_dir / f"{hashlib.sha1(str(ruta).encode()).hexdigest()}.parquet"
+
+    def sync(self, kind: str, files: Iterable[Path],
+             parse: Callable[[List[Path]], Iterable[pd.DataFrame]]) -> int:
+        """
+        Actualiza el manifiesto de un tipo de archivo
+
+        Args:
+            kind: Grupo de archivos ('json', 'table', ...)
+            files: Archivos presentes actualmente en disco
+            parse: Recibe la lista de archivos nuevos o modificados y
+                   entrega sus DataFrames en el mismo orden
+
+        Returns:
+            Número de archivos que se parsearon
+        """
+        archivos = sorted(Path(f) for f in files)
+
+        with self._conectar() as conn:
+            guardados = {
+                ruta: (mtime_ns, tamaño) for ruta, mtime_ns, tamaño in conn.execute(
+                    "SELECT ruta, mtime_ns, tamaño FROM archivos WHERE tipo = ?", (kind,)
+                )
+            }
+
+        pendientes = []
+        firmas = {}
+        for archivo in archivos:
+            stat = archivo.stat()
+            firmas[str(archivo)] = (stat.st_mtime_ns, stat.st_size)
+            if guardados.get(str(archivo)) != firmas[str(archivo)]:
+                pendientes.append(archivo)
+
+        borrados = set(guardados) - set(firmas)
+
+        filas_manifiesto = []
+        for archivo, df in zip(pendientes, parse(pendientes)):
+            cache = self._ruta_cache(archivo)
+            try:
+                df.to_parquet(cache, index=False)
+                cache_str = str(cache)
+            except Exception as e:
+                # Columnas con tipos mezclados: se vuelve a parsear en cada carga
+                logger.warning(f"No se pudo cachear {archivo.name}: {e}")
+                cache.unlink(missing_ok=True)
+                cache_str = None
+
+            location = None
+            if 'location' in df.columns and df['location'].nunique() == 1:
+                location = str(df['location'].iloc[0])
+            sources = ",".join(sorted(df['source'].dropna().astype(str).unique())) if 'source' in df.columns else None
+
+            filas_manifiesto.append((str(archivo), kind, *firmas[str(archivo)],
+                                     location, sources, len(df), cache_str))
+
+        with self._conectar() as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?, ?, ?, ?)", filas_manifiesto)
+            for ruta in borrados:
+                self._ruta_cache(Path(ruta)).unlink(missing_ok=True)
+                conn.execute("DELETE FROM archivos WHERE ruta = ?", (ruta,))
+                conn.execute("DELETE FROM procesados WHERE ruta = ?", (ruta,))
+
+        if pendientes or borrados:
+            logger.info(f"Manifiesto ({kind}): {len(pendientes)} archivos parseados, {len(borrados)} eliminados")
+
+        return len(pendientes)
+
+    def entries(self, kind: Optional[str] = None, location: Optional[str] = None,
+                source: Optional[str] = None) -> List[Dict]:
+        """
+        Entradas del manifiesto que cumplen los filtros
+
+        Args:
+            kind: Grupo de archivos
+            location: Subcadena de la ubicación (sin distinguir mayúsculas)
+            source: Fuente exacta
+        """
+        query = "SELECT ruta, tipo, location, sources, filas, cache, mtime_ns, tamaño FROM archivos WHERE 1 = 1"
+        params = []
+        if kind:
+            query += " AND tipo = ?"
+            params.append(kind)
+        if location:
+            query += " AND location LIKE ?"
+            params.append(f"%{location}%")
+        if source:
+            query += " AND (',' || sources || ',') LIKE ?"
+            params.append(f"%,{source},%")
+        query += " ORDER BY ruta"
+
+        with self._conectar() as conn:
+            filas = conn.execute(query, params).fetchall()
+
+        return [
+            {'path': Path(ruta), 'kind': tipo_, 'location': loc, 'sources': srcs,
+             'rows': n, 'cache': Path(cache) if cache else None, 'mtime_ns': mtime_ns, 'size': tamaño}
+            for ruta, tipo_, loc, srcs, n, cache, mtime_ns, tamaño in filas
+        ]
+
+    def unprocessed(self, consumer: str) -> List[Dict]:
+        """
+        Entradas que `consumer` no ha procesado en su versión actual
+
+        Un archivo cuenta como pendiente si nunca se marcó o si su mtime o
+        tamaño cambió desde entonces, sin importar si su mtime es anterior a
+        otros ya procesados (copias con mtime conservado, relojes desfasados).
+        """
+        with self._conectar() as conn:
+            hechos = {
+                ruta: (mtime_ns, tamaño) for ruta, mtime_ns, tamaño in conn.execute(
+                    "SELECT ruta, mtime_ns, tamaño FROM procesados WHERE consumidor = ?", (consumer,)
+                )
+            }
+        return [e for e in self.entries() if hechos.get(str(e['path'])) != (e['mtime_ns'], e['size'])]
+
+    def mark_processed(self, consumer: str, entries: Iterable[Dict]):
+        """Registra las entradas como procesadas por `consumer` en su versión actual"""
+        filas = [(consumer, str(e['path']), e['mtime_ns'], e['size']) for e in entries]
+        with self._conectar() as conn, conn:
+            conn.executemany("INSERT OR REPLACE INTO procesados VALUES (?, ?, ?, ?)", filas)
+
+    def sources(self) -> List[str]:
+        """Fuentes presentes en los archivos indexados"""
+        with self._conectar() as conn:
+            filas = conn.execute("SELECT DISTINCT sources FROM archivos WHERE sources IS NOT NULL").fetchall()
+        return sorted({s for (sources,) in filas for s in sources.split(",") if s})
@@ -0,0 +1,208 @@
+"""
+Almacén columnar (Parquet) de registros normalizados de todos los proveedores
+Dataset particionado provider=/location=/date= con compresión zstd y
+columnas de texto codificadas como diccionario
+"""
+
+import uuid
+from datetime import date, datetime
+from pathlib import Path
+from typing import List, Optional, Union
+from urllib.parse import unquote
+import logging
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.dataset as ds
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class ParquetStore:
+    """
+    Dataset Parquet de registros normalizados (ver RecordNormalizer)
+
+    Estructura:
+        base_dir/provider=<fuente>/location=<ubicación>/date=<YYYY-MM-DD>/part-<uuid>.parquet
+
+    Cada `append` escribe archivos nuevos (nunca reescribe los existentes),
+    así que varios procesos pueden agregar datos sin coordinarse. Las
+    lecturas filtran por partición antes de abrir archivos y solo
+    decodifican las columnas pedidas.
+
+    Uso:
+        store = ParquetStore("data/parquet")
+        store.append(df)
+        df = store.read(columns=['timestamp', 'temperature_C'], locations=['Medellin'])
+    """
+
+    PARTICIONES = ['provider', 'location', 'date']
+
+    def __init__(self, base_dir: Union[str, Path] = "data/parquet", compression: str = "zstd"):
+        if not PARQUET_AVAILABLE:
+            raise ImportError("ParquetStore requiere pyarrow (pip install pyarrow)")
+
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.compression = compression
+
+    def append(self, df: pd.DataFrame, provider: Optional[str] = None) -> int:
+        """
+        Agrega registros normalizados al dataset
+
+        Args:
+            df: DataFrame con timestamp, location y source (o `provider`)
+            provider: Proveedor si el DataFrame no trae columna source
+
+        Returns:
+            Número de registros escritos
+        """
+        if df is None or df.empty:
+            return 0
+
+        df = df.copy()
+        df['provider'] = provider if provider else df['source'].astype(str)
+        df = df.drop(columns=['source'], errors='ignore')
+
+        if 'location' not in df.columns:
+            df['location'] = 'desconocida'
+        df['location'] = df['location'].astype(str)
+
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        df = df.dropna(subset=['timestamp'])
+        df['date'] = df['timestamp'].dt.strftime('%Y-%m-%d')
+
+        tabla = pa.Table.from_pandas(df, preserve_index=False)
+        pq.write_to_dataset(
+            tabla,
+            root_path=str(self.base_dir),
+            partition_cols=self.PARTICIONES,
+            basename_template=f"part-{uuid.uuid4().hex}-{{i}}.parquet",
+            existing_data_behavior='overwrite_or_ignore',
+            compression=self.compression,
+            use_dictionary=True,
+        )
+
+        logger.info(f"💾 {len(df)} registros agregados a {self.base_dir}")
+        return len(df)
+
+    def _dataset(self, filtro=None):
+        """
+        Dataset con los archivos de las particiones que cumplen `filtro`
+
+        La poda se hace sobre las rutas provider=/location=/date=, sin abrir
+        archivos; solo se lee el pie de página de los archivos que quedan.
+        Retorna None si ninguno coincide.
+        """
+        particiones = ds.partitioning(
+            pa.schema([('provider', pa.string()), ('location', pa.string()), ('date', pa.string())]),
+            flavor='hive'
+        )
+        descubierto = ds.dataset(str(self.base_dir), format='parquet', partitioning=particiones)
+
+        # ds.dataset toma el esquema del primer archivo que encuentra; las
+        # columnas que solo traen otros proveedores se perderían, así que el
+        # esquema se unifica sobre los archivos seleccionados
+        archivos, esquemas = [], []
+        for fragmento in descubierto.get_fragments(filter=filtro):
+            try:
+                esquemas.append(pq.read_schema(fragmento.path))
+            except (OSError, pa.ArrowInvalid):
+                # Archivo a medio escribir por otro proceso
+                continue
+            archivos.append(fragmento.path)
+        if not archivos:
+            return None
+
+        esquema = self._unificar(esquemas + [particiones.schema])
+        return ds.dataset(archivos, schema=esquema, format='parquet', partitioning=particiones,
+                          partition_base_dir=str(self.base_dir))
+
+    @staticmethod
+    def _unificar(esquemas):
+        # Sin metadatos de pandas: difieren entre archivos y no aportan al leer
+        esquemas = [esquema.remove_metadata() for esquema in esquemas]
+        try:
+            # Permite promover tipos distintos entre archivos (p. ej. int64 y float64)
+            return pa.unify_schemas(esquemas, promote_options='permissive')
+        except TypeError:  # pyarrow < 14
+            return pa.unify_schemas(esquemas)
+
+    @staticmethod
+    def _como_fecha(valor) -> str:
+        if isinstance(valor, (datetime, date, pd.Timestamp)):
+            return valor.strftime('%Y-%m-%d')
+        return pd.Timestamp(valor).strftime('%Y-%m-%d')
+
+    def read(self, columns: Optional[List[str]] = None,
+             providers: Optional[List[str]] = None,
+             locations: Optional[List[str]] = None,
+             start=None, end=None) -> pd.DataFrame:
+        """
+        Lee solo las columnas y particiones necesarias
+
+        Args:
+            columns: Columnas a leer (None = todas); las de partición se agregan si se piden
+            providers: Proveedores a incluir
+            locations: Ubicaciones a incluir
+            start, end: Rango de fechas (inclusive) sobre la partición date
+
+        Returns:
+            DataFrame con provider y location como categóricas
+        """
+        if not any(self.base_dir.iterdir()):
+            return pd.DataFrame(columns=columns or [])
+
+        filtro = None
+        condiciones = []
+        if providers:
+            condiciones.append(ds.field('provider').isin(list(providers)))
+        if locations:
+            condiciones.append(ds.field('location').isin(list(locations)))
+        if start is not None:
+            condiciones.append(ds.field('date') >= self._como_fecha(start))
+        if end is not None:
+            condiciones.append(ds.field('date') <= self._como_fecha(end))
+        for condicion in condiciones:
+            filtro = condicion if filtro is None else filtro & condicion
+
+        dataset = self._dataset(filtro)
+        if dataset is None:
+            return pd.DataFrame(columns=columns or [])
+
+        # Columnas que ningún archivo seleccionado trae quedan vacías
+        presentes = [c for c in columns if c in dataset.schema.names] if columns else None
+        df = dataset.to_table(columns=presentes, filter=filtro).to_pandas()
+        if columns:
+            for col in columns:
+                if col not in df.columns:
+                    df[col] = np.nan
+            df = df[columns]
+
+        for col in ('provider', 'location'):
+            if col in df.columns:
+                df[col] = df[col].astype('category')
+
+        if 'timestamp' in df.columns:
+            df = df.sort_values('timestamp', kind='stable').reset_index(drop=True)
+
+        return df
+
+    def partitions(self) -> pd.DataFrame:
+        """Particiones existentes (provider, location, date) sin leer los datos"""
+        # Los valores de partición se escriben codificados como URI
+        filas = []
+        for directorio in self.base_dir.glob("provider=*/location=*/date=*"):
+            filas.append({
+                'provider': unquote(directorio.parent.parent.name.split('=', 1)[1]),
+                'location': unquote(directorio.parent.name.split('=', 1)[1]),
+                'date': unquote(directorio.name.split('=', 1)[1]),
+            })
+        return pd.DataFrame(filas, columns=self.PARTICIONES)
@@ -0,0 +1,140 @@
+"""
+Normalizador de respuestas de los clientes de APIs climáticas
+Convierte la salida de cada cliente en registros con columnas estándar
+"""
+
+import pandas as pd
+from typing import Dict, Optional
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class RecordNormalizer:
+    """Convierte respuestas de Meteoblue, Open-Meteo, OpenWeatherMap y Meteosource
+    a un DataFrame largo con columnas estándar
+
+    Columnas: timestamp, source, location (opcional) y las variables
+    temperature_C, windspeed_ms, winddirection_deg, precipitation_mm,
+    humidity_percent, pressure_hPa, cloudiness_percent (las disponibles)
+    """
+
+    COLUMNAS_ESTANDAR = ['temperature_C', 'windspeed_ms', 'winddirection_deg',
+                         'precipitation_mm', 'humidity_percent', 'pressure_hPa',
+                         'cloudiness_percent']
+
+    # Nombres de Open-Meteo → nombres estándar
+    OPENMETEO_MAP = {
+        'temperature_2m': 'temperature_C',
+        'wind_speed_10m': 'windspeed_ms',
+        'windspeed_10m': 'windspeed_ms',
+        'wind_direction_10m': 'winddirection_deg',
+        'winddirection_10m': 'winddirection_deg',
+        'precipitation': 'precipitation_mm',
+        'relative_humidity_2m': 'humidity_percent',
+        'pressure_msl': 'pressure_hPa',
+        'surface_pressure': 'pressure_hPa',
+        'cloud_cover': 'cloudiness_percent',
+    }
+
+    # Variables diarias de Meteoblue (basic-day) → nombres estándar, por prioridad
+    METEOBLUE_MAP = {
+        'temperature_C': ['temperature_mean'],
+        'windspeed_ms': ['windspeed_mean'],
+        'winddirection_deg': ['winddirection'],
+        'precipitation_mm': ['precipitation'],
+        'humidity_percent': ['relativehumidity_mean', 'humidity_mean'],
+        'pressure_hPa': ['sealevelpressure_mean', 'pressure_mean'],
+    }
+
+    @staticmethod
+    def _finalizar(df: pd.DataFrame, source: str, location: Optional[str]) -> pd.DataFrame:
+        """Ordena columnas y homogeneiza timestamps (UTC sin zona si vienen con zona)"""
+        if df.empty:
+            return pd.DataFrame()
+
+        timestamps = pd.to_datetime(df['timestamp'], errors='coerce')
+        if getattr(timestamps.dt, 'tz', None) is not None:
+            timestamps = timestamps.dt.tz_convert('UTC').dt.tz_localize(None)
+        df['timestamp'] = timestamps
+
+        df['source'] = source
+        if location:
+            df['location'] = location
+
+        columnas = ['timestamp', 'source'] + (['location'] if location else [])
+        columnas += [c for c in RecordNormalizer.COLUMNAS_ESTANDAR if c in df.columns]
+        return df[columnas].dropna(subset=['timestamp']).reset_index(drop=True)
+
+    @staticmethod
+    def from_openmeteo(result: Dict, location: Optional[str] = None) -> pd.DataFrame:
+        """Resultado de OpenMeteoClient.get_forecast/get_historical (datos horarios)"""
+        if not result or result.get('hourly') is None:
+            return pd.DataFrame()
+
+        hourly = result['hourly']
+        df = pd.DataFrame({'timestamp': hourly['date']})
+        for origen, destino in RecordNormalizer.OPENMETEO_MAP.items():
+            if origen in hourly.columns and destino not in df.columns:
+                df[destino] = hourly[origen].to_numpy()
+
+        return RecordNormalizer._finalizar(df, 'openmeteo', location)
+
+    @staticmethod
+    def from_meteoblue(data: Dict, location: Optional[str] = None) -> pd.DataFrame:
+        """Respuesta JSON de MeteoblueClient.get_forecast (paquete basic-day)"""
+        if not data or not data.get('data_day'):
+            return pd.DataFrame()
+
+        day = data['data_day']
+        df = pd.DataFrame({'timestamp': day.get('time', [])})
+        for destino, candidatos in RecordNormalizer.METEOBLUE_MAP.items():
+            for origen in candidatos:
+                if origen in day:
+                    df[destino] = day[origen]
+                    break
+
+        return RecordNormalizer._finalizar(df, 'meteoblue', location)
+
+    @staticmethod
+    def from_openweather(result: Dict, location: Optional[str] = None) -> pd.DataFrame:
+        """Resultado de OpenWeatherMapClient.get_forecast_5day"""
+        if not result or not result.get('forecast'):
+            return pd.DataFrame()
+
+        df = pd.DataFrame([
+            {
+                'timestamp': item['datetime'],
+                'temperature_C': item.get('temperature', {}).get('temp'),
+                'windspeed_ms': item.get('wind', {}).get('speed'),
+                'winddirection_deg': item.get('wind', {}).get('direction'),
+                'precipitation_mm': item.get('rain_3h', 0),
+                'humidity_percent': item.get('humidity'),
+                'pressure_hPa': item.get('pressure'),
+                'cloudiness_percent': item.get('clouds'),
+            }
+            for item in result['forecast']
+        ])
+
+        return RecordNormalizer._finalizar(df, 'openweather', location)
+
+    @staticmethod
+    def from_meteosource(data: Dict, location: Optional[str] = None) -> pd.DataFrame:
+        """Respuesta JSON de MeteosourceAPI.get_all_data (sección hourly)"""
+        hourly = (data or {}).get('hourly') or {}
+        if not hourly.get('data'):
+            return pd.DataFrame()
+
+        df = pd.DataFrame([
+            {
+                'timestamp': item.get('date'),
+                'temperature_C': item.get('temperature'),
+                'windspeed_ms': (item.get('wind') or {}).get('speed'),
+                'winddirection_deg': (item.get('wind') or {}).get('angle'),
+                'precipitation_mm': (item.get('precipitation') or {}).get('total'),
+                'cloudiness_percent': (item.get('cloud_cover') or {}).get('total'),
+            }
+            for item in hourly['data']
+        ])
+
+        return RecordNormalizer._finalizar(df, 'meteosource', location)
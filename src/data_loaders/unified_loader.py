@@ -5,12 +5,14 @@ Orquesta: JSONLoader + FileLoader + Validación + Consolidación
 
 import pandas as pd
 from pathlib import Path
-from typing import Union, Optional
+from typing import Iterator, Union, Optional, List
 import logging
 from datetime import datetime
 
 from .json_loader import JSONDataLoader
 from .file_loader import FileLoader
+from .parquet_store import ParquetStore, PARQUET_AVAILABLE
+from .load_manifest import LoadManifest
 
 logger = logging.getLogger(__name__)
 
@@ -22,12 +24,127 @@ class UnifiedDataLoader:
     Uso:
         loader = UnifiedDataLoader("data")
         df = loader.load_all(standardize=True, remove_nulls=True)
+    
+    Con `use_manifest` (requiere pyarrow) cada archivo se parsea una sola
+    vez: su DataFrame queda en data_dir/.cache_carga y solo se vuelve a
+    parsear si cambia su mtime o tamaño.
     """
     
-    def __init__(self, data_dir: Union[str, Path] = "data"):
+    def __init__(self, data_dir: Union[str, Path] = "data", use_manifest: bool = True):
         """Inicializa con directorio de datos"""
         self.data_dir = Path(data_dir)
         self.metadata = {}
+        self.manifest = None
+        if use_manifest and PARQUET_AVAILABLE and self.data_dir.is_dir():
+            self.manifest = LoadManifest(self.data_dir)
+    
+    def _sync_manifest(self):
+        """Parsea solo los archivos nuevos o modificados desde la última carga"""
+        self.manifest.sync('json', self.data_dir.glob("*.json"),
+                           lambda files: JSONDataLoader._iter_parsed(files))
+        
+        tables = list(self.data_dir.glob("*.csv")) + list(self.data_dir.glob("*.txt"))
+        self.manifest.sync('table', tables,
+                           lambda files: FileLoader.load_files(files))
+    
+    def _read_entries(self, entries: List[dict]) -> List[pd.DataFrame]:
+        """DataFrames de las entradas del manifiesto (desde caché si existe)"""
+        frames = []
+        for entry in entries:
+            if entry['rows'] == 0:
+                continue
+            
+            if entry['cache'] is not None and entry['cache'].exists():
+                df = pd.read_parquet(entry['cache'])
+            elif entry['kind'] == 'json':
+                df = JSONDataLoader.parse_file(entry['path'])
+            else:
+                df = FileLoader.load_file(entry['path'])
+            
+            if not df.empty:
+                frames.append(df)
+        return frames
+    
+    def _store(self) -> Optional[ParquetStore]:
+        """Almacén Parquet de data_dir/parquet si existe y tiene datos"""
+        store_dir = self.data_dir / "parquet"
+        if not PARQUET_AVAILABLE or not store_dir.is_dir() or not any(store_dir.iterdir()):
+            return None
+        return ParquetStore(store_dir)
+    
+    def load_store(self,
+                   columns: Optional[List[str]] = None,
+                   sources: Optional[List[str]] = None,
+                   locations: Optional[List[str]] = None,
+                   start=None, end=None) -> pd.DataFrame:
+        """
+        Carga registros normalizados del almacén Parquet (data_dir/parquet)
+        
+        Solo se abren las particiones de las fuentes, ubicaciones y fechas
+        pedidas y solo se decodifican las columnas indicadas.
+        
+        Args:
+            columns: Columnas a leer (None = todas)
+            sources: Proveedores (meteoblue, openmeteo, ...)
+            locations: Ubicaciones exactas
+            start, end: Rango de fechas inclusive
+        
+        Returns:
+            DataFrame con columna source (vacío si no hay almacén)
+        """
+        store = self._store()
+        if store is None:
+            return pd.DataFrame()
+        
+        if columns is not None:
+            columns = ['provider' if c == 'source' else c for c in columns]
+        
+        df = store.read(columns=columns, providers=sources, locations=locations,
+                        start=start, end=end)
+        return df.rename(columns={'provider': 'source'})
+    
+    @staticmethod
+    def _standardize_frame(frame: pd.DataFrame, unmapped: set) -> pd.DataFrame:
+        """Estandariza un archivo o lote con la tabla de su fuente (si es única)"""
+        source = None
+        if 'source' in frame.columns and frame['source'].nunique() == 1:
+            source = str(frame['source'].iloc[0])
+        unmapped.update(FileLoader.unmapped_columns(frame, source))
+        return FileLoader.standardize_columns(frame, source)
+    
+    def iter_batches(self, batch_rows: int = 100_000,
+                     standardize: bool = True) -> Iterator[pd.DataFrame]:
+        """
+        Recorre todos los datos del directorio en lotes de tamaño acotado
+        
+        A diferencia de load_all nunca tiene más de un lote en memoria:
+        los JSON se agrupan en lotes de ~batch_rows filas y los CSV/TXT se
+        leen por bloques.
+        
+        Yields:
+            DataFrames con timestamp convertido a datetime
+        """
+        unmapped = set()
+        
+        def lotes():
+            yield from JSONDataLoader.iter_from_directory(self.data_dir, batch_rows=batch_rows)
+            tables = sorted(list(self.data_dir.glob("*.csv")) + list(self.data_dir.glob("*.txt")))
+            for table in tables:
+                try:
+                    yield from FileLoader.iter_file(table, chunksize=batch_rows)
+                except Exception as e:
+                    logger.error(f"Error cargando {table}: {e}")
+        
+        for batch in lotes():
+            if batch.empty:
+                continue
+            if standardize:
+                batch = self._standardize_frame(batch, unmapped)
+            if 'timestamp' in batch.columns:
+                batch['timestamp'] = pd.to_datetime(batch['timestamp'], errors='coerce')
+            yield batch
+        
+        self.metadata['unmapped_columns'] = sorted(map(str, unmapped))
     
     def load_all(self, 
                  standardize: bool = True,
@@ -46,31 +163,50 @@ class UnifiedDataLoader:
         """
         all_data = []
         
-        # 1. Cargar JSONs
-        logger.info("Cargando archivos JSON...")
-        json_files = list(self.data_dir.glob("consulta_completa_*.json"))
-        
-        if json_files:
-            json_df = JSONDataLoader.load_from_directory(self.data_dir)
-            if not json_df.empty:
-                all_data.append(json_df)
-                logger.info(f"✓ JSON: {len(json_df)} registros")
-        
-        # 2. Cargar CSVs/TXTs
-        logger.info("Cargando archivos CSV/TXT...")
-        csv_files = list(self.data_dir.glob("*.csv")) + list(self.data_dir.glob("*.txt"))
-        csv_dict = FileLoader.load_directory(self.data_dir, "*.csv")
-        csv_dict.update(FileLoader.load_directory(self.data_dir, "*.txt"))
-        
-        for name, df in csv_dict.items():
-            all_data.append(df)
-            logger.info(f"✓ {name}: {len(df)} registros")
+        if self.manifest is not None:
+            self._sync_manifest()
+            
+            # 1. JSONs y 2. CSVs/TXTs desde la caché del manifiesto
+            json_frames = self._read_entries(self.manifest.entries(kind='json'))
+            all_data.extend(json_frames)
+            logger.info(f"✓ JSON: {sum(len(df) for df in json_frames)} registros")
+            
+            table_frames = self._read_entries(self.manifest.entries(kind='table'))
+            all_data.extend(table_frames)
+            logger.info(f"✓ CSV/TXT: {sum(len(df) for df in table_frames)} registros")
+        else:
+            # 1. Cargar JSONs
+            logger.info("Cargando archivos JSON...")
+            json_files = list(self.data_dir.glob("consulta_completa_*.json"))
+            
+            if json_files:
+                json_df = JSONDataLoader.load_from_directory(self.data_dir)
+                if not json_df.empty:
+                    all_data.append(json_df)
+                    logger.info(f"✓ JSON: {len(json_df)} registros")
+            
+            # 2. Cargar CSVs/TXTs
+            logger.info("Cargando archivos CSV/TXT...")
+            csv_dict = FileLoader.load_directory(self.data_dir, "*.csv")
+            csv_dict.update(FileLoader.load_directory(self.data_dir, "*.txt"))
+            
+            for name, df in csv_dict.items():
+                all_data.append(df)
+                logger.info(f"✓ {name}: {len(df)} registros")
         
         # 3. Consolidar
         if not all_data:
             logger.warning("No se encontraron datos")
             return pd.DataFrame()
         
+        if standardize:
+            # Por archivo, para aplicar la tabla de su fuente; los esquemas repetidos salen de la caché
+            unmapped = set()
+            for i, frame in enumerate(all_data):
+                all_data[i] = self._standardize_frame(frame, unmapped)
+            self.metadata['unmapped_columns'] = sorted(map(str, unmapped))
+            logger.info("✓ Columnas estandarizadas")
+        
         df = pd.concat(all_data, ignore_index=True, sort=False)
         logger.info(f"Datos consolidados: {len(df)} registros totales")
         
@@ -82,10 +218,6 @@ class UnifiedDataLoader:
             if dropped > 0:
                 logger.info(f"Eliminadas {dropped} filas nulas")
         
-        if standardize:
-            df = FileLoader.standardize_columns(df)
-            logger.info("✓ Columnas estandarizadas")
-        
         if 'timestamp' in df.columns:
             df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
             df = df.sort_values('timestamp')
@@ -104,8 +236,30 @@ class UnifiedDataLoader:
         
         return df
     
-    def load_location(self, location: str) -> pd.DataFrame:
-        """Carga datos de una ubicación específica"""
+    def load_location(self, location: str, from_store: bool = False) -> pd.DataFrame:
+        """
+        Carga datos de una ubicación específica
+        
+        Args:
+            location: Subcadena de la ubicación (sin distinguir mayúsculas)
+            from_store: Leer del almacén Parquet (registros normalizados) en
+                        lugar de los archivos JSON
+        """
+        if from_store:
+            store = self._store()
+            if store is None:
+                return pd.DataFrame()
+            # Búsqueda por subcadena como en los JSON, pero sobre los nombres de partición
+            nombres = store.partitions()['location'].unique()
+            coincidencias = [n for n in nombres if location.lower() in n.lower()]
+            return self.load_store(locations=coincidencias) if coincidencias else pd.DataFrame()
+        
+        if self.manifest is not None:
+            # Solo se leen los archivos cuya ubicación coincide
+            self._sync_manifest()
+            frames = self._read_entries(self.manifest.entries(kind='json', location=location))
+            return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame()
+        
         json_df = JSONDataLoader.load_from_directory(self.data_dir)
         
         if 'location' in json_df.columns:
@@ -113,8 +267,25 @@ class UnifiedDataLoader:
         
         return pd.DataFrame()
     
-    def load_source(self, source: str) -> pd.DataFrame:
-        """Carga datos de una fuente específica (meteoblue, openmeteo, etc)"""
+    def load_source(self, source: str, from_store: bool = False) -> pd.DataFrame:
+        """
+        Carga datos de una fuente específica (meteoblue, openmeteo, etc)
+        
+        Args:
+            source: Fuente exacta
+            from_store: Leer del almacén Parquet en lugar de los archivos JSON
+        """
+        if from_store:
+            return self.load_store(sources=[source])
+        
+        if self.manifest is not None:
+            self._sync_manifest()
+            frames = self._read_entries(self.manifest.entries(kind='json', source=source))
+            if not frames:
+                return pd.DataFrame()
+            json_df = pd.concat(frames, ignore_index=True)
+            return json_df[json_df['source'] == source]
+        
         json_df = JSONDataLoader.load_from_directory(self.data_dir)
         
         if 'source' in json_df.columns:
@@ -143,6 +314,11 @@ class UnifiedDataLoader:
     @staticmethod
     def get_available_sources(data_dir: Union[str, Path] = "data") -> list:
         """Retorna fuentes climáticas disponibles"""
+        loader = UnifiedDataLoader(data_dir)
+        if loader.manifest is not None:
+            loader._sync_manifest()
+            return loader.manifest.sources()
+        
         json_df = JSONDataLoader.load_from_directory(data_dir)
         
         if 'source' in json_df.columns:
@@ -5,12 +5,15 @@ from datetime import datetime
 from pathlib import Path
 from dotenv import load_dotenv
 
+from src.data_sources.http_transport import obtener_transporte
+
 # Cargar variables de entorno
 load_dotenv()
 
 class MeteosourceAPI:
-    def __init__(self):
+    def __init__(self, http=None):
         self.api_key = os.getenv('METEOSOURCE_API_KEY')
+        self.http = http or obtener_transporte("meteosource")
         self.base_url = "https://www.meteosource.com/api/v1/free"
         self.data_dir = Path("data/data_meteosource")
         self.data_dir.mkdir(parents=True, exist_ok=True)
@@ -28,7 +31,7 @@ class MeteosourceAPI:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -45,7 +48,7 @@ class MeteosourceAPI:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -62,7 +65,7 @@ class MeteosourceAPI:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
@@ -79,7 +82,7 @@ class MeteosourceAPI:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             return response.json()
         except requests.exceptions.RequestException as e:
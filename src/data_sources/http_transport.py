@@ -0,0 +1,241 @@
+"""
+Capa de transporte HTTP compartida por los clientes de APIs
+(Meteoblue, Open-Meteo, OpenWeatherMap, Meteosource)
+
+Cada proveedor tiene una sesión requests con pool de conexiones (keep-alive),
+un token bucket ajustado a su cuota, reintentos con backoff exponencial y
+jitter, caché de respuestas con TTL y métricas de latencia
+"""
+import random
+import threading
+import time
+from collections import deque
+from typing import Dict, Optional
+import logging
+
+import pandas as pd
+import requests
+from requests.adapters import HTTPAdapter
+from requests.structures import CaseInsensitiveDict
+
+from src.data_sources.response_cache import CacheRespuestas
+
+logger = logging.getLogger(__name__)
+
+
+# Cuotas por proveedor (planes gratuitos); ajustar al plan contratado
+CUOTAS_PROVEEDOR = {
+    # OpenWeatherMap free: 60 llamadas/minuto
+    "openweather": {"tasa": 1.0, "capacidad": 5},
+    # Meteoblue: sin límite por segundo publicado, se limita por créditos
+    "meteoblue": {"tasa": 2.0, "capacidad": 5},
+    # Meteosource free: 10 llamadas/minuto
+    "meteosource": {"tasa": 10 / 60, "capacidad": 3},
+    # Open-Meteo free: 600 llamadas/minuto
+    "openmeteo": {"tasa": 10.0, "capacidad": 10},
+}
+
+ESTADOS_REINTENTABLES = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Token bucket thread-safe: `tasa` tokens por segundo y ráfagas de hasta `capacidad`"""
+
+    def __init__(self, tasa: float, capacidad: int = 1):
+        self.tasa = tasa
+        self.capacidad = capacidad
+        self._tokens = float(capacidad)
+        self._ultimo = time.monotonic()
+        self._lock = threading.Lock()
+
+    def adquirir(self) -> float:
+        """Bloquea hasta obtener un token; retorna los segundos esperados"""
+        esperado = 0.0
+        while True:
+            with self._lock:
+                ahora = time.monotonic()
+                self._tokens = min(self.capacidad, self._tokens + (ahora - self._ultimo) * self.tasa)
+                self._ultimo = ahora
+
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return esperado
+
+                espera = (1 - self._tokens) / self.tasa
+
+            time.sleep(espera)
+            esperado += espera
+
+
+class TransporteHTTP:
+    """Sesión HTTP de un proveedor con límite de tasa, reintentos y métricas"""
+
+    def __init__(self, proveedor: str, tasa: Optional[float] = None, capacidad: int = 1,
+                 reintentos: int = 3, backoff: float = 0.5, timeout: float = 30,
+                 pool: int = 10, session: Optional[requests.Session] = None,
+                 cache: Optional[CacheRespuestas] = None):
+        """
+        Args:
+            proveedor: Nombre usado en logs y métricas
+            tasa: Peticiones por segundo permitidas (None = sin límite)
+            capacidad: Ráfaga máxima del token bucket
+            reintentos: Reintentos ante errores de conexión, 429 y 5xx
+            backoff: Base en segundos del backoff exponencial
+            timeout: Timeout por petición en segundos
+            pool: Conexiones mantenidas abiertas por host
+            session: Sesión a usar (por defecto una requests.Session nueva)
+            cache: Caché de respuestas (None = sin caché)
+        """
+        self.proveedor = proveedor
+        self.reintentos = reintentos
+        self.backoff = backoff
+        self.timeout = timeout
+        self.limitador = TokenBucket(tasa, capacidad) if tasa else None
+        self.cache = cache
+
+        self.session = session or requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool, pool_maxsize=pool)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self._lock = threading.Lock()
+        self._latencias = deque(maxlen=1000)
+        self._peticiones = 0
+        self._errores = 0
+        self._reintentos_hechos = 0
+        self._espera_total = 0.0
+
+    def _pausa(self, intento: int, response: Optional[requests.Response] = None) -> float:
+        """Backoff exponencial con jitter completo; respeta Retry-After si viene"""
+        if response is not None:
+            retry_after = response.headers.get("Retry-After")
+            if retry_after and retry_after.isdigit():
+                return float(retry_after)
+        return random.uniform(0, self.backoff * (2 ** intento))
+
+    def get(self, url: str, usar_cache: bool = True, **kwargs) -> requests.Response:
+        """
+        GET con caché, límite de tasa y reintentos
+
+        Las respuestas 200 se guardan en la caché (si hay) y las peticiones
+        repetidas dentro del TTL no salen a la red. Tras agotar los reintentos
+        retorna la última respuesta (el llamador decide con raise_for_status)
+        o relanza el último error de conexión.
+        """
+        kwargs.setdefault("timeout", self.timeout)
+
+        clave = None
+        if self.cache is not None and usar_cache:
+            clave, endpoint = self.cache.clave(self.proveedor, url, kwargs.get("params"))
+            guardada = self.cache.obtener(self.proveedor, clave)
+            if guardada is not None:
+                return self._respuesta_desde_cache(url, *guardada)
+
+        response = self._get_con_reintentos(url, **kwargs)
+
+        if clave is not None and response.status_code == 200:
+            self.cache.guardar(self.proveedor, clave, endpoint, response.content,
+                               response.headers.get("Content-Type"))
+
+        return response
+
+    @staticmethod
+    def _respuesta_desde_cache(url: str, contenido: bytes, tipo: Optional[str]) -> requests.Response:
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url
+        response._content = contenido
+        response.headers = CaseInsensitiveDict({"X-Cache": "HIT"})
+        if tipo:
+            response.headers["Content-Type"] = tipo
+        return response
+
+    def _get_con_reintentos(self, url: str, **kwargs) -> requests.Response:
+        for intento in range(self.reintentos + 1):
+            if self.limitador:
+                espera = self.limitador.adquirir()
+                with self._lock:
+                    self._espera_total += espera
+
+            inicio = time.perf_counter()
+            try:
+                response = self.session.get(url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self._registrar(time.perf_counter() - inicio, error=True)
+                if intento == self.reintentos:
+                    raise
+                pausa = self._pausa(intento)
+                logger.warning(f"⚠️  {self.proveedor}: {e.__class__.__name__}, reintento en {pausa:.1f}s")
+            else:
+                reintentable = response.status_code in ESTADOS_REINTENTABLES
+                self._registrar(time.perf_counter() - inicio, error=response.status_code >= 400)
+                if not reintentable or intento == self.reintentos:
+                    return response
+                pausa = self._pausa(intento, response)
+                logger.warning(f"⚠️  {self.proveedor}: HTTP {response.status_code}, reintento en {pausa:.1f}s")
+
+            with self._lock:
+                self._reintentos_hechos += 1
+            time.sleep(pausa)
+
+    def _registrar(self, latencia: float, error: bool = False):
+        with self._lock:
+            self._latencias.append(latencia)
+            self._peticiones += 1
+            if error:
+                self._errores += 1
+
+    def metricas(self) -> Dict[str, float]:
+        """Peticiones, errores, reintentos, espera por cuota y latencias (ms)"""
+        with self._lock:
+            latencias = sorted(self._latencias)
+            metricas = {
+                "proveedor": self.proveedor,
+                "peticiones": self._peticiones,
+                "errores": self._errores,
+                "reintentos": self._reintentos_hechos,
+                "espera_cuota_s": round(self._espera_total, 3),
+            }
+
+        if self.cache is not None:
+            cache = self.cache.estadisticas(self.proveedor)
+            metricas.update({"cache_hits": cache["hits"], "cache_misses": cache["misses"]})
+
+        if latencias:
+            metricas.update({
+                "latencia_media_ms": 1000 * sum(latencias) / len(latencias),
+                "latencia_p50_ms": 1000 * latencias[len(latencias) // 2],
+                "latencia_p95_ms": 1000 * latencias[min(len(latencias) - 1, int(len(latencias) * 0.95))],
+            })
+        return metricas
+
+
+_transportes: Dict[str, TransporteHTTP] = {}
+_transportes_lock = threading.Lock()
+_cache: Optional[CacheRespuestas] = None
+
+
+def obtener_cache() -> CacheRespuestas:
+    """Caché de respuestas compartida por todos los transportes"""
+    global _cache
+    with _transportes_lock:
+        if _cache is None:
+            _cache = CacheRespuestas()
+        return _cache
+
+
+def obtener_transporte(proveedor: str) -> TransporteHTTP:
+    """Transporte compartido del proveedor (se crea al primer uso con su cuota y la caché)"""
+    cache = obtener_cache()
+    with _transportes_lock:
+        if proveedor not in _transportes:
+            _transportes[proveedor] = TransporteHTTP(proveedor, cache=cache,
+                                                     **CUOTAS_PROVEEDOR.get(proveedor, {}))
+        return _transportes[proveedor]
+
+
+def metricas_transporte() -> pd.DataFrame:
+    """Métricas de todos los transportes creados, una fila por proveedor"""
+    with _transportes_lock:
+        transportes = list(_transportes.values())
+    return pd.DataFrame([t.metricas() for t in transportes])
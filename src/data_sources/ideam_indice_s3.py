@@ -0,0 +1,169 @@
+"""
+Índice local (SQLite) de los listados S3 de radares IDEAM
+Guarda el listado completo de cada (radar, día) para no repetir
+llamadas a list_objects_v2 sobre el mismo prefijo
+"""
+import sqlite3
+import time
+from contextlib import closing
+from datetime import datetime, timedelta
+from pathlib import Path
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class IndiceListadoS3:
+    """Caché persistente de listados S3 por radar y día
+
+    Un día se considera cerrado `dias_inmutables` días después de terminar
+    (IDEAM publica con 24h de retraso y no reescribe volúmenes antiguos). Un
+    listado tomado después de ese momento nunca expira; uno tomado antes (p. ej.
+    mientras el día aún se publicaba) sigue sujeto al TTL aunque el día ya sea
+    antiguo, para que los volúmenes que faltaban aparezcan.
+    """
+
+    def __init__(self, ruta_db, ttl=3600, dias_inmutables=2):
+        """
+        Args:
+            ruta_db: Ruta del archivo SQLite
+            ttl: Vigencia en segundos del listado de días recientes
+            dias_inmutables: Antigüedad en días a partir de la cual un listado no expira
+        """
+        self.ruta_db = Path(ruta_db)
+        self.ruta_db.parent.mkdir(parents=True, exist_ok=True)
+        self.ttl = ttl
+        self.dias_inmutables = dias_inmutables
+        self._crear_esquema()
+
+    def _conectar(self):
+        # Una conexión por operación: el índice se usa desde varios hilos de descarga
+        return closing(sqlite3.connect(self.ruta_db, timeout=30))
+
+    def _crear_esquema(self):
+        with self._conectar() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS listados (
+                    radar TEXT NOT NULL,
+                    dia TEXT NOT NULL,
+                    actualizado REAL NOT NULL,
+                    PRIMARY KEY (radar, dia)
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS objetos (
+                    key TEXT PRIMARY KEY,
+                    radar TEXT NOT NULL,
+                    dia TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    last_modified TEXT
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_objetos_dia ON objetos (radar, dia)")
+
+    @staticmethod
+    def _dia(fecha):
+        return fecha.strftime("%Y-%m-%d")
+
+    def es_inmutable(self, fecha, actualizado=None):
+        """
+        Indica si un listado del día ya no puede cambiar
+
+        Args:
+            fecha: Día listado
+            actualizado: Momento (epoch) en que se tomó el listado; por defecto ahora
+        """
+        dia = fecha.date() if isinstance(fecha, datetime) else fecha
+        cierre = datetime.combine(dia + timedelta(days=1 + self.dias_inmutables), datetime.min.time())
+        return (time.time() if actualizado is None else actualizado) >= cierre.timestamp()
+
+    def obtener(self, radar, fecha):
+        """
+        Retorna el listado guardado de un día o None si no existe o expiró
+
+        Returns:
+            Lista de dicts con key, size, last_modified y filename
+        """
+        dia = self._dia(fecha)
+
+        with self._conectar() as conn:
+            fila = conn.execute(
+                "SELECT actualizado FROM listados WHERE radar = ? AND dia = ?",
+                (radar, dia)
+            ).fetchone()
+
+            if fila is None:
+                return None
+
+            if not self.es_inmutable(fecha, fila[0]) and time.time() - fila[0] > self.ttl:
+                return None
+
+            filas = conn.execute(
+                "SELECT key, size, last_modified FROM objetos WHERE radar = ? AND dia = ? ORDER BY key",
+                (radar, dia)
+            ).fetchall()
+
+        return [
+            {
+                'key': key,
+                'size': size,
+                'last_modified': datetime.fromisoformat(last_modified) if last_modified else None,
+                'filename': key.rsplit('/', 1)[-1]
+            }
+            for key, size, last_modified in filas
+        ]
+
+    def guardar(self, radar, fecha, archivos):
+        """Reemplaza el listado de un (radar, día) por uno completo"""
+        dia = self._dia(fecha)
+
+        with self._conectar() as conn, conn:
+            conn.execute("DELETE FROM objetos WHERE radar = ? AND dia = ?", (radar, dia))
+            conn.executemany(
+                "INSERT OR REPLACE INTO objetos (key, radar, dia, size, last_modified) VALUES (?, ?, ?, ?, ?)",
+                [
+                    (a['key'], radar, dia, a['size'],
+                     a['last_modified'].isoformat() if a.get('last_modified') else None)
+                    for a in archivos
+                ]
+            )
+            conn.execute(
+                "INSERT OR REPLACE INTO listados (radar, dia, actualizado) VALUES (?, ?, ?)",
+                (radar, dia, time.time())
+            )
+
+    def tamaño(self, key):
+        """Tamaño en bytes de un objeto según el último listado, o None si no está indexado"""
+        with self._conectar() as conn:
+            fila = conn.execute("SELECT size FROM objetos WHERE key = ?", (key,)).fetchone()
+        return fila[0] if fila else None
+
+    def dias_con_datos(self, radar):
+        """Días indexados con al menos un archivo para el radar"""
+        with self._conectar() as conn:
+            filas = conn.execute(
+                "SELECT DISTINCT dia FROM objetos WHERE radar = ? ORDER BY dia",
+                (radar,)
+            ).fetchall()
+        return [fila[0] for fila in filas]
+
+    def ultimo_dia_con_datos(self, desde):
+        """
+        Día más reciente (>= desde) cuyo listado vigente contiene archivos
+
+        Returns:
+            Tupla (día 'YYYY-MM-DD', número de archivos, fecha del listado) o None
+        """
+        with self._conectar() as conn:
+            fila = conn.execute(
+                """
+                SELECT l.dia, COUNT(o.key), l.actualizado
+                FROM listados l JOIN objetos o ON o.radar = l.radar AND o.dia = l.dia
+                WHERE l.dia >= ? AND l.actualizado >= ?
+                GROUP BY l.radar, l.dia
+                ORDER BY l.dia DESC
+                LIMIT 1
+                """,
+                (self._dia(desde), time.time() - self.ttl)
+            ).fetchone()
+        return (fila[0], fila[1], datetime.fromtimestamp(fila[2])) if fila else None
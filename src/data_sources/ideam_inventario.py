@@ -0,0 +1,328 @@
+"""
+Inventario persistente (SQLite) de archivos de radar IDEAM descargados
+Evita recorrer y hacer stat() de todo data/Radar_IDEAM en cada consulta
+"""
+import json
+import os
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+import logging
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+class InventarioRadar:
+    """Inventario de archivos RAW indexado por ruta, con tamaño y mtime
+
+    Se actualiza de dos formas:
+    - `registrar()` al terminar cada descarga
+    - `reconciliar()`, que compara el mtime de cada directorio radar/YYYYMMDD
+      con el guardado y solo vuelve a listar los directorios que cambiaron
+    """
+
+    def __init__(self, base_dir="data/Radar_IDEAM", ruta_db=None):
+        """
+        Args:
+            base_dir: Directorio raíz con la estructura radar/YYYYMMDD/
+            ruta_db: Archivo SQLite (por defecto base_dir/inventario_radares.sqlite)
+        """
+        self.base_dir = Path(base_dir)
+        self.base_dir.mkdir(parents=True, exist_ok=True)
+        self.ruta_db = Path(ruta_db) if ruta_db else self.base_dir / 'inventario_radares.sqlite'
+        self._crear_esquema()
+
+    def _conectar(self):
+        # Una conexión por operación: se registra desde varios hilos de descarga
+        return closing(sqlite3.connect(self.ruta_db, timeout=30))
+
+    def _crear_esquema(self):
+        with self._conectar() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS archivos (
+                    ruta TEXT PRIMARY KEY,
+                    radar TEXT NOT NULL,
+                    fecha_directorio TEXT NOT NULL,
+                    archivo TEXT NOT NULL,
+                    tamaño_bytes INTEGER NOT NULL,
+                    mtime REAL NOT NULL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS directorios (
+                    radar TEXT NOT NULL,
+                    fecha_directorio TEXT NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    PRIMARY KEY (radar, fecha_directorio)
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_archivos_fecha ON archivos (radar, fecha_directorio)")
+
+    @staticmethod
+    def _es_archivo_radar(entrada):
+        return entrada.is_file() and not entrada.name.endswith('.txt')
+
+    def registrar(self, ruta):
+        """Agrega o actualiza un archivo recién descargado (ruta radar/YYYYMMDD/archivo)"""
+        ruta = Path(ruta)
+        stat = ruta.stat()
+
+        with self._conectar() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?, ?)",
+                (str(ruta), ruta.parent.parent.name, ruta.parent.name, ruta.name,
+                 stat.st_size, stat.st_mtime)
+            )
+
+    def reconciliar(self, radar=None):
+        """
+        Sincroniza el inventario con el disco revisando solo los directorios
+        de fecha cuyo mtime cambió desde la última reconciliación
+
+        Returns:
+            Número de directorios de fecha que se volvieron a listar
+        """
+        if radar:
+            radar_dirs = [self.base_dir / radar]
+        else:
+            radar_dirs = [d for d in self.base_dir.iterdir() if d.is_dir()]
+
+        with self._conectar() as conn, conn:
+            guardados = {
+                (r, f): mtime for r, f, mtime in conn.execute(
+                    "SELECT radar, fecha_directorio, mtime_ns FROM directorios"
+                    + (" WHERE radar = ?" if radar else ""),
+                    (radar,) if radar else ()
+                )
+            }
+            vistos = set()
+            revisados = 0
+
+            for radar_dir in radar_dirs:
+                if not radar_dir.is_dir():
+                    continue
+
+                with os.scandir(radar_dir) as entradas:
+                    fecha_dirs = [e for e in entradas if e.is_dir()]
+
+                for fecha_dir in fecha_dirs:
+
+                    clave = (radar_dir.name, fecha_dir.name)
+                    vistos.add(clave)
+                    mtime_ns = fecha_dir.stat().st_mtime_ns
+
+                    if guardados.get(clave) == mtime_ns:
+                        continue
+
+                    filas = []
+                    with os.scandir(fecha_dir.path) as entradas:
+                        for entrada in entradas:
+                            if self._es_archivo_radar(entrada):
+                                stat = entrada.stat()
+                                filas.append((entrada.path, radar_dir.name, fecha_dir.name,
+                                              entrada.name, stat.st_size, stat.st_mtime))
+
+                    conn.execute("DELETE FROM archivos WHERE radar = ? AND fecha_directorio = ?", clave)
+                    conn.executemany("INSERT OR REPLACE INTO archivos VALUES (?, ?, ?, ?, ?, ?)", filas)
+                    conn.execute("INSERT OR REPLACE INTO directorios VALUES (?, ?, ?)", (*clave, mtime_ns))
+                    revisados += 1
+
+            # Directorios que ya no existen en disco
+            for clave in set(guardados) - vistos:
+                conn.execute("DELETE FROM archivos WHERE radar = ? AND fecha_directorio = ?", clave)
+                conn.execute("DELETE FROM directorios WHERE radar = ? AND fecha_directorio = ?", clave)
+
+        if revisados:
+            logger.info(f"🔄 Inventario reconciliado: {revisados} directorios actualizados")
+
+        return revisados
+
+    def consultar(self, radar=None):
+        """
+        Retorna el inventario como DataFrame
+
+        Columnas: radar, fecha_directorio, archivo, ruta_completa, tamaño_mb, fecha_modificacion
+        """
+        query = """
+            SELECT radar, fecha_directorio, archivo, ruta AS ruta_completa,
+                   tamaño_bytes / 1048576.0 AS tamaño_mb, mtime AS fecha_modificacion
+            FROM archivos
+        """
+        params = ()
+        if radar:
+            query += " WHERE radar = ?"
+            params = (radar,)
+        query += " ORDER BY radar, fecha_directorio, archivo"
+
+        with self._conectar() as conn:
+            df = pd.read_sql_query(query, conn, params=params)
+
+        df['fecha_modificacion'] = pd.to_datetime(df['fecha_modificacion'], unit='s')
+        return df
+
+    def resumen_por_fecha(self, radar):
+        """Número de archivos y tamaño total (MB) por directorio de fecha"""
+        with self._conectar() as conn:
+            return pd.read_sql_query("""
+                SELECT fecha_directorio AS fecha, COUNT(*) AS num_archivos,
+                       SUM(tamaño_bytes) / 1048576.0 AS tamaño_total_mb
+                FROM archivos WHERE radar = ?
+                GROUP BY fecha_directorio ORDER BY fecha_directorio
+            """, conn, params=(radar,))
+
+    def resumen_por_radar(self):
+        """Número de archivos y tamaño total (MB) por radar"""
+        with self._conectar() as conn:
+            return pd.read_sql_query("""
+                SELECT radar, COUNT(*) AS archivos, SUM(tamaño_bytes) / 1048576.0 AS tamaño_mb
+                FROM archivos GROUP BY radar ORDER BY radar
+            """, conn)
+
+    def radares(self):
+        """Radares con al menos un archivo inventariado"""
+        with self._conectar() as conn:
+            return [fila[0] for fila in conn.execute("SELECT DISTINCT radar FROM archivos ORDER BY radar")]
+
+
+# Se incrementa cuando cambia cómo se calculan los datos por volumen (decodificador,
+# estadísticas, campos); las entradas de otra versión se tratan como ausentes
+VERSION_CACHE = 1
+
+
+def _a_json(valor):
+    """Tipos de NumPy y fechas que json no serializa por sí solo"""
+    if isinstance(valor, np.generic):
+        return valor.item()
+    if isinstance(valor, np.ndarray):
+        return valor.tolist()
+    return str(valor)
+
+
+class CacheVolumenesRadar:
+    """Metadatos y estadísticas por volumen RAW, en la misma base que el inventario
+
+    Los archivos RAW no cambian después de descargados, así que cada volumen
+    se decodifica una sola vez. El resultado se indexa por ruta absoluta,
+    tamaño, mtime_ns y VERSION_CACHE; si el archivo se reemplaza o cambia el
+    cálculo, la entrada deja de coincidir y se vuelve a calcular.
+    """
+
+    # Máximo de parámetros por consulta IN (límite de SQLite: 999)
+    LOTE_CONSULTA = 900
+
+    def __init__(self, base_dir="data/Radar_IDEAM", ruta_db=None):
+        """
+        Args:
+            base_dir: Directorio raíz de los radares
+            ruta_db: Archivo SQLite (por defecto base_dir/inventario_radares.sqlite)
+        """
+        self.base_dir = Path(base_dir)
+        self.ruta_db = Path(ruta_db) if ruta_db else self.base_dir / 'inventario_radares.sqlite'
+        self._crear_esquema()
+
+    def _conectar(self):
+        return closing(sqlite3.connect(self.ruta_db, timeout=30))
+
+    def _crear_esquema(self):
+        with self._conectar() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS volumenes (
+                    ruta TEXT PRIMARY KEY,
+                    tamaño_bytes INTEGER NOT NULL,
+                    mtime_ns INTEGER NOT NULL,
+                    con_estadisticas INTEGER NOT NULL,
+                    datos TEXT NOT NULL,
+                    version INTEGER NOT NULL DEFAULT 0
+                )
+            """)
+            # Bases creadas antes de versionar la caché
+            columnas = {fila[1] for fila in conn.execute("PRAGMA table_info(volumenes)")}
+            if 'version' not in columnas:
+                conn.execute("ALTER TABLE volumenes ADD COLUMN version INTEGER NOT NULL DEFAULT 0")
+
+    @staticmethod
+    def _clave(ruta):
+        """Ruta absoluta: el mismo archivo coincide sin importar el directorio de trabajo"""
+        return str(Path(ruta).resolve())
+
+    @staticmethod
+    def _firma(ruta):
+        stat = os.stat(ruta)
+        return stat.st_size, stat.st_mtime_ns
+
+    def consultar(self, rutas, estadisticas=True):
+        """
+        Entradas vigentes para las rutas dadas
+
+        Args:
+            rutas: Archivos RAW
+            estadisticas: Exigir entradas calculadas con estadísticas (las de
+                          solo encabezados no sirven en ese caso)
+
+        Returns:
+            Dict ruta (tal como se pasó) -> datos guardados; faltan las rutas
+            nuevas, modificadas o calculadas con otra VERSION_CACHE
+        """
+        firmas = {}
+        originales = {}
+        for ruta in rutas:
+            try:
+                clave = self._clave(ruta)
+                firmas[clave] = self._firma(ruta)
+            except OSError:
+                continue
+            originales[clave] = str(ruta)
+
+        claves = list(firmas)
+        vigentes = {}
+        with self._conectar() as conn:
+            for i in range(0, len(claves), self.LOTE_CONSULTA):
+                lote = claves[i:i + self.LOTE_CONSULTA]
+                filas = conn.execute(
+                    "SELECT ruta, tamaño_bytes, mtime_ns, con_estadisticas, datos FROM volumenes "
+                    f"WHERE version = ? AND ruta IN ({','.join('?' * len(lote))})",
+                    [VERSION_CACHE, *lote]
+                )
+                for ruta, tamaño, mtime_ns, con_estadisticas, datos in filas:
+                    if firmas[ruta] == (tamaño, mtime_ns) and (con_estadisticas or not estadisticas):
+                        vigentes[originales[ruta]] = json.loads(datos)
+        return vigentes
+
+    def guardar(self, resultados, estadisticas=True):
+        """
+        Guarda (o reemplaza) los datos calculados
+
+        Args:
+            resultados: Iterable de tuplas (ruta, dict de datos)
+            estadisticas: Si los datos incluyen las estadísticas del volumen
+
+        Returns:
+            Número de entradas guardadas
+        """
+        filas = []
+        for ruta, datos in resultados:
+            try:
+                clave = self._clave(ruta)
+                tamaño, mtime_ns = self._firma(ruta)
+            except OSError:
+                continue
+            filas.append((clave, tamaño, mtime_ns, int(estadisticas),
+                          json.dumps(datos, default=_a_json), VERSION_CACHE))
+
+        with self._conectar() as conn, conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO volumenes (ruta, tamaño_bytes, mtime_ns, con_estadisticas, datos, version) "
+                "VALUES (?, ?, ?, ?, ?, ?)", filas
+            )
+        return len(filas)
+
+    def purgar(self):
+        """Elimina las entradas de archivos que ya no existen en disco"""
+        with self._conectar() as conn, conn:
+            rutas = [fila[0] for fila in conn.execute("SELECT ruta FROM volumenes")]
+            huerfanas = [(ruta,) for ruta in rutas if not os.path.exists(ruta)]
+            conn.executemany("DELETE FROM volumenes WHERE ruta = ?", huerfanas)
+        return len(huerfanas)
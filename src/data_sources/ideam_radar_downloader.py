@@ -6,14 +6,18 @@ import os
 import boto3
 import gzip
 import numpy as np
-import pandas as pd
 from pathlib import Path
 from datetime import datetime, timedelta
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from botocore import UNSIGNED
 from botocore.config import Config
 import json
 
+from src.data_sources.ideam_indice_s3 import IndiceListadoS3
+from src.data_sources.ideam_inventario import InventarioRadar
+
 # Configuración de logging
 log_dir = Path("logs/ideam")
 log_dir.mkdir(parents=True, exist_ok=True)
@@ -73,19 +77,43 @@ class IDEAMRadarDownloader:
         }
     }
     
-    def __init__(self, base_dir="data/Radar_IDEAM"):
+    def __init__(self, base_dir="data/Radar_IDEAM", max_workers=8, s3_client=None,
+                 bucket_name='s3-radaresideam', ttl_listado=3600):
+        """
+        Args:
+            base_dir: Directorio local donde se guardan los archivos RAW
+            max_workers: Número máximo de descargas simultáneas en modo paralelo
+            s3_client: Cliente S3 ya configurado (opcional, útil para pruebas con moto)
+            bucket_name: Bucket de origen (por defecto el bucket público de IDEAM)
+            ttl_listado: Segundos que se reutiliza el listado S3 de un día reciente
+        """
         self.base_dir = Path(base_dir)
         self.base_dir.mkdir(parents=True, exist_ok=True)
-        
-        # Configurar cliente S3 sin credenciales (bucket público)
-        self.s3_client = boto3.client(
-            's3',
-            config=Config(signature_version=UNSIGNED),
-            region_name='us-east-1'
-        )
+        self.max_workers = max_workers
+        
+        # Configurar cliente S3 sin credenciales (bucket público).
+        # El cliente es thread-safe y se comparte entre todos los hilos de
+        # descarga, por eso el pool de conexiones se ajusta a max_workers.
+        if s3_client is None:
+            s3_client = boto3.client(
+                's3',
+                config=Config(
+                    signature_version=UNSIGNED,
+                    max_pool_connections=max(10, max_workers),
+                    retries={'max_attempts': 3, 'mode': 'standard'}
+                ),
+                region_name='us-east-1'
+            )
+        self.s3_client = s3_client
         
         # Bucket correcto según documentación oficial
-        self.bucket_name = 's3-radaresideam'
+        self.bucket_name = bucket_name
+        
+        # Índice local de listados S3 por (radar, día)
+        self.indice = IndiceListadoS3(self.base_dir / 'indice_s3.sqlite', ttl=ttl_listado)
+        
+        # Inventario persistente de archivos descargados
+        self.inventario = InventarioRadar(self.base_dir)
         
         logger.info("IDEAMRadarDownloader inicializado")
         logger.info(f"Bucket AWS: s3://{self.bucket_name}")
@@ -155,78 +183,196 @@ class IDEAMRadarDownloader:
         prefix = f"l2_data/{fecha.year}/{fecha.month:02d}/{fecha.day:02d}/{radar}/{prefijo_radar}{fecha:%y%m%d}"
         return prefix
     
-    def listar_archivos_disponibles(self, radar, fecha=None, limite=1000):
-        """Lista archivos disponibles en S3 para un radar específico"""
+    def listar_archivos_disponibles(self, radar, fecha=None, limite=None, usar_indice=True):
+        """
+        Lista archivos disponibles en S3 para un radar específico
+        
+        Recorre todas las páginas de list_objects_v2 y guarda el listado completo
+        del día en el índice local, de modo que las siguientes consultas del
+        mismo (radar, día) no necesitan ir a la red.
+        
+        Args:
+            radar: Nombre del radar
+            fecha: Día a listar (por defecto ayer)
+            limite: Número máximo de archivos a retornar (None = todos)
+            usar_indice: Consultar el índice local antes de listar en S3
+        """
         if fecha is None:
             # Por defecto, buscar ayer (los datos tienen 24h de delay)
             fecha = datetime.now() - timedelta(days=1)
         
+        archivos = self.indice.obtener(radar, fecha) if usar_indice else None
+        
+        if archivos is not None:
+            logger.info(f"📇 {len(archivos)} archivos para {radar} en {fecha.date()} (índice local)")
+            return archivos[:limite] if limite else archivos
+        
         prefix = self.crear_query_prefix(radar, fecha)
         
         logger.info(f"Buscando archivos en: s3://{self.bucket_name}/{prefix}")
         
         try:
-            response = self.s3_client.list_objects_v2(
-                Bucket=self.bucket_name,
-                Prefix=prefix,
-                MaxKeys=limite
-            )
+            paginator = self.s3_client.get_paginator('list_objects_v2')
             
             archivos = []
-            if 'Contents' in response:
-                for obj in response['Contents']:
+            for pagina in paginator.paginate(Bucket=self.bucket_name, Prefix=prefix):
+                for obj in pagina.get('Contents', []):
                     archivos.append({
                         'key': obj['Key'],
                         'size': obj['Size'],
                         'last_modified': obj['LastModified'],
                         'filename': os.path.basename(obj['Key'])
                     })
-                
+            
+            self.indice.guardar(radar, fecha, archivos)
+            
+            if archivos:
                 logger.info(f"✅ Encontrados {len(archivos)} archivos para {radar} en {fecha.date()}")
             else:
                 logger.warning(f"⚠️  No se encontraron archivos para {radar} en {fecha.date()}")
                 logger.info(f"💡 Sugerencia: Los datos tienen 24h de delay. Intente con fechas anteriores.")
             
-            return archivos
+            return archivos[:limite] if limite else archivos
             
         except Exception as e:
             logger.error(f"❌ Error listando archivos: {e}")
             return []
     
-    def descargar_archivo(self, radar, archivo_key, fecha=None):
-        """Descarga un archivo específico del radar"""
+    def _ruta_local(self, radar, archivo_key, fecha):
+        """Ruta local de un archivo siguiendo el esquema radar/YYYYMMDD/"""
+        return self.base_dir / radar / fecha.strftime("%Y%m%d") / os.path.basename(archivo_key)
+    
+    def _ruta_parcial(self, local_path):
+        """Ruta temporal de una descarga en curso (subdirectorio .parcial/ del día)"""
+        return local_path.parent / '.parcial' / (local_path.name + '.part')
+    
+    def _transferir(self, archivo_key, local_path, tamaño_esperado, chunk_size=1024 * 1024):
+        """
+        Descarga un objeto a un archivo temporal y lo renombra de forma atómica
+        
+        Si quedó un .part de una descarga interrumpida, continúa desde el último
+        byte recibido con un GET por rango en lugar de empezar de nuevo.
+        """
+        parcial = self._ruta_parcial(local_path)
+        parcial.parent.mkdir(parents=True, exist_ok=True)
+        offset = parcial.stat().st_size if parcial.exists() else 0
+        
+        if offset > tamaño_esperado:
+            parcial.unlink()
+            offset = 0
+        
+        if offset < tamaño_esperado:
+            kwargs = {'Bucket': self.bucket_name, 'Key': archivo_key}
+            if offset:
+                kwargs['Range'] = f"bytes={offset}-"
+                logger.info(f"↩️  Reanudando {local_path.name} desde {offset / (1024 * 1024):.2f} MB")
+            
+            respuesta = self.s3_client.get_object(**kwargs)
+            
+            # Si el servidor ignora el rango, se reescribe el archivo completo
+            modo = 'ab' if offset and respuesta.get('ContentRange') else 'wb'
+            with open(parcial, modo) as f:
+                for bloque in respuesta['Body'].iter_chunks(chunk_size):
+                    f.write(bloque)
+        
+        tamaño = parcial.stat().st_size
+        if tamaño != tamaño_esperado:
+            raise IOError(f"descarga incompleta ({tamaño} de {tamaño_esperado} bytes)")
+        
+        os.replace(parcial, local_path)
+    
+    def descargar_archivo(self, radar, archivo_key, fecha=None, reintentos=3, backoff=1.0,
+                          tamaño_esperado=None):
+        """
+        Descarga un archivo específico del radar
+        
+        La descarga se escribe en un archivo temporal y solo se mueve a la ruta
+        final cuando su tamaño coincide con el de S3, por lo que un archivo en
+        la ruta final siempre está completo. Un archivo local con tamaño distinto
+        al publicado se descarta y se vuelve a descargar.
+        
+        Args:
+            radar: Nombre del radar
+            archivo_key: Key del objeto en S3
+            fecha: Fecha del directorio local (por defecto ayer)
+            reintentos: Número de intentos antes de dar el archivo por fallido
+            backoff: Espera base en segundos; se duplica en cada reintento
+            tamaño_esperado: Tamaño en bytes según el listado (si no se indica
+                             se toma del índice o de un HEAD a S3)
+        """
         if fecha is None:
             fecha = datetime.now() - timedelta(days=1)
         
         # Crear directorio para el radar y fecha
-        radar_dir = self.base_dir / radar / fecha.strftime("%Y%m%d")
-        radar_dir.mkdir(parents=True, exist_ok=True)
+        local_path = self._ruta_local(radar, archivo_key, fecha)
+        local_path.parent.mkdir(parents=True, exist_ok=True)
+        filename = local_path.name
         
-        filename = os.path.basename(archivo_key)
-        local_path = radar_dir / filename
+        if tamaño_esperado is None:
+            tamaño_esperado = self.indice.tamaño(archivo_key)
         
-        # Verificar si ya existe
+        # Verificar si ya existe y está completo
         if local_path.exists():
-            logger.info(f"⏭️  Archivo ya existe: {filename}")
-            return local_path
-        
-        try:
-            logger.info(f"⬇️  Descargando: {filename}")
-            self.s3_client.download_file(
-                self.bucket_name,
-                archivo_key,
-                str(local_path)
-            )
-            file_size_mb = local_path.stat().st_size / (1024 * 1024)
-            logger.info(f"✅ Descargado: {filename} ({file_size_mb:.2f} MB)")
-            return local_path
+            tamaño_local = local_path.stat().st_size
+            if tamaño_esperado is None or tamaño_local == tamaño_esperado:
+                logger.info(f"⏭️  Archivo ya existe: {filename}")
+                return local_path
             
-        except Exception as e:
-            logger.error(f"❌ Error descargando {filename}: {e}")
-            return None
+            logger.warning(f"⚠️  Archivo incompleto: {filename} ({tamaño_local} de "
+                           f"{tamaño_esperado} bytes). Se descargará de nuevo")
+            local_path.unlink()
+        
+        for intento in range(1, reintentos + 1):
+            try:
+                if tamaño_esperado is None:
+                    tamaño_esperado = self.s3_client.head_object(
+                        Bucket=self.bucket_name, Key=archivo_key
+                    )['ContentLength']
+                
+                logger.info(f"⬇️  Descargando: {filename}")
+                self._transferir(archivo_key, local_path, tamaño_esperado)
+                self.inventario.registrar(local_path)
+                file_size_mb = local_path.stat().st_size / (1024 * 1024)
+                logger.info(f"✅ Descargado: {filename} ({file_size_mb:.2f} MB)")
+                return local_path
+                
+            except Exception as e:
+                if intento < reintentos:
+                    espera = backoff * 2 ** (intento - 1)
+                    logger.warning(f"⚠️  Intento {intento}/{reintentos} fallido para {filename}: {e}. "
+                                   f"Reintentando en {espera:.1f}s")
+                    time.sleep(espera)
+                else:
+                    logger.error(f"❌ Error descargando {filename}: {e}")
+        
+        return None
+    
+    def _descargar_tarea(self, radar, archivo, fecha):
+        """Descarga un archivo y retorna (ruta_local, bytes transferidos)"""
+        ruta = self._ruta_local(radar, archivo['key'], fecha)
+        parcial = self._ruta_parcial(ruta)
+        completo = ruta.exists() and ruta.stat().st_size == archivo['size']
+        previo = parcial.stat().st_size if parcial.exists() else 0
+        
+        local_path = self.descargar_archivo(radar, archivo['key'], fecha,
+                                            tamaño_esperado=archivo['size'])
+        if local_path is None or completo:
+            return local_path, 0
+        return local_path, max(local_path.stat().st_size - previo, 0)
     
-    def descargar_rango_fechas(self, radar, fecha_inicio, fecha_fin, max_archivos=None):
-        """Descarga archivos de un radar en un rango de fechas"""
+    def descargar_rango_fechas(self, radar, fecha_inicio, fecha_fin, max_archivos=None,
+                               paralelo=False, max_workers=None):
+        """
+        Descarga archivos de un radar en un rango de fechas
+        
+        Args:
+            radar: Nombre del radar
+            fecha_inicio: Fecha inicial (datetime)
+            fecha_fin: Fecha final (datetime)
+            max_archivos: Límite de archivos a descargar (None = sin límite)
+            paralelo: Descargar varios archivos a la vez con un pool de hilos
+            max_workers: Hilos de descarga (por defecto self.max_workers)
+        """
         logger.info(f"📡 Iniciando descarga para {radar}")
         logger.info(f"📅 Rango: {fecha_inicio.date()} a {fecha_fin.date()}")
         
@@ -236,9 +382,26 @@ class IDEAMRadarDownloader:
             logger.warning(f"⚠️  Los datos tienen 24h de delay. Ajustando fecha fin a {fecha_limite.date()}")
             fecha_fin = fecha_limite
         
+        if paralelo:
+            tareas = []
+            fecha_actual = fecha_inicio
+            while fecha_actual <= fecha_fin:
+                if max_archivos and len(tareas) >= max_archivos:
+                    break
+                logger.info(f"📅 Listando fecha: {fecha_actual.date()}")
+                for archivo in self.listar_archivos_disponibles(radar, fecha_actual):
+                    tareas.append((archivo, fecha_actual))
+                fecha_actual += timedelta(days=1)
+            
+            if max_archivos:
+                tareas = tareas[:max_archivos]
+            
+            return self.descargar_lote(radar, tareas, max_workers=max_workers)
+        
         archivos_descargados = []
         fecha_actual = fecha_inicio
         total_archivos = 0
+        inicio = time.monotonic()
         
         while fecha_actual <= fecha_fin:
             logger.info(f"📅 Procesando fecha: {fecha_actual.date()}")
@@ -253,7 +416,8 @@ class IDEAMRadarDownloader:
                         return archivos_descargados
                     
                     # Descargar archivo
-                    local_path = self.descargar_archivo(radar, archivo['key'], fecha_actual)
+                    local_path = self.descargar_archivo(radar, archivo['key'], fecha_actual,
+                                                        tamaño_esperado=archivo['size'])
                     if local_path:
                         archivos_descargados.append({
                             'radar': radar,
@@ -266,50 +430,110 @@ class IDEAMRadarDownloader:
             
             fecha_actual += timedelta(days=1)
         
-        logger.info(f"✅ Descarga completada. Total archivos: {len(archivos_descargados)}")
+        logger.info(f"✅ Descarga completada. Total archivos: {len(archivos_descargados)} "
+                    f"en {time.monotonic() - inicio:.1f}s")
         return archivos_descargados
     
-    def generar_inventario(self, radar=None):
-        """Genera un inventario de todos los archivos descargados"""
-        logger.info("📋 Generando inventario de archivos descargados")
+    def descargar_lote(self, radar, tareas, max_workers=None):
+        """
+        Descarga en paralelo una lista de archivos usando un pool de hilos acotado
+        
+        Args:
+            radar: Nombre del radar
+            tareas: Lista de tuplas (archivo, fecha) donde archivo es un dict
+                    de listar_archivos_disponibles
+            max_workers: Hilos de descarga (por defecto self.max_workers)
+        
+        Returns:
+            Lista de archivos descargados, en el mismo orden que las tareas
+        """
+        max_workers = max_workers or self.max_workers
+        total = len(tareas)
+        
+        if total == 0:
+            logger.warning("⚠️  No hay archivos para descargar")
+            return []
         
-        inventario = []
+        logger.info(f"🚀 Descarga paralela de {total} archivos con {max_workers} hilos")
         
-        # Si se especifica radar, solo ese
-        if radar:
-            radares_a_inventariar = [radar]
-        else:
-            radares_a_inventariar = [d.name for d in self.base_dir.iterdir() if d.is_dir()]
+        resultados = [None] * total
+        bytes_totales = 0
+        completados = 0
+        fallidos = 0
+        inicio = time.monotonic()
         
-        for radar_nombre in radares_a_inventariar:
-            radar_path = self.base_dir / radar_nombre
-            
-            if not radar_path.exists():
-                continue
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futuros = {
+                executor.submit(self._descargar_tarea, radar, archivo, fecha): idx
+                for idx, (archivo, fecha) in enumerate(tareas)
+            }
             
-            for fecha_dir in radar_path.iterdir():
-                if fecha_dir.is_dir():
-                    for archivo in fecha_dir.iterdir():
-                        if archivo.is_file() and not archivo.name.endswith('.txt'):
-                            info_radar = self.RADARES_DISPONIBLES.get(radar_nombre, {})
-                            inventario.append({
-                                'radar': radar_nombre,
-                                'ubicacion': info_radar.get('ubicacion', 'N/A'),
-                                'distancia_medellin_km': info_radar.get('distancia_medellin_km', 0),
-                                'fecha_directorio': fecha_dir.name,
-                                'archivo': archivo.name,
-                                'ruta_completa': str(archivo),
-                                'tamaño_mb': archivo.stat().st_size / (1024 * 1024),
-                                'fecha_modificacion': datetime.fromtimestamp(archivo.stat().st_mtime)
-                            })
-        
-        df_inventario = pd.DataFrame(inventario)
+            for futuro in as_completed(futuros):
+                idx = futuros[futuro]
+                archivo, fecha = tareas[idx]
+                completados += 1
+                
+                try:
+                    local_path, n_bytes = futuro.result()
+                except Exception as e:
+                    logger.error(f"❌ Error descargando {archivo['filename']}: {e}")
+                    local_path, n_bytes = None, 0
+                
+                if local_path is None:
+                    fallidos += 1
+                else:
+                    bytes_totales += n_bytes
+                    resultados[idx] = {
+                        'radar': radar,
+                        'fecha': fecha,
+                        'archivo': archivo['filename'],
+                        'ruta_local': str(local_path),
+                        'tamaño_mb': archivo['size'] / (1024 * 1024)
+                    }
+                
+                transcurrido = max(time.monotonic() - inicio, 1e-6)
+                logger.info(f"📦 Progreso: {completados}/{total} "
+                            f"({bytes_totales / (1024 * 1024):.1f} MB, "
+                            f"{bytes_totales / (1024 * 1024) / transcurrido:.2f} MB/s)")
+        
+        archivos_descargados = [r for r in resultados if r is not None]
+        transcurrido = max(time.monotonic() - inicio, 1e-6)
+        logger.info(f"✅ Descarga completada. Total archivos: {len(archivos_descargados)} "
+                    f"(fallidos: {fallidos}) - {bytes_totales / (1024 * 1024):.1f} MB "
+                    f"en {transcurrido:.1f}s ({bytes_totales / (1024 * 1024) / transcurrido:.2f} MB/s)")
+        return archivos_descargados
+    
+    def generar_inventario(self, radar=None, exportar_csv=False):
+        """
+        Genera un inventario de todos los archivos descargados
+        
+        El inventario vive en un índice SQLite que se reconcilia de forma
+        incremental (solo se listan los directorios de fecha modificados).
+        
+        Args:
+            radar: Radar a inventariar (None = todos)
+            exportar_csv: Escribir además inventario_radares.csv
+        """
+        logger.info("📋 Actualizando inventario de archivos descargados")
+        
+        self.inventario.reconciliar(radar)
+        df_inventario = self.inventario.consultar(radar)
         
         if not df_inventario.empty:
-            # Guardar inventario
-            inventario_path = self.base_dir / 'inventario_radares.csv'
-            df_inventario.to_csv(inventario_path, index=False)
-            logger.info(f"💾 Inventario guardado en: {inventario_path}")
+            info_radares = df_inventario['radar'].map(lambda r: self.RADARES_DISPONIBLES.get(r, {}))
+            df_inventario.insert(1, 'ubicacion', info_radares.map(lambda i: i.get('ubicacion', 'N/A')))
+            df_inventario.insert(2, 'distancia_medellin_km',
+                                 info_radares.map(lambda i: i.get('distancia_medellin_km', 0)))
+            
+            if exportar_csv:
+                inventario_path = self.base_dir / 'inventario_radares.csv'
+                df_inventario.to_csv(inventario_path, index=False)
+                logger.info(f"💾 Inventario exportado a: {inventario_path}")
+            
+            resumen_radar = self.inventario.resumen_por_radar().set_index('radar').round(2)
+            resumen_radar.columns = ['Archivos', 'Tamaño_MB']
+            if radar:
+                resumen_radar = resumen_radar.loc[[radar]]
             
             # Generar resumen
             resumen_path = self.base_dir / 'resumen_radares.txt'
@@ -323,11 +547,6 @@ class IDEAMRadarDownloader:
                 
                 f.write("Archivos por radar:\n")
                 f.write("-" * 80 + "\n")
-                resumen_radar = df_inventario.groupby('radar').agg({
-                    'archivo': 'count',
-                    'tamaño_mb': 'sum'
-                }).round(2)
-                resumen_radar.columns = ['Archivos', 'Tamaño_MB']
                 f.write(resumen_radar.to_string())
                 f.write("\n\n")
                 
@@ -335,14 +554,14 @@ class IDEAMRadarDownloader:
                 f.write("-" * 80 + "\n")
                 for radar, info in sorted(self.RADARES_DISPONIBLES.items(), 
                                         key=lambda x: x[1]['distancia_medellin_km']):
-                    tiene_datos = radar in df_inventario['radar'].values
+                    tiene_datos = radar in resumen_radar.index
                     f.write(f"\n{radar} {'✓' if tiene_datos else '✗'}:\n")
                     f.write(f"  Ubicación: {info['ubicacion']}\n")
                     f.write(f"  Coordenadas: {info['lat']:.4f}°N, {info['lon']:.4f}°W\n")
                     f.write(f"  Distancia a Medellín: {info['distancia_medellin_km']} km\n")
                     f.write(f"  Prefijo: {info['prefijo']}\n")
                     if tiene_datos:
-                        n_archivos = len(df_inventario[df_inventario['radar'] == radar])
+                        n_archivos = resumen_radar.loc[radar, 'Archivos']
                         f.write(f"  Archivos descargados: {n_archivos}\n")
             
             logger.info(f"📄 Resumen guardado en: {resumen_path}")
@@ -357,7 +576,7 @@ class IDEAMRadarDownloader:
         
         return df_inventario
     
-    def descargar_ultimos_datos(self, radar=None, dias=2, max_archivos=100):
+    def descargar_ultimos_datos(self, radar=None, dias=2, max_archivos=100, paralelo=False):
         """Descarga los datos más recientes de un radar"""
         if radar is None:
             radar = 'Barrancabermeja'  # Por defecto el más cercano a Medellín
@@ -373,11 +592,12 @@ class IDEAMRadarDownloader:
             radar, 
             fecha_inicio, 
             fecha_fin,
-            max_archivos=max_archivos
+            max_archivos=max_archivos,
+            paralelo=paralelo
         )
     
     def verificar_disponibilidad(self, radar, fecha):
-        """Verifica si hay datos disponibles para una fecha específica"""
+        """Verifica si hay datos disponibles para una fecha específica (usa el índice local)"""
         archivos = self.listar_archivos_disponibles(radar, fecha)
         return len(archivos) > 0
 
@@ -428,8 +648,10 @@ def menu_interactivo():
                 max_archivos = input("Límite de archivos (Enter para sin límite): ").strip()
                 max_archivos = int(max_archivos) if max_archivos.isdigit() else None
                 
+                paralelo = input("¿Descarga paralela? (s/N): ").strip().lower() == 's'
+                
                 archivos = downloader.descargar_rango_fechas(
-                    radar, fecha_inicio, fecha_fin, max_archivos
+                    radar, fecha_inicio, fecha_fin, max_archivos, paralelo=paralelo
                 )
                 print(f"\n✅ Descargados {len(archivos)} archivos")
                 input("\nPresione Enter para continuar...")
@@ -9,12 +9,14 @@ from pathlib import Path
 from urllib.parse import quote
 from dotenv import load_dotenv
 
+from src.data_sources.http_transport import obtener_transporte
+
 
 class MeteoblueClient:
     """Cliente para consumir los datos de la API de Meteoblue"""
     
     def __init__(self, api_key: str, shared_secret: Optional[str] = None, 
-                 data_dir: str = "data"):
+                 data_dir: str = "data", http=None):
         """
         Inicializa el cliente de Meteoblue
         
@@ -22,8 +24,10 @@ class MeteoblueClient:
             api_key: Tu API key de Meteoblue
             shared_secret: Secret compartido para firmar requests (opcional)
             data_dir: Directorio base para guardar datos e imágenes
+            http: Transporte HTTP (por defecto el compartido de "meteoblue")
         """
         self.api_key = api_key
+        self.http = http or obtener_transporte("meteoblue")
         self.shared_secret = shared_secret
         self.base_url = "https://my.meteoblue.com"
         self.data_dir = Path(data_dir)
@@ -87,7 +91,7 @@ class MeteoblueClient:
         url = self._sign_url(query, expire=expire)
         
         # Hacer request
-        response = requests.get(url)
+        response = self.http.get(url)
         response.raise_for_status()
         
         data = response.json()
@@ -153,7 +157,7 @@ class MeteoblueClient:
         url = self._sign_url(query, expire=expire)
         
         # Hacer request
-        response = requests.get(url)
+        response = self.http.get(url)
         response.raise_for_status()
         
         image_data = response.content
@@ -1,7 +1,5 @@
 import openmeteo_requests
 import pandas as pd
-import requests_cache
-from retry_requests import retry
 from datetime import datetime, timedelta
 from pathlib import Path
 import json
@@ -9,21 +7,23 @@ from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 import os
 
+from src.data_sources.http_transport import obtener_transporte
+
 
 class OpenMeteoClient:
     """Cliente para consumir datos de Open-Meteo API (Forecast y Historical)"""
     
-    def __init__(self, data_dir: str = "data"):
+    def __init__(self, data_dir: str = "data", http=None):
         """
         Inicializa el cliente de Open-Meteo
         
         Args:
             data_dir: Directorio base para guardar datos
+            http: Transporte HTTP (por defecto el compartido de "openmeteo",
+                  con caché, reintentos y límite de tasa)
         """
-        # Setup con cache y retry
-        cache_session = requests_cache.CachedSession('.cache', expire_after=3600)
-        retry_session = retry(cache_session, retries=5, backoff_factor=0.2)
-        self.client = openmeteo_requests.Client(session=retry_session)
+        self.http = http or obtener_transporte("openmeteo")
+        self.client = openmeteo_requests.Client(session=self.http)
         
         # URLs de las APIs
         self.forecast_url = "https://api.open-meteo.com/v1/forecast"
@@ -92,37 +92,11 @@ class OpenMeteoClient:
         
         # Procesar datos horarios
         if hourly_vars:
-            hourly = response.Hourly()
-            hourly_data = {
-                "date": pd.date_range(
-                    start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                    end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                    freq=pd.Timedelta(seconds=hourly.Interval()),
-                    inclusive="left"
-                )
-            }
-            
-            for i, var in enumerate(hourly_vars):
-                hourly_data[var] = hourly.Variables(i).ValuesAsNumpy()
-            
-            result["hourly"] = pd.DataFrame(data=hourly_data)
+            result["hourly"] = self._block_to_dataframe(response.Hourly(), hourly_vars)
         
         # Procesar datos diarios
         if daily_vars:
-            daily = response.Daily()
-            daily_data = {
-                "date": pd.date_range(
-                    start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-                    end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-                    freq=pd.Timedelta(seconds=daily.Interval()),
-                    inclusive="left"
-                )
-            }
-            
-            for i, var in enumerate(daily_vars):
-                daily_data[var] = daily.Variables(i).ValuesAsNumpy()
-            
-            result["daily"] = pd.DataFrame(data=daily_data)
+            result["daily"] = self._block_to_dataframe(response.Daily(), daily_vars)
         
         # Guardar datos
         if save_data:
@@ -191,41 +165,162 @@ class OpenMeteoClient:
         
         # Procesar datos horarios
         if hourly_vars:
-            hourly = response.Hourly()
-            hourly_data = {
-                "date": pd.date_range(
-                    start=pd.to_datetime(hourly.Time(), unit="s", utc=True),
-                    end=pd.to_datetime(hourly.TimeEnd(), unit="s", utc=True),
-                    freq=pd.Timedelta(seconds=hourly.Interval()),
-                    inclusive="left"
-                )
-            }
-            
-            for i, var in enumerate(hourly_vars):
-                hourly_data[var] = hourly.Variables(i).ValuesAsNumpy()
-            
-            result["hourly"] = pd.DataFrame(data=hourly_data)
+            result["hourly"] = self._block_to_dataframe(response.Hourly(), hourly_vars)
         
         # Procesar datos diarios
         if daily_vars:
-            daily = response.Daily()
-            daily_data = {
-                "date": pd.date_range(
-                    start=pd.to_datetime(daily.Time(), unit="s", utc=True),
-                    end=pd.to_datetime(daily.TimeEnd(), unit="s", utc=True),
-                    freq=pd.Timedelta(seconds=daily.Interval()),
-                    inclusive="left"
-                )
+            result["daily"] = self._block_to_dataframe(response.Daily(), daily_vars)
+        
+        # Guardar datos
+        if save_data:
+            self._save_historical_data(result, location_name, start_date, end_date)
+        
+        return result
+    
+    @staticmethod
+    def _block_to_dataframe(block, variables: List[str]) -> pd.DataFrame:
+        """Convierte un bloque Hourly()/Daily() de la respuesta en DataFrame"""
+        data = {
+            "date": pd.date_range(
+                start=pd.to_datetime(block.Time(), unit="s", utc=True),
+                end=pd.to_datetime(block.TimeEnd(), unit="s", utc=True),
+                freq=pd.Timedelta(seconds=block.Interval()),
+                inclusive="left"
+            )
+        }
+        
+        for i, var in enumerate(variables):
+            data[var] = block.Variables(i).ValuesAsNumpy()
+        
+        return pd.DataFrame(data=data)
+    
+    def _weather_api_batch(self, url: str, locations: List[Dict[str, Any]],
+                           params: Dict[str, Any],
+                           hourly_vars: List[str], daily_vars: List[str],
+                           chunk_size: int) -> Dict[str, pd.DataFrame]:
+        """
+        Consulta varias ubicaciones con listas de coordenadas separadas por comas
+        
+        La API devuelve una respuesta por punto y en el mismo orden de las
+        coordenadas, así que cada bloque de `chunk_size` ubicaciones es una
+        sola petición HTTP.
+        
+        Returns:
+            Diccionario con DataFrames largos "hourly", "daily" (columna location)
+            y "locations" con las coordenadas y elevación de cada punto
+        """
+        hourly_frames, daily_frames, metadata = [], [], []
+        
+        for start in range(0, len(locations), chunk_size):
+            chunk = locations[start:start + chunk_size]
+            chunk_params = {
+                **params,
+                "latitude": [loc["lat"] for loc in chunk],
+                "longitude": [loc["lon"] for loc in chunk],
+                "hourly": hourly_vars,
+                "daily": daily_vars,
+                "timezone": "auto"
             }
             
-            for i, var in enumerate(daily_vars):
-                daily_data[var] = daily.Variables(i).ValuesAsNumpy()
+            responses = self.client.weather_api(url, params=chunk_params)
             
-            result["daily"] = pd.DataFrame(data=daily_data)
+            for loc, response in zip(chunk, responses):
+                name = loc.get("name", f"{loc['lat']},{loc['lon']}")
+                metadata.append({
+                    "location": name,
+                    "latitude": response.Latitude(),
+                    "longitude": response.Longitude(),
+                    "elevation": response.Elevation(),
+                    "timezone": response.UtcOffsetSeconds()
+                })
+                
+                if hourly_vars:
+                    df = self._block_to_dataframe(response.Hourly(), hourly_vars)
+                    df.insert(0, "location", name)
+                    hourly_frames.append(df)
+                
+                if daily_vars:
+                    df = self._block_to_dataframe(response.Daily(), daily_vars)
+                    df.insert(0, "location", name)
+                    daily_frames.append(df)
+        
+        return {
+            "locations": pd.DataFrame(metadata),
+            "hourly": pd.concat(hourly_frames, ignore_index=True) if hourly_frames else None,
+            "daily": pd.concat(daily_frames, ignore_index=True) if daily_frames else None
+        }
+    
+    def get_forecast_batch(self, locations: List[Dict[str, Any]],
+                           days: int = 7,
+                           hourly_vars: Optional[List[str]] = None,
+                           daily_vars: Optional[List[str]] = None,
+                           chunk_size: int = 50,
+                           save_data: bool = True) -> Dict[str, Any]:
+        """
+        Obtiene el pronóstico de muchas ubicaciones en pocas peticiones
+        
+        Args:
+            locations: Lista de dicts con name, lat y lon
+            days: Días de pronóstico (1-16)
+            hourly_vars: Variables horarias a consultar
+            daily_vars: Variables diarias a consultar
+            chunk_size: Ubicaciones por petición HTTP
+            save_data: Si guardar los datos
+            
+        Returns:
+            Diccionario con "locations", "hourly" y "daily" en formato largo
+        """
+        if hourly_vars is None:
+            hourly_vars = ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"]
+        
+        if daily_vars is None:
+            daily_vars = ["temperature_2m_max", "temperature_2m_min", 
+                         "precipitation_sum", "wind_speed_10m_max"]
+        
+        result = self._weather_api_batch(self.forecast_url, locations,
+                                         {"forecast_days": days},
+                                         hourly_vars, daily_vars, chunk_size)
         
-        # Guardar datos
         if save_data:
-            self._save_historical_data(result, location_name, start_date, end_date)
+            self._save_batch_data(result, "forecast_batch")
+        
+        return result
+    
+    def get_historical_batch(self, locations: List[Dict[str, Any]],
+                             start_date: str, end_date: str,
+                             hourly_vars: Optional[List[str]] = None,
+                             daily_vars: Optional[List[str]] = None,
+                             chunk_size: int = 50,
+                             save_data: bool = True) -> Dict[str, Any]:
+        """
+        Obtiene datos históricos de muchas ubicaciones en pocas peticiones
+        
+        Args:
+            locations: Lista de dicts con name, lat y lon
+            start_date: Fecha inicio (YYYY-MM-DD)
+            end_date: Fecha fin (YYYY-MM-DD)
+            hourly_vars: Variables horarias a consultar
+            daily_vars: Variables diarias a consultar
+            chunk_size: Ubicaciones por petición HTTP
+            save_data: Si guardar los datos
+            
+        Returns:
+            Diccionario con "locations", "hourly", "daily" y "period"
+        """
+        if hourly_vars is None:
+            hourly_vars = ["temperature_2m", "relative_humidity_2m", "wind_speed_10m"]
+        
+        if daily_vars is None:
+            daily_vars = ["temperature_2m_max", "temperature_2m_min", 
+                         "precipitation_sum", "wind_speed_10m_max"]
+        
+        result = self._weather_api_batch(self.historical_url, locations,
+                                         {"start_date": start_date, "end_date": end_date},
+                                         hourly_vars, daily_vars, chunk_size)
+        result["period"] = {"start": start_date, "end": end_date}
+        
+        if save_data:
+            self._save_batch_data(result, f"historical_batch_{start_date}_{end_date}")
         
         return result
     
@@ -286,6 +381,16 @@ class OpenMeteoClient:
             daily_file = self.openmeteo_dir / f"historical_{location_name}_{start_date}_{end_date}_{timestamp}_daily.csv"
             data["daily"].to_csv(daily_file, index=False)
             print(f"📊 Datos históricos diarios guardados: {daily_file}")
+    
+    def _save_batch_data(self, data: Dict[str, Any], prefix: str):
+        """Guarda los datos de una consulta por lotes (un archivo por tipo)"""
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        
+        for key in ("locations", "hourly", "daily"):
+            if data.get(key) is not None:
+                filepath = self.openmeteo_dir / f"{prefix}_{timestamp}_{key}.csv"
+                data[key].to_csv(filepath, index=False)
+                print(f"📊 Datos {key} del lote guardados: {filepath}")
 
 
 # Ejemplo de uso
@@ -0,0 +1,266 @@
+"""
+Descarga histórica por bloques de Open-Meteo (archive API)
+Divide rangos largos en meses o años, los consulta en paralelo con
+límite de peticiones por minuto y los guarda en un dataset Parquet
+particionado por ubicación y año
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+import logging
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    PARQUET_AVAILABLE = True
+except ImportError:
+    PARQUET_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+class OpenMeteoBackfill:
+    """Backfill histórico reanudable sobre OpenMeteoClient.get_historical
+
+    Estructura de salida (Hive, legible con pd.read_parquet(output_dir)):
+        output_dir/location=<nombre>/year=<YYYY>/<YYYY>.parquet      (bloques anuales)
+        output_dir/location=<nombre>/year=<YYYY>/<YYYYMM>.parquet    (bloques mensuales)
+
+    Cada período calendario tiene un único archivo, escrito de forma atómica,
+    que sirve de checkpoint: al volver a ejecutar solo se piden los bloques
+    que faltan o que el archivo guardado no cubre por completo (el rango
+    cubierto va en los metadatos del Parquet). Un bloque incompleto se
+    vuelve a pedir junto con lo ya guardado y reemplaza al archivo, así que
+    extender end_date nunca duplica registros. Los bloques que terminan
+    dentro de `dias_retraso` de hoy se vuelven a pedir siempre porque el
+    archivo de Open-Meteo aún puede completarlos.
+
+    Si un año ya tiene archivo anual, los bloques mensuales de ese año se
+    resuelven sobre él, y al escribir un anual se absorben los mensuales del
+    mismo año; mezclar frecuencias nunca deja registros repetidos.
+    """
+
+    def __init__(self, client, output_dir: str = "data/data_openmeteo/historico",
+                 max_workers: int = 4, peticiones_por_minuto: int = 60,
+                 dias_retraso: int = 5):
+        """
+        Args:
+            client: OpenMeteoClient (o compatible) usado para cada bloque
+            output_dir: Raíz del dataset Parquet particionado
+            max_workers: Bloques consultados en paralelo
+            peticiones_por_minuto: Límite de peticiones hacia la API
+            dias_retraso: Días recientes que el archivo aún puede completar
+        """
+        if not PARQUET_AVAILABLE:
+            raise ImportError("OpenMeteoBackfill requiere pyarrow (pip install pyarrow)")
+
+        self.client = client
+        self.output_dir = Path(output_dir)
+        self.output_dir.mkdir(parents=True, exist_ok=True)
+        self.max_workers = max_workers
+        self.dias_retraso = dias_retraso
+
+        self._intervalo = 60.0 / peticiones_por_minuto if peticiones_por_minuto else 0.0
+        self._proxima = 0.0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def dividir_rango(start_date: str, end_date: str, frecuencia: str = "year") -> List[tuple]:
+        """
+        Divide [start_date, end_date] en bloques de mes o año calendario
+
+        Returns:
+            Lista de (inicio, fin) como date, ambos inclusive
+        """
+        inicio = datetime.strptime(start_date, "%Y-%m-%d").date()
+        fin = datetime.strptime(end_date, "%Y-%m-%d").date()
+
+        if frecuencia not in ("month", "year"):
+            raise ValueError(f"Frecuencia no soportada: {frecuencia} (use 'month' o 'year')")
+
+        bloques = []
+        actual = inicio
+        while actual <= fin:
+            if frecuencia == "year":
+                siguiente = date(actual.year + 1, 1, 1)
+            elif actual.month == 12:
+                siguiente = date(actual.year + 1, 1, 1)
+            else:
+                siguiente = date(actual.year, actual.month + 1, 1)
+
+            bloques.append((actual, min(siguiente - timedelta(days=1), fin)))
+            actual = siguiente
+
+        return bloques
+
+    CLAVE_COBERTURA = b"backfill_cobertura"
+
+    def _ruta_bloque(self, location_name: str, inicio: date, frecuencia: str = "year") -> Path:
+        """Archivo del período calendario del bloque (no depende de las fechas pedidas)"""
+        nombre = f"{inicio:%Y}.parquet" if frecuencia == "year" else f"{inicio:%Y%m}.parquet"
+        return self.output_dir / f"location={location_name}" / f"year={inicio.year}" / nombre
+
+    def _destino_bloque(self, location_name: str, inicio: date, frecuencia: str) -> tuple:
+        """
+        Archivo donde se escribe el bloque y archivos mensuales que reemplaza
+
+        Returns:
+            (ruta, lista de archivos mensuales del año que el anual absorbe)
+        """
+        anual = self._ruta_bloque(location_name, inicio, "year")
+        if frecuencia == "month" and not anual.exists():
+            return self._ruta_bloque(location_name, inicio, "month"), []
+        mensuales = sorted(r for r in anual.parent.glob(f"{inicio:%Y}[0-9][0-9].parquet"))
+        return anual, mensuales
+
+    @classmethod
+    def _cobertura(cls, ruta: Path) -> Optional[tuple]:
+        """Rango (inicio, fin) guardado en el archivo del bloque; None si no existe"""
+        if not ruta.exists():
+            return None
+        metadatos = pq.read_schema(ruta).metadata or {}
+        valor = metadatos.get(cls.CLAVE_COBERTURA)
+        if valor is None:
+            return None
+        inicio, fin = valor.decode().split("_")
+        return (datetime.strptime(inicio, "%Y%m%d").date(), datetime.strptime(fin, "%Y%m%d").date())
+
+    def _bloque_completo(self, cobertura: Optional[tuple], inicio: date, fin: date) -> bool:
+        """Un bloque está completo si el archivo cubre [inicio, fin] y ya no puede cambiar"""
+        limite = date.today() - timedelta(days=self.dias_retraso)
+        return (cobertura is not None and cobertura[0] <= inicio and fin <= cobertura[1]
+                and fin < limite)
+
+    def _esperar_turno(self):
+        """Espacia el inicio de las peticiones según peticiones_por_minuto"""
+        with self._lock:
+            ahora = time.monotonic()
+            espera = self._proxima - ahora
+            self._proxima = max(ahora, self._proxima) + self._intervalo
+
+        if espera > 0:
+            time.sleep(espera)
+
+    def _descargar_bloque(self, location: Dict[str, Any], inicio: date, fin: date,
+                          hourly_vars: Optional[List[str]], ruta: Path,
+                          absorbidos: List[Path] = ()) -> int:
+        """Consulta un bloque y lo escribe de forma atómica; retorna el número de registros"""
+        self._esperar_turno()
+
+        result = self.client.get_historical(
+            location["lat"], location["lon"],
+            inicio.strftime("%Y-%m-%d"), fin.strftime("%Y-%m-%d"),
+            location_name=location["name"],
+            hourly_vars=hourly_vars,
+            daily_vars=[],
+            save_data=False
+        )
+
+        hourly = result.get("hourly")
+        if hourly is None:
+            hourly = pd.DataFrame()
+
+        ruta.parent.mkdir(parents=True, exist_ok=True)
+        # Prefijo "." para que pyarrow ignore temporales de ejecuciones interrumpidas
+        temporal = ruta.parent / f".{ruta.name}.part"
+        tabla = pa.Table.from_pandas(hourly, preserve_index=False)
+        metadatos = dict(tabla.schema.metadata or {})
+        metadatos[self.CLAVE_COBERTURA] = f"{inicio:%Y%m%d}_{fin:%Y%m%d}".encode()
+        pq.write_table(tabla.replace_schema_metadata(metadatos), temporal)
+        os.replace(temporal, ruta)
+        # Mensuales absorbidos por el anual: sus registros ya están en él
+        for absorbido in absorbidos:
+            absorbido.unlink(missing_ok=True)
+
+        return len(hourly)
+
+    def backfill(self, locations: List[Dict[str, Any]], start_date: str, end_date: str,
+                 frecuencia: str = "year",
+                 hourly_vars: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Descarga el histórico horario de varias ubicaciones por bloques
+
+        Args:
+            locations: Lista de dicts con name, lat y lon
+            start_date: Fecha inicio (YYYY-MM-DD)
+            end_date: Fecha fin (YYYY-MM-DD)
+            frecuencia: Tamaño del bloque ('month' o 'year')
+            hourly_vars: Variables horarias (por defecto las de get_historical)
+
+        Returns:
+            Resumen con bloques descargados, omitidos, fallidos y registros
+        """
+        bloques = self.dividir_rango(start_date, end_date, frecuencia)
+
+        # Por archivo de destino: varios bloques mensuales pueden caer en un mismo anual
+        por_ruta = {}
+        omitidos = 0
+        for location in locations:
+            for inicio, fin in bloques:
+                ruta, absorbidos = self._destino_bloque(location["name"], inicio, frecuencia)
+                if self._bloque_completo(self._cobertura(ruta), inicio, fin):
+                    omitidos += 1
+                    continue
+                if ruta in por_ruta:
+                    _, desde, hasta, _ = por_ruta[ruta]
+                    por_ruta[ruta] = (location, min(inicio, desde), max(fin, hasta), absorbidos)
+                    continue
+                # El archivo se reemplaza completo: se pide también lo que ya tenía
+                # él y lo que tenían los mensuales que absorbe
+                for cobertura in map(self._cobertura, [ruta, *absorbidos]):
+                    if cobertura is not None:
+                        inicio, fin = min(inicio, cobertura[0]), max(fin, cobertura[1])
+                por_ruta[ruta] = (location, inicio, fin, absorbidos)
+        pendientes = [(location, inicio, fin, ruta, absorbidos)
+                      for ruta, (location, inicio, fin, absorbidos) in por_ruta.items()]
+
+        print(f"📥 Backfill Open-Meteo: {len(pendientes)} bloques pendientes, "
+              f"{omitidos} ya descargados")
+
+        resumen = {"descargados": 0, "omitidos": omitidos, "fallidos": [], "registros": 0}
+        if not pendientes:
+            return resumen
+
+        inicio_total = time.monotonic()
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futuros = {
+                executor.submit(self._descargar_bloque, location, inicio, fin, hourly_vars, ruta, absorbidos):
+                    (location["name"], inicio, fin)
+                for location, inicio, fin, ruta, absorbidos in pendientes
+            }
+
+            for futuro in as_completed(futuros):
+                nombre, inicio, fin = futuros[futuro]
+                try:
+                    resumen["registros"] += futuro.result()
+                    resumen["descargados"] += 1
+                    print(f"  ✅ {nombre} {inicio} → {fin} "
+                          f"[{resumen['descargados']}/{len(pendientes)}]")
+                except Exception as e:
+                    resumen["fallidos"].append((nombre, str(inicio), str(fin)))
+                    logger.error(f"❌ {nombre} {inicio} → {fin}: {e}")
+
+        print(f"✅ Backfill completado en {time.monotonic() - inicio_total:.1f}s: "
+              f"{resumen['descargados']} bloques, {resumen['registros']:,} registros"
+              + (f", {len(resumen['fallidos'])} fallidos (se reintentan en la próxima ejecución)"
+                 if resumen["fallidos"] else ""))
+
+        return resumen
+
+    def leer(self, location_name: Optional[str] = None) -> pd.DataFrame:
+        """Lee el dataset completo o el de una ubicación, ordenado por fecha"""
+        ruta = self.output_dir / f"location={location_name}" if location_name else self.output_dir
+        if not ruta.exists():
+            return pd.DataFrame()
+
+        df = pd.read_parquet(ruta)
+        if location_name:
+            df.insert(0, "location", location_name)
+
+        return df.sort_values([c for c in ("location", "date") if c in df.columns]).reset_index(drop=True)
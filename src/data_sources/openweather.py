@@ -1,25 +1,27 @@
-import requests
 import json
 from datetime import datetime, timedelta
 from pathlib import Path
 from typing import Optional, Dict, Any, List
 from dotenv import load_dotenv
 import os
-import time
+
+from src.data_sources.http_transport import obtener_transporte
 
 
 class OpenWeatherMapClient:
     """Cliente para consumir datos de OpenWeatherMap API (servicios gratuitos)"""
     
-    def __init__(self, api_key: str, data_dir: str = "data"):
+    def __init__(self, api_key: str, data_dir: str = "data", http=None):
         """
         Inicializa el cliente de OpenWeatherMap
         
         Args:
             api_key: Tu API key de OpenWeatherMap
             data_dir: Directorio base para guardar datos
+            http: Transporte HTTP (por defecto el compartido de "openweather")
         """
         self.api_key = api_key
+        self.http = http or obtener_transporte("openweather")
         self.base_url = "https://api.openweathermap.org/data/2.5"
         self.geo_url = "http://api.openweathermap.org/geo/1.0"
         
@@ -48,7 +50,7 @@ class OpenWeatherMapClient:
         }
         
         try:
-            response = requests.get(url, params=params)
+            response = self.http.get(url, params=params)
             response.raise_for_status()
             data = response.json()
             
@@ -88,7 +90,7 @@ class OpenWeatherMapClient:
             "lang": "es"
         }
         
-        response = requests.get(url, params=params)
+        response = self.http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -155,7 +157,7 @@ class OpenWeatherMapClient:
             "lang": "es"
         }
         
-        response = requests.get(url, params=params)
+        response = self.http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -228,7 +230,7 @@ class OpenWeatherMapClient:
             "appid": self.api_key
         }
         
-        response = requests.get(url, params=params)
+        response = self.http.get(url, params=params)
         response.raise_for_status()
         data = response.json()
         
@@ -295,19 +297,16 @@ class OpenWeatherMapClient:
         
         try:
             report["current"] = self.get_current_weather(lat, lon, location_name, save_data=False)
-            time.sleep(0.5)  # Evitar rate limiting
         except Exception as e:
             print(f"⚠️  Error obteniendo clima actual: {e}")
         
         try:
             report["forecast"] = self.get_forecast_5day(lat, lon, location_name, save_data=False)
-            time.sleep(0.5)
         except Exception as e:
             print(f"⚠️  Error obteniendo pronóstico: {e}")
         
         try:
             report["air_quality"] = self.get_air_pollution(lat, lon, location_name, save_data=False)
-            time.sleep(0.5)
         except Exception as e:
             print(f"⚠️  Error obteniendo calidad del aire: {e}")
         
@@ -0,0 +1,205 @@
+"""
+Caché persistente (SQLite) de respuestas HTTP compartida por todos los proveedores
+Las entradas se identifican por proveedor, endpoint y parámetros con las
+coordenadas redondeadas, expiran según el ciclo de actualización de cada
+modelo y se desalojan por LRU cuando la caché supera su tamaño máximo
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+# Vigencia en segundos por proveedor; la primera coincidencia en la ruta del endpoint gana
+TTL_PROVEEDOR = {
+    "openweather": [("/weather", 600),            # clima actual: se actualiza cada ~10 min
+                    ("/forecast", 3 * 3600),      # pronóstico 5 días en pasos de 3 h
+                    ("/air_pollution", 3600),
+                    ("/geo/", 30 * 86400),
+                    ("", 600)],
+    "openmeteo": [("/archive", 86400),            # histórico: cambia una vez al día
+                  ("", 3600)],                    # modelos horarios
+    "meteoblue": [("", 3 * 3600)],
+    "meteosource": [("", 3600)],
+}
+TTL_DEFECTO = 3600
+
+# Parámetros que no forman parte de la clave (credenciales y firmas)
+PARAMETROS_EXCLUIDOS = {"apikey", "appid", "key", "sig", "expire"}
+PARAMETROS_COORDENADAS = {"lat", "lon", "latitude", "longitude"}
+
+
+class CacheRespuestas:
+    """Caché LRU con TTL por proveedor para respuestas HTTP exitosas"""
+
+    def __init__(self, ruta_db="data/cache_http.sqlite", max_mb=200, decimales=3, ttl=None):
+        """
+        Args:
+            ruta_db: Archivo SQLite de la caché
+            max_mb: Tamaño máximo del contenido almacenado antes de desalojar
+            decimales: Decimales de las coordenadas en la clave (3 ≈ 110 m)
+            ttl: Vigencias por proveedor (sobrescribe TTL_PROVEEDOR)
+        """
+        self.ruta_db = Path(ruta_db)
+        self.ruta_db.parent.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self.decimales = decimales
+        self.ttl = {**TTL_PROVEEDOR, **(ttl or {})}
+
+        self._lock = threading.Lock()
+        self._estadisticas = defaultdict(Counter)
+        self._crear_esquema()
+
+    def _conectar(self):
+        # Una conexión por operación: la caché se usa desde varios hilos
+        return closing(sqlite3.connect(self.ruta_db, timeout=30))
+
+    def _crear_esquema(self):
+        with self._conectar() as conn, conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS respuestas (
+                    clave TEXT PRIMARY KEY,
+                    proveedor TEXT NOT NULL,
+                    endpoint TEXT NOT NULL,
+                    expira REAL NOT NULL,
+                    ultimo_acceso REAL NOT NULL,
+                    tamaño INTEGER NOT NULL,
+                    tipo TEXT,
+                    contenido BLOB NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_respuestas_acceso ON respuestas (ultimo_acceso)")
+
+    def _redondear(self, valor):
+        """Redondea una coordenada, una lista de coordenadas o una cadena separada por comas"""
+        if isinstance(valor, (list, tuple)):
+            return [self._redondear(v) for v in valor]
+        try:
+            return round(float(valor), self.decimales)
+        except (TypeError, ValueError):
+            if isinstance(valor, str) and "," in valor:
+                return [self._redondear(v) for v in valor.split(",")]
+            return valor
+
+    def clave(self, proveedor: str, url: str, params: Optional[Dict[str, Any]] = None) -> Tuple[str, str]:
+        """
+        Clave de caché de una petición
+
+        Returns:
+            (clave, endpoint) donde endpoint es host + ruta sin query string
+        """
+        partes = urlsplit(url)
+        endpoint = f"{partes.netloc}{partes.path}"
+
+        todos = dict(parse_qsl(partes.query))
+        todos.update(params or {})
+
+        normalizados = {}
+        for nombre, valor in todos.items():
+            if nombre.lower() in PARAMETROS_EXCLUIDOS:
+                continue
+            if nombre.lower() in PARAMETROS_COORDENADAS:
+                valor = self._redondear(valor)
+            normalizados[nombre] = valor
+
+        texto = json.dumps([proveedor, endpoint, normalizados], sort_keys=True, default=str)
+        return hashlib.sha1(texto.encode()).hexdigest(), endpoint
+
+    def ttl_para(self, proveedor: str, endpoint: str) -> float:
+        for fragmento, ttl in self.ttl.get(proveedor, []):
+            if fragmento in endpoint:
+                return ttl
+        return TTL_DEFECTO
+
+    def obtener(self, proveedor: str, clave: str) -> Optional[Tuple[bytes, Optional[str]]]:
+        """Contenido y tipo de una entrada vigente, o None (y la entrada expirada se borra)"""
+        ahora = time.time()
+
+        with self._conectar() as conn, conn:
+            fila = conn.execute(
+                "SELECT expira, tipo, contenido FROM respuestas WHERE clave = ?", (clave,)
+            ).fetchone()
+
+            if fila is not None and fila[0] <= ahora:
+                conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave,))
+                fila = None
+
+            if fila is not None:
+                conn.execute("UPDATE respuestas SET ultimo_acceso = ? WHERE clave = ?", (ahora, clave))
+
+        with self._lock:
+            self._estadisticas[proveedor]["hits" if fila else "misses"] += 1
+
+        return (fila[2], fila[1]) if fila else None
+
+    def guardar(self, proveedor: str, clave: str, endpoint: str,
+                contenido: bytes, tipo: Optional[str] = None):
+        """Guarda una respuesta y desaloja las menos usadas si se supera el tamaño máximo"""
+        ahora = time.time()
+        expira = ahora + self.ttl_para(proveedor, endpoint)
+
+        with self._conectar() as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO respuestas VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (clave, proveedor, endpoint, expira, ahora, len(contenido), tipo, contenido)
+            )
+
+            total = conn.execute("SELECT COALESCE(SUM(tamaño), 0) FROM respuestas").fetchone()[0]
+            desalojadas = 0
+            if total > self.max_bytes:
+                # Primero lo expirado, luego por último acceso
+                for clave_vieja, tamaño in conn.execute(
+                    "SELECT clave, tamaño FROM respuestas ORDER BY expira > ?, ultimo_acceso",
+                    (ahora,)
+                ).fetchall():
+                    if total <= self.max_bytes:
+                        break
+                    conn.execute("DELETE FROM respuestas WHERE clave = ?", (clave_vieja,))
+                    total -= tamaño
+                    desalojadas += 1
+
+        with self._lock:
+            self._estadisticas[proveedor]["almacenadas"] += 1
+            self._estadisticas[proveedor]["desalojadas"] += desalojadas
+
+    def estadisticas(self, proveedor: Optional[str] = None) -> Dict[str, Any]:
+        """Hits, misses, tasa de acierto y entradas/tamaño almacenados (global o por proveedor)"""
+        with self._lock:
+            if proveedor:
+                contadores = Counter(self._estadisticas[proveedor])
+            else:
+                contadores = sum(self._estadisticas.values(), Counter())
+
+        consulta = "SELECT COUNT(*), COALESCE(SUM(tamaño), 0) FROM respuestas"
+        with self._conectar() as conn:
+            entradas, tamaño = conn.execute(
+                consulta + (" WHERE proveedor = ?" if proveedor else ""),
+                (proveedor,) if proveedor else ()
+            ).fetchone()
+
+        consultas = contadores["hits"] + contadores["misses"]
+        return {
+            "hits": contadores["hits"],
+            "misses": contadores["misses"],
+            "tasa_acierto": contadores["hits"] / consultas if consultas else 0.0,
+            "desalojadas": contadores["desalojadas"],
+            "entradas": entradas,
+            "tamaño_mb": tamaño / 1048576,
+        }
+
+    def limpiar(self, proveedor: Optional[str] = None):
+        """Borra todas las entradas (o las de un proveedor)"""
+        with self._conectar() as conn, conn:
+            if proveedor:
+                conn.execute("DELETE FROM respuestas WHERE proveedor = ?", (proveedor,))
+            else:
+                conn.execute("DELETE FROM respuestas")
@@ -3,5 +3,6 @@ Inicializador del módulo pipelines
 """
 
 from .climate_pipeline import ClimateDataPipeline
+from .pipeline_metrics import PipelineMetrics
 
-__all__ = ['ClimateDataPipeline']
+__all__ = ['ClimateDataPipeline', 'PipelineMetrics']
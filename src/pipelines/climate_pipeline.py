@@ -3,6 +3,9 @@ Pipelines ETL para procesamiento end-to-end de datos climáticos
 Orquesta: Carga → Validación → Limpieza → Transformación
 """
 
+import json
+import os
+import numpy as np
 import pandas as pd
 from pathlib import Path
 from typing import Union, Optional, Callable
@@ -10,7 +13,9 @@ import logging
 from datetime import datetime
 
 from src.data_loaders import UnifiedDataLoader
+from src.data_loaders.parquet_store import ParquetStore, PARQUET_AVAILABLE
 from src.validators import DataValidator
+from .pipeline_metrics import PipelineMetrics
 
 logger = logging.getLogger(__name__)
 
@@ -22,13 +27,23 @@ class ClimateDataPipeline:
     Uso:
         pipeline = ClimateDataPipeline("data")
         df_clean = pipeline.execute()
+        pipeline.metrics.summary()  # tiempo, CPU, memoria y filas por etapa
     """
     
-    def __init__(self, data_dir: Union[str, Path] = "data"):
-        """Inicializa pipeline"""
+    def __init__(self, data_dir: Union[str, Path] = "data",
+                 profile_stage: Optional[str] = None, profiler: str = 'cprofile'):
+        """
+        Inicializa pipeline
+        
+        Args:
+            data_dir: Directorio de datos
+            profile_stage: Etapa a perfilar ('load', 'validate', 'fill', 'dedup', 'resample', 'write')
+            profiler: 'cprofile' o 'pyinstrument'
+        """
         self.data_dir = Path(data_dir)
         self.loader = UnifiedDataLoader(data_dir)
         self.history = []
+        self.metrics = PipelineMetrics(profile_stage, profiler)
     
     def execute(self, 
                 validate: bool = True,
@@ -50,10 +65,13 @@ class ClimateDataPipeline:
         logger.info("="*60)
         logger.info("INICIANDO PIPELINE DE PROCESAMIENTO")
         logger.info("="*60)
+        self.metrics.reset()
         
         # Step 1: Load
         logger.info("\n[1/5] CARGANDO DATOS...")
-        df = self.loader.load_all(standardize=True, resample_freq=None)
+        with self.metrics.stage('load') as etapa:
+            df = self.loader.load_all(standardize=True, resample_freq=None)
+            etapa['rows_out'] = len(df)
         
         if df.empty:
             logger.error("No se cargaron datos")
@@ -64,7 +82,9 @@ class ClimateDataPipeline:
         # Step 2: Validate
         if validate:
             logger.info("\n[2/5] VALIDANDO DATOS...")
-            df, reports = DataValidator.validate_all(df, remove_outliers=remove_outliers)
+            with self.metrics.stage('validate', rows_in=len(df)) as etapa:
+                df, reports = DataValidator.validate_all(df, remove_outliers=remove_outliers)
+                etapa['rows_out'] = len(df)
             self._log_step(f"Validación: {len(df)} registros después de eliminar outliers")
         else:
             logger.info("\n[2/5] VALIDACIÓN OMITIDA")
@@ -73,7 +93,9 @@ class ClimateDataPipeline:
         if fill_nulls:
             logger.info("\n[3/5] RELLENANDO VALORES NULOS...")
             initial_nulls = df.isna().sum().sum()
-            df = DataValidator.fill_missing(df, method='linear')
+            with self.metrics.stage('fill', rows_in=len(df)) as etapa:
+                df = DataValidator.fill_missing(df, method='linear')
+                etapa['rows_out'] = len(df)
             self._log_step(f"Nulos rellenados: {initial_nulls} → {df.isna().sum().sum()}")
         else:
             logger.info("\n[3/5] RELLENADO OMITIDO")
@@ -82,9 +104,12 @@ class ClimateDataPipeline:
         logger.info("\n[4/5] VERIFICANDO DUPLICADOS...")
         dup_subset = [col for col in ['timestamp', 'location'] if col in df.columns]
         if dup_subset:
-            duplicates = DataValidator.detect_duplicates(df, subset=dup_subset)
+            with self.metrics.stage('dedup', rows_in=len(df)) as etapa:
+                duplicates = DataValidator.detect_duplicates(df, subset=dup_subset)
+                if duplicates > 0:
+                    df = df.drop_duplicates(subset=dup_subset, keep='first')
+                etapa['rows_out'] = len(df)
             if duplicates > 0:
-                df = df.drop_duplicates(subset=dup_subset, keep='first')
                 self._log_step(f"Duplicados eliminados: {duplicates}")
             else:
                 self._log_step("Sin duplicados")
@@ -95,12 +120,14 @@ class ClimateDataPipeline:
         if resample_freq:
             logger.info(f"\n[5/5] RESAMPLEANDO A {resample_freq}...")
             if 'timestamp' in df.columns:
-                df['timestamp'] = pd.to_datetime(df['timestamp'])
-                numeric_cols = df.select_dtypes(include=['number']).columns
-                df_resampled = df.set_index('timestamp').resample(resample_freq).agg({
-                    col: 'mean' for col in numeric_cols
-                })
-                df = df_resampled.reset_index()
+                with self.metrics.stage('resample', rows_in=len(df)) as etapa:
+                    df['timestamp'] = pd.to_datetime(df['timestamp'])
+                    numeric_cols = df.select_dtypes(include=['number']).columns
+                    df_resampled = df.set_index('timestamp').resample(resample_freq).agg({
+                        col: 'mean' for col in numeric_cols
+                    })
+                    df = df_resampled.reset_index()
+                    etapa['rows_out'] = len(df)
                 self._log_step(f"Resampleado: {len(df)} registros")
         else:
             logger.info("\n[5/5] RESAMPLEO OMITIDO")
@@ -117,6 +144,333 @@ class ClimateDataPipeline:
         
         return df
     
+    def execute_streaming(self,
+                          output_dir: Union[str, Path] = None,
+                          validate: bool = True,
+                          fill_nulls: bool = True,
+                          remove_outliers: bool = True,
+                          resample_freq: Optional[str] = None,
+                          batch_rows: int = 100_000) -> Path:
+        """
+        Ejecuta el pipeline por lotes, con memoria acotada por el tamaño del lote
+        
+        Cada lote se valida, rellena y deduplica por separado y se escribe
+        de inmediato como un archivo Parquet del directorio de salida. Los
+        duplicados se detectan con un arreglo ordenado de hashes de 64 bits
+        de (timestamp, location), y el resampleo acumula suma y conteo por
+        intervalo, así que solo se guardan los intervalos y no las filas.
+        Los huecos se rellenan dentro de cada lote (no cruzan lotes).
+        
+        Args:
+            output_dir: Directorio de salida (por defecto: data/processed/clima_<ts>/)
+            batch_rows: Filas aproximadas por lote
+            (resto igual que execute)
+        
+        Returns:
+            Directorio con los archivos part-XXXXX.parquet
+        """
+        if not PARQUET_AVAILABLE:
+            raise ImportError("execute_streaming requiere pyarrow (pip install pyarrow)")
+        
+        if output_dir is None:
+            output_dir = self.data_dir / "processed" / f"clima_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        output_dir = Path(output_dir)
+        output_dir.mkdir(parents=True, exist_ok=True)
+        
+        logger.info("="*60)
+        logger.info(f"INICIANDO PIPELINE POR LOTES ({batch_rows} filas)")
+        logger.info("="*60)
+        
+        self.metrics.reset()
+        vistos = set()
+        sumas, conteos = None, None
+        leidos = escritos = duplicados = partes = 0
+        
+        lotes = self.loader.iter_batches(batch_rows=batch_rows)
+        while True:
+            with self.metrics.stage('load') as etapa:
+                batch = next(lotes, None)
+                etapa['rows_out'] = len(batch) if batch is not None else 0
+            if batch is None:
+                break
+            leidos += len(batch)
+            
+            if validate:
+                with self.metrics.stage('validate', rows_in=len(batch)) as etapa:
+                    batch, _ = DataValidator.validate_all(batch, remove_outliers=remove_outliers)
+                    etapa['rows_out'] = len(batch)
+            
+            if fill_nulls:
+                with self.metrics.stage('fill', rows_in=len(batch)) as etapa:
+                    batch = DataValidator.fill_missing(batch, method='linear')
+                    etapa['rows_out'] = len(batch)
+            
+            dup_subset = [col for col in ['timestamp', 'location'] if col in batch.columns]
+            if dup_subset and not batch.empty:
+                with self.metrics.stage('dedup', rows_in=len(batch)) as etapa:
+                    batch, n_dup = self._deduplicate_batch(batch, dup_subset, vistos)
+                    etapa['rows_out'] = len(batch)
+                duplicados += n_dup
+            
+            if batch.empty:
+                continue
+            
+            if resample_freq and 'timestamp' in batch.columns:
+                with self.metrics.stage('resample', rows_in=len(batch)):
+                    # Solo se acumulan suma y conteo por intervalo
+                    con_tiempo = batch[batch['timestamp'].notna()]
+                    numeric = con_tiempo.select_dtypes(include=['number']).set_index(con_tiempo['timestamp'])
+                    buckets = numeric.resample(resample_freq)
+                    suma, conteo = buckets.sum(), buckets.count()
+                    sumas = suma if sumas is None else sumas.add(suma, fill_value=0)
+                    conteos = conteo if conteos is None else conteos.add(conteo, fill_value=0)
+            else:
+                with self.metrics.stage('write', rows_in=len(batch)) as etapa:
+                    batch.to_parquet(output_dir / f"part-{partes:05d}.parquet", index=False)
+                    etapa['rows_out'] = len(batch)
+                partes += 1
+                escritos += len(batch)
+        
+        if sumas is not None:
+            df_resampled = (sumas / conteos.where(conteos > 0)).rename_axis('timestamp').reset_index()
+            df_resampled.to_parquet(output_dir / f"part-{partes:05d}.parquet", index=False)
+            escritos = len(df_resampled)
+            self._log_step(f"Resampleado a {resample_freq}: {escritos} registros")
+        
+        self._log_step(f"Lotes: {leidos} registros leídos, {duplicados} duplicados, {escritos} escritos")
+        logger.info(f"✓ Guardado: {output_dir}")
+        return output_dir
+    
+    @staticmethod
+    def _deduplicate_batch(batch: pd.DataFrame, subset: list, vistos: set):
+        """
+        Elimina filas cuya clave ya apareció en este lote o en lotes anteriores
+        
+        `vistos` (hashes de las claves ya escritas) se actualiza en el lugar;
+        cada lote cuesta O(filas del lote), sin importar cuántas se hayan visto.
+        
+        Returns:
+            (lote sin duplicados, duplicados eliminados)
+        """
+        claves = batch[subset].copy()
+        if 'location' in claves.columns:
+            claves['location'] = claves['location'].astype(str)
+        hashes = pd.util.hash_pandas_object(claves, index=False).tolist()
+        
+        # Primera aparición de cada clave, dentro del lote y entre lotes
+        conservar = np.zeros(len(batch), dtype=bool)
+        for i, clave in enumerate(hashes):
+            if clave not in vistos:
+                vistos.add(clave)
+                conservar[i] = True
+        
+        return batch[conservar], int((~conservar).sum())
+    
+    def execute_incremental(self,
+                            processed_dir: Union[str, Path] = None,
+                            lookback: str = '6h',
+                            validate: bool = True,
+                            fill_nulls: bool = True,
+                            remove_outliers: bool = True) -> pd.DataFrame:
+        """
+        Procesa solo lo nuevo desde la última ejecución
+        
+        Guarda una marca de agua (último timestamp procesado) por
+        (source, location) y solo lee los archivos que el manifiesto no
+        registra como procesados para processed_dir (nuevos, o con mtime o
+        tamaño distinto al de la ejecución anterior). Para que la interpolación sea continua, los
+        huecos se rellenan junto con los últimos `lookback` de datos ya
+        procesados. Las filas nuevas se agregan al dataset Parquet
+        processed_dir/dataset (provider=/location=/date=).
+        
+        Los registros con timestamp anterior o igual a la marca de agua de
+        su grupo se ignoran, aunque lleguen en archivos nuevos.
+        
+        Args:
+            processed_dir: Directorio del estado y el dataset (por defecto: data/processed/incremental)
+            lookback: Ventana de datos procesados usada como contexto al rellenar
+            (resto igual que execute)
+        
+        Returns:
+            DataFrame con las filas procesadas en esta ejecución
+        """
+        if not PARQUET_AVAILABLE:
+            raise ImportError("execute_incremental requiere pyarrow (pip install pyarrow)")
+        
+        processed_dir = Path(processed_dir) if processed_dir else self.data_dir / "processed" / "incremental"
+        processed_dir.mkdir(parents=True, exist_ok=True)
+        store = ParquetStore(processed_dir / "dataset")
+        state = self._load_state(processed_dir)
+        watermarks = state['watermarks']
+        
+        logger.info("="*60)
+        logger.info("INICIANDO PIPELINE INCREMENTAL")
+        logger.info("="*60)
+        
+        self.metrics.reset()
+        
+        # 1. Solo archivos nuevos o modificados desde la última ejecución
+        with self.metrics.stage('load') as etapa:
+            df, entries = self._load_changed(str(processed_dir.resolve()))
+            etapa['rows_out'] = len(df)
+        if df.empty or 'timestamp' not in df.columns:
+            self._mark_processed(processed_dir, entries)
+            self._log_step("Incremental: sin archivos nuevos")
+            return pd.DataFrame()
+        
+        for col, default in (('source', 'desconocida'), ('location', 'desconocida')):
+            df[col] = df[col].fillna(default).astype(str) if col in df.columns else default
+        df['timestamp'] = pd.to_datetime(df['timestamp'], errors='coerce')
+        df = df.dropna(subset=['timestamp'])
+        
+        # 2. Descartar lo que ya está bajo la marca de agua de su grupo
+        grupo = df['source'] + '|' + df['location']
+        marca = pd.to_datetime(grupo.map(watermarks))
+        df = df[marca.isna() | (df['timestamp'] > marca)]
+        
+        if df.empty:
+            self._mark_processed(processed_dir, entries)
+            self._log_step("Incremental: sin registros nuevos")
+            return pd.DataFrame()
+        
+        if validate:
+            with self.metrics.stage('validate', rows_in=len(df)) as etapa:
+                df, _ = DataValidator.validate_all(df, remove_outliers=remove_outliers)
+                etapa['rows_out'] = len(df)
+        
+        with self.metrics.stage('dedup', rows_in=len(df)) as etapa:
+            df = df.drop_duplicates(subset=['timestamp', 'location', 'source'], keep='first')
+            etapa['rows_out'] = len(df)
+        
+        # 3. Rellenar huecos con contexto de lo ya procesado
+        if fill_nulls and not df.empty:
+            with self.metrics.stage('fill', rows_in=len(df)) as etapa:
+                df = self._fill_with_context(store, df, watermarks, pd.Timedelta(lookback))
+                etapa['rows_out'] = len(df)
+        
+        # 4. Persistir filas nuevas y avanzar marcas de agua. Si una ejecución
+        # anterior escribió estas filas pero no alcanzó a guardar el estado, los
+        # mismos archivos vuelven a llegar: las filas ya guardadas se descartan
+        ultimos = df.groupby(df['source'] + '|' + df['location'])['timestamp'].max()
+        with self.metrics.stage('write', rows_in=len(df)) as etapa:
+            df = self._drop_stored(store, df)
+            store.append(df)
+            etapa['rows_out'] = len(df)
+        for clave, ultimo in ultimos.items():
+            watermarks[clave] = ultimo.isoformat()
+        self._save_state(processed_dir, state)
+        self._mark_processed(processed_dir, entries)
+        
+        self._log_step(f"Incremental: {len(df)} registros nuevos en {processed_dir / 'dataset'}")
+        return df.reset_index(drop=True)
+    
+    @staticmethod
+    def _drop_stored(store: ParquetStore, df: pd.DataFrame) -> pd.DataFrame:
+        """Quita de df las filas cuya clave (source, location, timestamp) ya está en el store"""
+        if df.empty:
+            return df
+        
+        guardado = store.read(
+            columns=['timestamp', 'provider', 'location'],
+            providers=sorted(df['source'].unique()),
+            locations=sorted(df['location'].unique()),
+            start=df['timestamp'].min(),
+        )
+        if guardado.empty:
+            return df
+        
+        claves = pd.MultiIndex.from_arrays([guardado['provider'].astype(str),
+                                            guardado['location'].astype(str),
+                                            pd.to_datetime(guardado['timestamp'])])
+        nuevas = ~pd.MultiIndex.from_arrays([df['source'], df['location'], df['timestamp']]).isin(claves)
+        return df[nuevas]
+    
+    def _fill_with_context(self, store: ParquetStore, df: pd.DataFrame, watermarks: dict,
+                           lookback: pd.Timedelta) -> pd.DataFrame:
+        """Rellena huecos de df usando como contexto lo ya procesado de cada grupo"""
+        context = self._load_context(store, df, watermarks, lookback)
+        if context.empty:
+            return DataValidator.fill_missing(df, method='linear')
+        
+        combined = pd.concat([context.assign(_contexto=True), df.assign(_contexto=False)],
+                             ignore_index=True, sort=False)
+        combined = DataValidator.fill_missing(combined, method='linear')
+        return combined[~combined['_contexto']].drop(columns='_contexto')
+    
+    def _load_changed(self, consumer: str):
+        """
+        Carga los archivos que `consumer` aún no ha procesado
+        
+        Returns:
+            (DataFrame estandarizado, entradas del manifiesto leídas)
+        """
+        manifest = self.loader.manifest
+        if manifest is None:
+            # Sin manifiesto no se sabe qué cambió: se carga todo y filtran las marcas de agua
+            return self.loader.load_all(standardize=True, remove_nulls=True), []
+        
+        self.loader._sync_manifest()
+        entries = manifest.unprocessed(consumer)
+        if not entries:
+            return pd.DataFrame(), entries
+        
+        unmapped = set()
+        frames = [self.loader._standardize_frame(frame, unmapped)
+                  for frame in self.loader._read_entries(entries)]
+        frames = [frame for frame in frames if 'timestamp' in frame.columns]
+        
+        if not frames:
+            return pd.DataFrame(), entries
+        
+        logger.info(f"Incremental: {len(entries)} archivos nuevos o modificados")
+        return pd.concat(frames, ignore_index=True, sort=False), entries
+    
+    def _mark_processed(self, processed_dir: Path, entries: list):
+        """Registra en el manifiesto los archivos ya incorporados a processed_dir"""
+        if self.loader.manifest is not None and entries:
+            self.loader.manifest.mark_processed(str(processed_dir.resolve()), entries)
+    
+    @staticmethod
+    def _load_context(store: ParquetStore, df: pd.DataFrame, watermarks: dict,
+                      lookback: pd.Timedelta) -> pd.DataFrame:
+        """Últimos `lookback` de datos procesados de los grupos presentes en df"""
+        marcas = {clave: pd.Timestamp(watermarks[clave])
+                  for clave in (df['source'] + '|' + df['location']).unique() if clave in watermarks}
+        if not marcas:
+            return pd.DataFrame()
+        
+        context = store.read(
+            providers=sorted({clave.split('|', 1)[0] for clave in marcas}),
+            locations=sorted({clave.split('|', 1)[1] for clave in marcas}),
+            start=min(marcas.values()) - lookback,
+        )
+        if context.empty:
+            return context
+        
+        context = context.rename(columns={'provider': 'source'}).drop(columns=['date'], errors='ignore')
+        context['source'] = context['source'].astype(str)
+        context['location'] = context['location'].astype(str)
+        
+        marca = (context['source'] + '|' + context['location']).map(marcas)
+        return context[marca.notna() & (context['timestamp'] > marca - lookback)]
+    
+    @staticmethod
+    def _load_state(processed_dir: Path) -> dict:
+        ruta = processed_dir / "watermarks.json"
+        if ruta.exists():
+            with open(ruta, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        return {'watermarks': {}}
+    
+    @staticmethod
+    def _save_state(processed_dir: Path, state: dict):
+        # Escritura atómica: una ejecución interrumpida no deja el estado a medias
+        ruta = processed_dir / "watermarks.json"
+        temporal = ruta.with_suffix('.json.part')
+        with open(temporal, 'w', encoding='utf-8') as f:
+            json.dump(state, f, indent=2, ensure_ascii=False)
+        os.replace(temporal, ruta)
+    
     def execute_by_location(self, location: str, **kwargs) -> pd.DataFrame:
         """Ejecuta pipeline para ubicación específica"""
         logger.info(f"\nProcesando {location}...")
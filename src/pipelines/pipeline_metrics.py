@@ -0,0 +1,196 @@
+"""
+Métricas por etapa de los pipelines
+Tiempo de pared, tiempo de CPU, pico de memoria residente (RSS) y
+filas de entrada/salida, con exportación a JSON lines o texto Prometheus
+"""
+
+import cProfile
+import io
+import json
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+import pandas as pd
+
+try:
+    import resource
+    RESOURCE_AVAILABLE = True
+except ImportError:  # Windows
+    RESOURCE_AVAILABLE = False
+
+try:
+    import pyinstrument
+    PYINSTRUMENT_AVAILABLE = True
+except ImportError:
+    PYINSTRUMENT_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+
+def _pico_rss_mb() -> Optional[float]:
+    """Pico de memoria residente del proceso en MB (None si no se puede medir)"""
+    if not RESOURCE_AVAILABLE:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KB, macOS bytes
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+class PipelineMetrics:
+    """
+    Registro de métricas por etapa
+
+    Uso:
+        metrics = PipelineMetrics()
+        with metrics.stage('validate', rows_in=len(df)) as etapa:
+            df, _ = DataValidator.validate_all(df)
+            etapa['rows_out'] = len(df)
+        metrics.summary()
+
+    `peak_rss_mb` es el pico de RSS del proceso al terminar la etapa
+    (ru_maxrss): es acumulado desde el inicio del proceso y nunca baja, así
+    que la etapa donde sube es la que llevó la memoria a un nuevo máximo; no
+    mide lo que cada etapa usa por separado.
+
+    Con `profile_stage` la etapa de ese nombre se ejecuta bajo cProfile (o
+    pyinstrument si está instalado y se pide) y el reporte queda en
+    `profiles[nombre]`.
+    """
+
+    def __init__(self, profile_stage: Optional[str] = None, profiler: str = 'cprofile',
+                 profile_dir: Optional[Union[str, Path]] = None):
+        """
+        Args:
+            profile_stage: Nombre de la etapa a perfilar (None = ninguna)
+            profiler: 'cprofile' o 'pyinstrument'
+            profile_dir: Si se indica, guarda ahí el perfil (.prof o .html)
+        """
+        if profiler == 'pyinstrument' and not PYINSTRUMENT_AVAILABLE:
+            logger.warning("pyinstrument no está instalado, se usa cProfile")
+            profiler = 'cprofile'
+
+        self.profile_stage = profile_stage
+        self.profiler = profiler
+        self.profile_dir = Path(profile_dir) if profile_dir else None
+        self.records: List[Dict] = []
+        self.profiles: Dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str, rows_in: Optional[int] = None):
+        """
+        Mide una etapa; el bloque puede fijar `rows_out` (y otros campos) en el registro
+        """
+        registro = {'stage': name, 'rows_in': rows_in, 'rows_out': None,
+                    'started_at': datetime.now().isoformat(timespec='seconds')}
+
+        perfilador = self._iniciar_perfil(name)
+        inicio_pared = time.perf_counter()
+        inicio_cpu = time.process_time()
+        try:
+            yield registro
+        finally:
+            registro['wall_s'] = time.perf_counter() - inicio_pared
+            registro['cpu_s'] = time.process_time() - inicio_cpu
+            registro['peak_rss_mb'] = _pico_rss_mb()
+
+            filas = registro['rows_in'] if registro['rows_in'] is not None else registro['rows_out']
+            registro['rows_per_s'] = filas / registro['wall_s'] if filas and registro['wall_s'] > 0 else None
+
+            if perfilador is not None:
+                self._cerrar_perfil(name, perfilador)
+            self.records.append(registro)
+
+    def _iniciar_perfil(self, name: str):
+        if name != self.profile_stage:
+            return None
+        if self.profiler == 'pyinstrument':
+            perfilador = pyinstrument.Profiler()
+            perfilador.start()
+        else:
+            perfilador = cProfile.Profile()
+            perfilador.enable()
+        return perfilador
+
+    def _cerrar_perfil(self, name: str, perfilador):
+        if self.profiler == 'pyinstrument':
+            perfilador.stop()
+            self.profiles[name] = perfilador.output_text()
+            if self.profile_dir:
+                self.profile_dir.mkdir(parents=True, exist_ok=True)
+                (self.profile_dir / f"perfil_{name}.html").write_text(perfilador.output_html(), encoding='utf-8')
+            return
+
+        perfilador.disable()
+        texto = io.StringIO()
+        pstats.Stats(perfilador, stream=texto).sort_stats('cumulative').print_stats(25)
+        self.profiles[name] = texto.getvalue()
+        if self.profile_dir:
+            self.profile_dir.mkdir(parents=True, exist_ok=True)
+            perfilador.dump_stats(str(self.profile_dir / f"perfil_{name}.prof"))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        """Un registro por ejecución de etapa"""
+        return pd.DataFrame(self.records)
+
+    def summary(self) -> pd.DataFrame:
+        """Totales por etapa (útil en el modo por lotes, donde cada etapa se repite)"""
+        df = self.to_dataframe()
+        if df.empty:
+            return df
+
+        resumen = df.groupby('stage', sort=False).agg(
+            runs=('stage', 'size'),
+            wall_s=('wall_s', 'sum'),
+            cpu_s=('cpu_s', 'sum'),
+            peak_rss_mb=('peak_rss_mb', 'max'),
+            rows_in=('rows_in', 'sum'),
+            rows_out=('rows_out', 'sum'),
+        )
+        resumen['share'] = resumen['wall_s'] / resumen['wall_s'].sum()
+        return resumen.reset_index()
+
+    def write_jsonl(self, path: Union[str, Path], run_id: Optional[str] = None) -> Path:
+        """Agrega un registro JSON por etapa al archivo (una línea por registro)"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'a', encoding='utf-8') as f:
+            for registro in self.records:
+                f.write(json.dumps({'run_id': run_id, **registro}, ensure_ascii=False) + '\n')
+        return path
+
+    def to_prometheus(self, prefix: str = 'climate_pipeline') -> str:
+        """Totales por etapa en formato de texto de Prometheus"""
+        resumen = self.summary()
+        metricas = [
+            ('wall_seconds', 'wall_s', 'gauge', 'Tiempo de pared de la etapa'),
+            ('cpu_seconds', 'cpu_s', 'gauge', 'Tiempo de CPU de la etapa'),
+            ('peak_rss_megabytes', 'peak_rss_mb', 'gauge', 'Pico de RSS del proceso al terminar la etapa'),
+            ('rows_in', 'rows_in', 'gauge', 'Filas de entrada'),
+            ('rows_out', 'rows_out', 'gauge', 'Filas de salida'),
+        ]
+
+        lineas = []
+        for nombre, columna, tipo, ayuda in metricas:
+            lineas.append(f"# HELP {prefix}_{nombre} {ayuda}")
+            lineas.append(f"# TYPE {prefix}_{nombre} {tipo}")
+            for _, fila in resumen.iterrows():
+                if pd.notna(fila[columna]):
+                    lineas.append(f'{prefix}_{nombre}{{stage="{fila["stage"]}"}} {float(fila[columna]):g}')
+        return '\n'.join(lineas) + '\n'
+
+    def write_prometheus(self, path: Union[str, Path], prefix: str = 'climate_pipeline') -> Path:
+        """Escribe las métricas para el textfile collector de node_exporter"""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(self.to_prometheus(prefix), encoding='utf-8')
+        return path
+
+    def reset(self):
+        self.records = []
+        self.profiles = {}
@@ -0,0 +1,472 @@
+"""
+Decodificador nativo de archivos RAW IRIS/Sigmet (radares IDEAM)
+Lee el archivo con memoria mapeada (o lo descomprime una sola vez si es .gz),
+interpreta los encabezados de producto e ingesta y decodifica los rayos
+comprimidos (RLE de palabras de 16 bits) directamente en arreglos NumPy
+
+Referencia: IRIS Programmer's Manual (Vaisala), capítulos 4 (product_hdr),
+y 4.4 (ingest_header, raw_prod_bhdr, ingest_data_header)
+"""
+
+import gzip
+from pathlib import Path
+from typing import Dict, List, Optional, Union
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+TAMAÑO_REGISTRO = 6144          # Los archivos IRIS están divididos en registros de 6144 bytes
+PALABRAS_REGISTRO = TAMAÑO_REGISTRO // 2
+PALABRAS_BHDR = 6               # raw_prod_bhdr: 12 bytes al inicio de cada registro de datos
+PALABRAS_IDH = 38               # ingest_data_header: 76 bytes por tipo de dato en el primer registro del barrido
+PALABRAS_RAYO = 6               # Encabezado de rayo: az/el inicio, az/el fin, bins, tiempo
+
+ID_PRODUCT_HDR = 27
+ID_INGEST_DATA_HEADER = 24
+
+# Posiciones (bytes) dentro del archivo
+_PRODUCT_CONFIGURATION = 12
+_PRODUCT_END = 12 + 320
+_INGEST_HEADER = TAMAÑO_REGISTRO
+_INGEST_CONFIGURATION = _INGEST_HEADER + 12
+_TASK_CONFIGURATION = _INGEST_CONFIGURATION + 480
+_TASK_DSP_INFO = _TASK_CONFIGURATION + 12 + 120
+_TASK_RANGE_INFO = _TASK_CONFIGURATION + 12 + 120 + 320 + 320
+_TASK_SCAN_INFO = _TASK_RANGE_INFO + 160
+
+# antenna_scan_mode de task_scan_info
+MODOS_BARRIDO = {1: 'PPI', 2: 'RHI', 3: 'MANUAL', 4: 'PPI', 5: 'ARCHIVO'}
+
+
+def _nan_si(valores, *invalidos):
+    salida = valores.astype('float32')
+    for invalido in invalidos:
+        salida[valores == invalido] = np.nan
+    return salida
+
+
+def _kdp_8bits(x, longitud_onda_cm):
+    x = x.astype('float32')
+    salida = np.zeros_like(x)
+    pos, neg = x > 128, (x > 0) & (x < 128)
+    salida[pos] = 0.25 * np.power(600.0, (x[pos] - 129) / 126) / longitud_onda_cm
+    salida[neg] = -0.25 * np.power(600.0, (127 - x[neg]) / 126) / longitud_onda_cm
+    salida[x == 0] = np.nan
+    salida[x == 255] = np.nan
+    return salida
+
+
+# Tipos de dato IRIS: id -> (nombre ODIM, conversión de 8 bits o de 16 bits)
+# Las conversiones reciben (valores, contexto) y devuelven float32 con NaN donde no hay dato
+TIPOS_DATO = {
+    1: ('DBTH', lambda x, c: _nan_si((x.astype('float32') - 64) / 2, -32.0)),
+    2: ('DBZH', lambda x, c: _nan_si((x.astype('float32') - 64) / 2, -32.0)),
+    3: ('VRADH', lambda x, c: np.where(x == 0, np.nan, (x.astype('float32') - 128) / 127 * c['nyquist'])),
+    4: ('WRADH', lambda x, c: np.where(x == 0, np.nan, x.astype('float32') / 256 * c['nyquist'])),
+    5: ('ZDR', lambda x, c: np.where(x == 0, np.nan, (x.astype('float32') - 128) / 16)),
+    7: ('DBZHC', lambda x, c: _nan_si((x.astype('float32') - 64) / 2, -32.0)),
+    8: ('DBTH', None),
+    9: ('DBZH', None),
+    10: ('VRADH', None),
+    11: ('WRADH', lambda x, c: np.where((x == 0) | (x == 65535), np.nan, x.astype('float32') / 100)),
+    12: ('ZDR', None),
+    13: ('RATE', lambda x, c: np.where((x == 0) | (x == 65535), np.nan, x.astype('float32'))),
+    14: ('KDP', lambda x, c: _kdp_8bits(x, c['longitud_onda_cm'])),
+    15: ('KDP', None),
+    16: ('PHIDP', lambda x, c: np.where((x == 0) | (x == 255), np.nan, 180 * (x.astype('float32') - 1) / 254)),
+    17: ('VRADDH', lambda x, c: np.where(x == 0, np.nan, (x.astype('float32') - 128) * 75 / 127)),
+    18: ('SQIH', lambda x, c: np.where((x == 0) | (x == 255), np.nan, np.sqrt((x.astype('float32') - 1) / 253))),
+    19: ('RHOHV', lambda x, c: np.where((x == 0) | (x == 255), np.nan, np.sqrt((x.astype('float32') - 1) / 253))),
+    20: ('RHOHV', lambda x, c: np.where((x == 0) | (x == 65535), np.nan, (x.astype('float32') - 1) / 65533)),
+    21: ('DBZHC', None),
+    22: ('VRADDH', None),
+    23: ('SQIH', lambda x, c: np.where((x == 0) | (x == 65535), np.nan, (x.astype('float32') - 1) / 65533)),
+    24: ('PHIDP', lambda x, c: np.where((x == 0) | (x == 65535), np.nan, 360 * (x.astype('float32') - 1) / 65534)),
+}
+
+
+def _convertir_16bits(x, contexto):
+    """Conversión común de los tipos de 16 bits: (N - 32768) / 100"""
+    return np.where((x == 0) | (x == 65535), np.nan, (x.astype('float32') - 32768) / 100)
+
+
+def _angulo(bin2):
+    """Ángulo BIN2 (0-65535 = 0-360°)"""
+    return bin2.astype('float64') * (360.0 / 65536)
+
+
+def _con_signo(angulo):
+    """Lleva ángulos de 0-360° a -180-180° (elevaciones negativas, longitudes oeste)"""
+    return np.where(angulo > 180, angulo - 360, angulo)
+
+
+def _bin4(valor: int) -> float:
+    """Ángulo BIN4 (0-2^32 = 0-360°) con signo"""
+    return float(_con_signo(valor * 360.0 / 2 ** 32))
+
+
+def _texto(crudo: bytes) -> str:
+    return crudo.split(b'\x00', 1)[0].decode('ascii', errors='replace').strip()
+
+
+class IrisRawFile:
+    """
+    Volumen de un archivo RAW IRIS/Sigmet decodificado en arreglos NumPy
+
+    Uso:
+        volumen = IrisRawFile("BAR241211010000.RAW")
+        volumen.tipos_datos              # ['DBZH', 'VRADH', 'ZDR', 'RHOHV', ...]
+        dbz = volumen.momento('DBZH')    # (rayos, bins) float32 con NaN sin dato
+        volumen.estadisticas('DBZH')
+
+    Atributos:
+        encabezado_producto: Sitio, coordenadas, longitud de onda, PRF, bins
+        encabezado_ingesta: Inicio del volumen, barridos, rango de bins
+        barridos: Una entrada por barrido con ángulo fijo, azimut, elevación,
+                  tiempo y un arreglo (rayos, bins) por momento
+    """
+
+    def __init__(self, ruta: Union[str, Path], momentos: Optional[List[str]] = None,
+                 solo_encabezados: bool = False):
+        """
+        Args:
+            ruta: Archivo .RAW (o .RAW.gz)
+            momentos: Momentos a convertir (None = todos); los demás se omiten
+            solo_encabezados: Lee solo los dos primeros registros (product_hdr e
+                              ingest_header) sin decodificar rayos; `barridos` queda vacío
+        """
+        self.ruta = Path(ruta)
+        self._datos = self._abrir(self.ruta, 2 * TAMAÑO_REGISTRO if solo_encabezados else None)
+
+        if len(self._datos) < 2 * TAMAÑO_REGISTRO or self._int16(0) != ID_PRODUCT_HDR:
+            raise ValueError(f"{self.ruta.name} no es un archivo RAW IRIS/Sigmet")
+
+        self.encabezado_producto = self._leer_product_hdr()
+        self.encabezado_ingesta = self._leer_ingest_header()
+        self._ids_tipos = self._tipos_en_mascara()
+        nombres = [TIPOS_DATO.get(t, (f'TIPO_{t}', None))[0] for t in self._ids_tipos if t != 0]
+        self.tipos_datos = list(dict.fromkeys(nombres))
+        self.barridos = [] if solo_encabezados else self._decodificar_barridos(momentos)
+
+    @property
+    def datos(self) -> np.ndarray:
+        """Contenido del archivo (ya descomprimido) como uint8, sin copiar"""
+        return self._datos
+
+    @staticmethod
+    def leer_bytes(ruta: Union[str, Path]) -> np.ndarray:
+        """Contenido de cualquier archivo (descomprimido si es .gz), sin validar el formato"""
+        return IrisRawFile._abrir(Path(ruta))
+
+    @staticmethod
+    def _abrir(ruta: Path, limite: Optional[int] = None) -> np.ndarray:
+        """
+        Memoria mapeada; los .gz se descomprimen una sola vez a memoria.
+        Con `limite` solo se leen (o descomprimen) esos primeros bytes.
+        """
+        with open(ruta, 'rb') as f:
+            comprimido = f.read(2) == b'\x1f\x8b'
+            if limite is not None and not comprimido:
+                f.seek(0)
+                return np.frombuffer(f.read(limite), dtype=np.uint8)
+
+        if comprimido:
+            with gzip.open(ruta, 'rb') as f:
+                return np.frombuffer(f.read(-1 if limite is None else limite), dtype=np.uint8)
+        return np.memmap(ruta, dtype=np.uint8, mode='r')
+
+    # Lectura de campos little-endian en posiciones absolutas
+    def _valor(self, posicion: int, tipo: str):
+        return self._datos[posicion:posicion + np.dtype(tipo).itemsize].view(tipo)[0].item()
+
+    def _int16(self, posicion):
+        return self._valor(posicion, '<i2')
+
+    def _uint16(self, posicion):
+        return self._valor(posicion, '<u2')
+
+    def _int32(self, posicion):
+        return self._valor(posicion, '<i4')
+
+    def _uint32(self, posicion):
+        return self._valor(posicion, '<u4')
+
+    def _cadena(self, posicion, longitud):
+        return _texto(bytes(self._datos[posicion:posicion + longitud]))
+
+    def _ymds(self, posicion) -> Optional[np.datetime64]:
+        """ymds_time: segundos del día, milisegundos, año, mes, día"""
+        segundos = self._int32(posicion)
+        milis = self._uint16(posicion + 4) & 0x03FF
+        año, mes, dia = self._int16(posicion + 6), self._int16(posicion + 8), self._int16(posicion + 10)
+        if not (1 <= mes <= 12 and 1 <= dia <= 31 and año > 1900):
+            return None
+        fecha = np.datetime64(f"{año:04d}-{mes:02d}-{dia:02d}", 'ms')
+        return fecha + np.timedelta64(segundos * 1000 + milis, 'ms')
+
+    def _leer_product_hdr(self) -> Dict:
+        fin = _PRODUCT_END
+        longitud_onda_cm = self._int32(fin + 148) / 100
+        prf = self._int32(fin + 120)
+        return {
+            'tipo_producto': self._uint16(_PRODUCT_CONFIGURATION + 12),
+            'nombre_tarea': self._cadena(_PRODUCT_CONFIGURATION + 74, 12),
+            'sitio': self._cadena(fin, 16),
+            'version_iris': self._cadena(fin + 16, 8),
+            'hora_ingesta': self._ymds(fin + 32),
+            'latitud': _bin4(self._uint32(fin + 108)),
+            'longitud': _bin4(self._uint32(fin + 112)),
+            'altura_terreno_m': self._int16(fin + 116),
+            'altura_radar_m': self._int16(fin + 118),
+            'prf_hz': prf,
+            'longitud_onda_cm': longitud_onda_cm,
+            'rango_primer_bin_m': self._int32(fin + 156) / 100,
+            'rango_ultimo_bin_m': self._int32(fin + 160) / 100,
+            'numero_bins': self._int32(fin + 164),
+        }
+
+    def _leer_ingest_header(self) -> Dict:
+        conf = _INGEST_CONFIGURATION
+        multi_prf = self._uint16(_TASK_DSP_INFO + 144)
+        prf = self.encabezado_producto['prf_hz']
+        # Velocidad de Nyquist (m/s) = λ·PRF/4, multiplicada por el factor de PRF múltiple
+        nyquist = self.encabezado_producto['longitud_onda_cm'] / 100 * prf / 4 * (1 + min(multi_prf, 3))
+        return {
+            'inicio_volumen': self._ymds(conf + 88),
+            'barridos_completos': self._int16(conf + 82),
+            'bytes_encabezado_rayo': self._int16(conf + 112),
+            'rayos_por_barrido': self._uint16(conf + 184),
+            'zona_horaria': self._cadena(conf + 224, 8),
+            'rango_primer_bin_m': self._int32(_TASK_RANGE_INFO) / 100,
+            'rango_ultimo_bin_m': self._int32(_TASK_RANGE_INFO + 4) / 100,
+            'bins_salida': self._int16(_TASK_RANGE_INFO + 10),
+            'paso_bins_m': self._int32(_TASK_RANGE_INFO + 16) / 100,
+            'nyquist_ms': nyquist,
+            **self._leer_scan_info(),
+        }
+
+    def _leer_scan_info(self) -> Dict:
+        """
+        Modo de antena y ángulos programados de task_scan_info: elevaciones
+        de cada barrido en PPI, azimuts en RHI
+        """
+        modo = self._uint16(_TASK_SCAN_INFO)
+        n_barridos = self._int16(_TASK_SCAN_INFO + 6)
+        angulos = []
+        if MODOS_BARRIDO.get(modo) in ('PPI', 'RHI') and 0 < n_barridos <= 40:
+            # Tras el inicio y fin del sector (2 BIN2) van hasta 40 ángulos BIN2
+            inicio = _TASK_SCAN_INFO + 8 + 4
+            crudo = self._datos[inicio:inicio + 2 * n_barridos].view('<u2')
+            angulos = [round(float(a), 2) for a in _con_signo(_angulo(crudo))]
+        return {
+            'modo_barrido': MODOS_BARRIDO.get(modo, f'MODO_{modo}'),
+            'barridos_tarea': n_barridos,
+            'angulos_barrido': angulos,
+        }
+
+    def _tipos_en_mascara(self) -> List[int]:
+        """Tipos de dato activos según current_data_type_mask (palabras 0 y 1-4)"""
+        mascara = _TASK_DSP_INFO + 4
+        palabras = [self._uint32(mascara)] + [self._uint32(mascara + 8 + 4 * i) for i in range(4)]
+        return [32 * i + bit for i, palabra in enumerate(palabras) for bit in range(32) if palabra >> bit & 1]
+
+    def _registros_datos(self) -> np.ndarray:
+        """Registros desde el tercero como matriz (registros, palabras int16), sin copiar"""
+        n_registros = len(self._datos) // TAMAÑO_REGISTRO
+        palabras = self._datos[2 * TAMAÑO_REGISTRO:n_registros * TAMAÑO_REGISTRO].view('<i2')
+        return palabras.reshape(-1, PALABRAS_REGISTRO)
+
+    @staticmethod
+    def _descomprimir(flujo: np.ndarray, salida: np.ndarray, n_rayos: int) -> int:
+        """
+        Descomprime rayos consecutivos del flujo RLE de un barrido
+
+        Palabra de control: bit alto encendido -> siguen (c & 0x7FFF) palabras
+        de datos; 1 -> fin de rayo; otro valor -> esa cantidad de ceros. El
+        bucle es por tramo (no por byte) y los datos se copian por rebanadas
+        a `salida` (rayos, palabras), que ya viene en ceros.
+
+        Returns:
+            Rayos decodificados
+        """
+        pos, total = 0, len(flujo)
+        ancho = salida.shape[1]
+        for rayo in range(n_rayos):
+            fila = salida[rayo]
+            columna = 0
+            while pos < total:
+                control = int(flujo[pos]) & 0xFFFF
+                pos += 1
+                if control == 1:
+                    break
+                if control & 0x8000:
+                    n = control & 0x7FFF
+                    util = max(0, min(n, ancho - columna))
+                    fila[columna:columna + util] = flujo[pos:pos + util]
+                    pos += n
+                    columna += n
+                else:
+                    columna += control
+            else:
+                return rayo
+        return n_rayos
+
+    def _decodificar_barridos(self, momentos: Optional[List[str]]) -> List[Dict]:
+        registros = self._registros_datos()
+        if len(registros) == 0:
+            return []
+
+        n_tipos = len(self._ids_tipos)
+        numeros_barrido = registros[:, 1]
+        # Los registros de un barrido son consecutivos; el primero trae los ingest_data_header
+        inicios = np.flatnonzero(np.r_[True, numeros_barrido[1:] != numeros_barrido[:-1]])
+        fines = np.r_[inicios[1:], len(registros)]
+
+        contexto = {'nyquist': self.encabezado_ingesta['nyquist_ms'],
+                    'longitud_onda_cm': self.encabezado_producto['longitud_onda_cm']}
+        max_bins = max(self.encabezado_ingesta['bins_salida'], self.encabezado_producto['numero_bins'], 1)
+
+        barridos = []
+        for inicio, fin in zip(inicios, fines):
+            if numeros_barrido[inicio] <= 0:
+                continue
+
+            primero = registros[inicio]
+            encabezados = primero[PALABRAS_BHDR:PALABRAS_BHDR + PALABRAS_IDH * n_tipos].reshape(n_tipos, PALABRAS_IDH)
+            if encabezados[0, 0] != ID_INGEST_DATA_HEADER:
+                logger.warning(f"{self.ruta.name}: barrido {numeros_barrido[inicio]} sin ingest_data_header")
+                continue
+
+            idh_pos = (inicio + 2) * TAMAÑO_REGISTRO + PALABRAS_BHDR * 2
+            n_rayos = int(max(encabezados[0, 15], encabezados[0, 16]))
+            bits = encabezados[:, 18].astype(int)
+            tipos = encabezados[:, 19].view(np.uint16).astype(int)
+
+            # Flujo continuo del barrido sin los encabezados de registro
+            flujo = np.concatenate([primero[PALABRAS_BHDR + PALABRAS_IDH * n_tipos:],
+                                    registros[inicio + 1:fin, PALABRAS_BHDR:].ravel()])
+
+            # Los rayos de todos los tipos van intercalados: rayo0-tipo0, rayo0-tipo1, ...
+            ancho = PALABRAS_RAYO + max_bins
+            crudo = np.zeros((n_rayos * n_tipos, ancho), dtype='<i2')
+            decodificados = self._descomprimir(flujo, crudo, n_rayos * n_tipos) // n_tipos
+            crudo = crudo[:decodificados * n_tipos].reshape(decodificados, n_tipos, ancho)
+
+            barrido = self._armar_barrido(crudo, tipos, bits, contexto, momentos, max_bins)
+            barrido.update({
+                'numero': int(numeros_barrido[inicio]),
+                'inicio': self._ymds(idh_pos + 12),
+                'angulo_fijo': float(_con_signo(_angulo(encabezados[0, 17:18].view(np.uint16)))[0]),
+                'rayos': decodificados,
+            })
+            barridos.append(barrido)
+
+        return barridos
+
+    def _armar_barrido(self, crudo, tipos, bits, contexto, momentos, max_bins) -> Dict:
+        """Geometría de los rayos y momentos convertidos a unidades físicas"""
+        # La geometría se toma del primer tipo que no sea encabezado extendido
+        geo = crudo[:, next((i for i, t in enumerate(tipos) if t != 0), 0), :PALABRAS_RAYO].view(np.uint16)
+        az_ini, el_ini, az_fin, el_fin = (_angulo(geo[:, i]) for i in range(4))
+
+        # Promedio del inicio y el fin del rayo; el azimut puede cruzar 0°
+        azimut = (az_ini + ((az_fin - az_ini) % 360) / 2) % 360
+        elev = (_con_signo(el_ini) + _con_signo(el_fin)) / 2
+
+        salida = {
+            'azimut': azimut.astype('float32'),
+            'elevacion': elev.astype('float32'),
+            'tiempo_s': geo[:, 5].astype('int32'),
+            'bins': geo[:, 4].astype('int32'),
+            'momentos': {},
+        }
+
+        for i, (tipo, bits_bin) in enumerate(zip(tipos, bits)):
+            if tipo == 0:
+                continue
+            nombre, conversion = TIPOS_DATO.get(tipo, (f'TIPO_{tipo}', None))
+            if momentos is not None and nombre not in momentos:
+                continue
+            if bits_bin == 8 and nombre in salida['momentos']:
+                # Si el volumen trae la versión de 8 y de 16 bits se conserva la de 16
+                continue
+
+            datos = crudo[:, i, PALABRAS_RAYO:]
+            if bits_bin == 8:
+                valores = datos.view(np.uint8)[:, :max_bins]
+            else:
+                valores = datos.view(np.uint16)[:, :max_bins]
+                conversion = conversion or _convertir_16bits
+
+            if conversion is None:
+                valores = valores.astype('float32')
+            else:
+                valores = np.asarray(conversion(valores, contexto), dtype='float32')
+
+            # Bins más allá de los realmente escritos en cada rayo no tienen dato
+            valores[np.arange(valores.shape[1]) >= salida['bins'][:, None]] = np.nan
+            salida['momentos'][nombre] = valores
+
+        return salida
+
+    def momento(self, nombre: str) -> np.ndarray:
+        """Todos los rayos del volumen para un momento, (rayos, bins) float32"""
+        arreglos = [b['momentos'][nombre] for b in self.barridos if nombre in b['momentos']]
+        if not arreglos:
+            raise KeyError(f"Momento {nombre} no disponible (hay: {self.tipos_datos})")
+        return np.concatenate(arreglos, axis=0)
+
+    def rangos_m(self) -> np.ndarray:
+        """Distancia al centro de cada bin en metros"""
+        paso = self.encabezado_ingesta['paso_bins_m']
+        bins = self.momento(self.tipos_datos[0]).shape[1] if self.barridos else 0
+        return self.encabezado_ingesta['rango_primer_bin_m'] + paso * np.arange(bins)
+
+    def estadisticas(self, nombre: str = 'DBZH') -> Dict[str, float]:
+        """Estadísticas del volumen completo para un momento (ignora bins sin dato)"""
+        datos = self.momento(nombre)
+        validos = datos[np.isfinite(datos)]
+        if validos.size == 0:
+            return {'max': np.nan, 'media': np.nan, 'std': np.nan, 'cobertura_pct': 0.0}
+        return {
+            'max': float(validos.max()),
+            'media': float(validos.mean()),
+            'std': float(validos.std()),
+            'cobertura_pct': 100 * validos.size / datos.size,
+        }
+
+
+def leer_metadatos(ruta: Union[str, Path]) -> Dict:
+    """
+    Metadatos de un volumen leyendo solo los encabezados (sin decodificar rayos)
+
+    Lee los dos primeros registros del archivo (12 KB; en los .gz solo se
+    descomprime ese tramo), así que sirve para listados e inventarios de
+    miles de volúmenes.
+
+    Returns:
+        Dict con sitio, inicio del volumen, número de barridos, momentos
+        presentes, ángulos de los barridos y ubicación del radar
+
+    Raises:
+        ValueError: Si el archivo no es RAW IRIS/Sigmet
+    """
+    volumen = IrisRawFile(ruta, solo_encabezados=True)
+    producto, ingesta = volumen.encabezado_producto, volumen.encabezado_ingesta
+    return {
+        'sitio': producto['sitio'],
+        'inicio_volumen': ingesta['inicio_volumen'],
+        'num_barridos': ingesta['barridos_tarea'] or ingesta['barridos_completos'],
+        'barridos_completos': ingesta['barridos_completos'],
+        'modo_barrido': ingesta['modo_barrido'],
+        'angulos_barrido': ingesta['angulos_barrido'],
+        'momentos': volumen.tipos_datos,
+        'latitud': producto['latitud'],
+        'longitud': producto['longitud'],
+        'altura_radar_m': producto['altura_radar_m'],
+        'longitud_onda_cm': producto['longitud_onda_cm'],
+        'rango_max_km': ingesta['rango_ultimo_bin_m'] / 1000,
+    }
@@ -0,0 +1,248 @@
+"""
+Motor vectorizado de tasa de precipitación a partir de momentos de radar
+Relaciones Z-R, R(KDP) y R(Z, ZDR) configurables por radar, calculadas en
+float32 sobre buffers reutilizables; los dBZ cuantizados (códigos IRIS de 8 o
+16 bits) se convierten con tablas precalculadas
+
+Las relaciones potenciales se reescriben como una sola exponencial:
+    Z = a·R^b  ->  R = a^(-1/b) · exp(dBZ · ln(10) / (10·b))
+así cada bin cuesta una multiplicación y un exp en lugar de dos potencias.
+
+Referencias:
+- Marshall & Palmer (1948); Rosenfeld et al. (1993), relación tropical
+- Bringi & Chandrasekar (2001), Polarimetric Doppler Weather Radar, cap. 8
+"""
+
+import math
+from typing import Dict, Optional
+import logging
+
+import numpy as np
+
+from src.processors.iris_raw import TIPOS_DATO, _convertir_16bits
+
+logger = logging.getLogger(__name__)
+
+
+# tipo 'z':     Z = a·R^b                  (Z lineal en mm^6/m^3)
+# tipo 'kdp':   R = a·KDP^b                (KDP en °/km; KDP <= 0 -> 0)
+# tipo 'z_zdr': R = c·Z^a·Zdr^b            (Z y Zdr lineales)
+RELACIONES = {
+    'marshall_palmer': {'tipo': 'z', 'a': 200.0, 'b': 1.6,
+                        'descripcion': 'Marshall-Palmer, lluvia estratiforme'},
+    'wsr88d_convectiva': {'tipo': 'z', 'a': 300.0, 'b': 1.4,
+                          'descripcion': 'WSR-88D por defecto, convección'},
+    'rosenfeld_tropical': {'tipo': 'z', 'a': 250.0, 'b': 1.2,
+                           'descripcion': 'Rosenfeld, lluvia tropical'},
+    'kdp_bringi': {'tipo': 'kdp', 'a': 40.5, 'b': 0.85,
+                   'descripcion': 'Bringi & Chandrasekar, R(KDP)'},
+    'z_zdr_bringi': {'tipo': 'z_zdr', 'c': 0.0067, 'a': 0.927, 'b': -3.43,
+                     'descripcion': 'Bringi & Chandrasekar, R(Z, ZDR)'},
+}
+
+# Nombres con que llegan los campos desde PyART, IrisRawFile u ODIM
+CAMPOS = {
+    'dbz': ['DBZH', 'reflectivity', 'DBZ', 'REF', 'DBZHC', 'corrected_reflectivity'],
+    'kdp': ['KDP', 'specific_differential_phase'],
+    'zdr': ['ZDR', 'differential_reflectivity'],
+}
+
+_LN10_10 = math.log(10) / 10
+
+
+class RainRateEngine:
+    """
+    Conversión de volúmenes completos a tasa de lluvia (mm/h) en float32
+
+    Uso:
+        motor = RainRateEngine(relaciones_por_radar={'Carimagua': 'rosenfeld_tropical'})
+        lluvia = motor.calcular(radar_pyart, radar='Carimagua')
+        lluvia = motor.tasa_desde_dbz(volumen.momento('DBZH'))
+        lluvia = motor.tasa_desde_codigos(codigos_uint16, bits=16)
+
+    Las entradas pueden ser arreglos NumPy (NaN = sin dato) o masked arrays de
+    PyART (la salida conserva la máscara). Con `salida` el resultado se
+    escribe en ese arreglo float32 sin reservar memoria nueva.
+    """
+
+    def __init__(self, relacion_defecto: str = 'marshall_palmer',
+                 relaciones_por_radar: Optional[Dict[str, str]] = None):
+        """
+        Args:
+            relacion_defecto: Relación para radares sin asignación propia
+            relaciones_por_radar: Radar -> nombre de relación en RELACIONES
+        """
+        self.relaciones = {nombre: dict(rel) for nombre, rel in RELACIONES.items()}
+        self.relacion_defecto = relacion_defecto
+        self.relaciones_por_radar = {}
+        for radar, nombre in (relaciones_por_radar or {}).items():
+            self.asignar_relacion(radar, nombre)
+        self._relacion(relacion_defecto)
+
+        self._tablas: Dict[tuple, np.ndarray] = {}
+        self._buffers: Dict[str, np.ndarray] = {}
+
+    def registrar_relacion(self, nombre: str, tipo: str, **coeficientes):
+        """Agrega (o reemplaza) una relación, p. ej. un ajuste local con pluviómetros"""
+        requeridos = {'z': {'a', 'b'}, 'kdp': {'a', 'b'}, 'z_zdr': {'a', 'b', 'c'}}
+        if tipo not in requeridos:
+            raise ValueError(f"Tipo de relación desconocido: {tipo}")
+        faltantes = requeridos[tipo] - set(coeficientes)
+        if faltantes:
+            raise ValueError(f"Faltan coeficientes para {nombre}: {sorted(faltantes)}")
+        self.relaciones[nombre] = {'tipo': tipo, **{k: float(v) for k, v in coeficientes.items()}}
+        self._tablas = {clave: tabla for clave, tabla in self._tablas.items() if clave[0] != nombre}
+
+    def asignar_relacion(self, radar: str, nombre: str):
+        """Relación a usar por defecto para un radar"""
+        self._relacion(nombre)
+        self.relaciones_por_radar[radar] = nombre
+
+    def relacion_para(self, radar: Optional[str] = None) -> str:
+        return self.relaciones_por_radar.get(radar, self.relacion_defecto)
+
+    def _relacion(self, nombre: str) -> Dict:
+        if nombre not in self.relaciones:
+            raise KeyError(f"Relación {nombre} no registrada (hay: {sorted(self.relaciones)})")
+        return self.relaciones[nombre]
+
+    def _buffer(self, clave: str, forma) -> np.ndarray:
+        """Arreglo float32 temporal reutilizado entre llamadas con la misma forma"""
+        buffer = self._buffers.get(clave)
+        if buffer is None or buffer.shape != tuple(forma):
+            buffer = np.empty(forma, dtype='float32')
+            self._buffers[clave] = buffer
+        return buffer
+
+    @staticmethod
+    def _preparar_salida(entrada, salida) -> np.ndarray:
+        if salida is None:
+            return np.empty(np.shape(entrada), dtype='float32')
+        if salida.dtype != np.float32 or salida.shape != np.shape(entrada):
+            raise ValueError("salida debe ser float32 con la forma de la entrada")
+        return salida
+
+    @staticmethod
+    def _finalizar(entradas, salida):
+        """Aplica la máscara combinada de las entradas (si alguna es masked array)"""
+        enmascaradas = [x for x in entradas if np.ma.isMaskedArray(x)]
+        if not enmascaradas:
+            return salida
+        mascara = np.ma.getmaskarray(enmascaradas[0])
+        for x in enmascaradas[1:]:
+            mascara = mascara | np.ma.getmaskarray(x)
+        salida[mascara] = np.nan
+        return np.ma.masked_array(salida, mask=mascara | np.isnan(salida))
+
+    def tasa_desde_dbz(self, dbz, relacion: Optional[str] = None,
+                       salida: Optional[np.ndarray] = None, radar: Optional[str] = None):
+        """
+        Z-R: R = a^(-1/b) · exp(dBZ · ln(10)/(10·b))
+
+        Args:
+            dbz: Reflectividad en dBZ (ndarray o masked array, cualquier forma)
+            relacion: Nombre de una relación de tipo 'z' (None = la del radar)
+            salida: Arreglo float32 donde escribir el resultado
+            radar: Radar para elegir la relación si no se indica
+        """
+        nombre = relacion or self.relacion_para(radar)
+        rel = self._relacion(nombre)
+        if rel['tipo'] != 'z':
+            raise ValueError(f"La relación {nombre} no es Z-R")
+
+        salida = self._preparar_salida(dbz, salida)
+        np.multiply(np.ma.getdata(dbz), _LN10_10 / rel['b'], out=salida)
+        np.exp(salida, out=salida)
+        salida *= rel['a'] ** (-1 / rel['b'])
+        return self._finalizar([dbz], salida)
+
+    def tasa_desde_kdp(self, kdp, relacion: str = 'kdp_bringi', salida: Optional[np.ndarray] = None):
+        """R(KDP) = a·KDP^b; KDP negativo o nulo da 0 mm/h"""
+        rel = self._relacion(relacion)
+        if rel['tipo'] != 'kdp':
+            raise ValueError(f"La relación {relacion} no es R(KDP)")
+
+        salida = self._preparar_salida(kdp, salida)
+        # np.maximum propaga NaN, así que los bins sin dato siguen sin dato
+        np.maximum(np.ma.getdata(kdp), 0, out=salida)
+        np.power(salida, rel['b'], out=salida)
+        salida *= rel['a']
+        return self._finalizar([kdp], salida)
+
+    def tasa_desde_z_zdr(self, dbz, zdr, relacion: str = 'z_zdr_bringi',
+                         salida: Optional[np.ndarray] = None):
+        """R(Z, ZDR) = c·Z^a·Zdr^b = c·exp(ln(10)/10 · (a·dBZ + b·ZDR[dB]))"""
+        rel = self._relacion(relacion)
+        if rel['tipo'] != 'z_zdr':
+            raise ValueError(f"La relación {relacion} no es R(Z, ZDR)")
+
+        salida = self._preparar_salida(dbz, salida)
+        temporal = self._buffer('zdr', salida.shape)
+        np.multiply(np.ma.getdata(dbz), rel['a'] * _LN10_10, out=salida)
+        np.multiply(np.ma.getdata(zdr), rel['b'] * _LN10_10, out=temporal)
+        salida += temporal
+        np.exp(salida, out=salida)
+        salida *= rel['c']
+        return self._finalizar([dbz, zdr], salida)
+
+    def tabla_codigos(self, relacion: Optional[str] = None, bits: int = 16,
+                      radar: Optional[str] = None) -> np.ndarray:
+        """
+        Tabla código IRIS -> mm/h (256 o 65536 entradas float32, NaN sin dato)
+
+        8 bits: dBZ = (N - 64) / 2; 16 bits: dBZ = (N - 32768) / 100
+        """
+        nombre = relacion or self.relacion_para(radar)
+        clave = (nombre, bits)
+        if clave not in self._tablas:
+            codigos = np.arange(2 ** bits, dtype='uint16' if bits == 16 else 'uint8')
+            if bits == 8:
+                dbz = TIPOS_DATO[2][1](codigos, {})
+            elif bits == 16:
+                dbz = _convertir_16bits(codigos, {})
+            else:
+                raise ValueError("bits debe ser 8 o 16")
+            self._tablas[clave] = self.tasa_desde_dbz(np.asarray(dbz, dtype='float32'), nombre)
+        return self._tablas[clave]
+
+    def tasa_desde_codigos(self, codigos: np.ndarray, bits: int = 16, relacion: Optional[str] = None,
+                           salida: Optional[np.ndarray] = None, radar: Optional[str] = None) -> np.ndarray:
+        """Z-R sobre dBZ cuantizados: una indexación en la tabla por bin, sin aritmética"""
+        tabla = self.tabla_codigos(relacion, bits, radar)
+        salida = self._preparar_salida(codigos, salida)
+        np.take(tabla, codigos, out=salida)
+        return salida
+
+    def calcular(self, fuente, relacion: Optional[str] = None, radar: Optional[str] = None,
+                 salida: Optional[np.ndarray] = None):
+        """
+        Tasa de lluvia para un volumen completo
+
+        Args:
+            fuente: Objeto Radar de PyART, IrisRawFile o dict nombre -> arreglo
+            relacion: Nombre de la relación (None = la asignada al radar)
+            radar: Radar para elegir la relación
+            salida: Arreglo float32 donde escribir el resultado
+        """
+        nombre = relacion or self.relacion_para(radar)
+        tipo = self._relacion(nombre)['tipo']
+
+        if tipo == 'z':
+            return self.tasa_desde_dbz(self._campo(fuente, 'dbz'), nombre, salida)
+        if tipo == 'kdp':
+            return self.tasa_desde_kdp(self._campo(fuente, 'kdp'), nombre, salida)
+        return self.tasa_desde_z_zdr(self._campo(fuente, 'dbz'), self._campo(fuente, 'zdr'), nombre, salida)
+
+    @staticmethod
+    def _campo(fuente, clave: str):
+        """Busca el momento en un Radar de PyART, un IrisRawFile o un dict"""
+        for nombre in CAMPOS[clave]:
+            if hasattr(fuente, 'fields'):
+                if nombre in fuente.fields:
+                    return fuente.fields[nombre]['data']
+            elif hasattr(fuente, 'momento'):
+                if nombre in fuente.tipos_datos:
+                    return fuente.momento(nombre)
+            elif nombre in fuente:
+                return fuente[nombre]
+        raise KeyError(f"No hay campo de {clave} (se buscó {CAMPOS[clave]})")
@@ -10,6 +10,8 @@ from pathlib import Path
 from datetime import datetime
 import logging
 
+from src.processors.precipitacion_radar import RainRateEngine
+
 logger = logging.getLogger(__name__)
 
 # Configuración de logging
@@ -31,9 +33,12 @@ except ImportError:
 class RadarAdvancedProcessor:
     """Procesador avanzado usando PyART para archivos de radar"""
     
-    def __init__(self, data_dir="data/Radar_IDEAM"):
+    def __init__(self, data_dir="data/Radar_IDEAM", relaciones_por_radar=None):
         self.data_dir = Path(data_dir)
         
+        # Relaciones Z-R / R(KDP) / R(Z, ZDR) por radar (ver precipitacion_radar.RELACIONES)
+        self.motor_precipitacion = RainRateEngine(relaciones_por_radar=relaciones_por_radar)
+        
         if not PYART_AVAILABLE:
             logger.error("PyART no está instalado. Funcionalidad limitada.")
             self.pyart_enabled = False
@@ -227,47 +232,43 @@ class RadarAdvancedProcessor:
             logger.error(f"Error generando CAPPI: {e}")
             return None
     
-    def calcular_precipitacion(self, radar, campo='reflectivity'):
+    def calcular_precipitacion(self, radar, campo='reflectivity', relacion=None, nombre_radar=None):
         """
-        Calcula tasa de precipitación usando relación Z-R
-        Z = aR^b, típicamente Z = 200R^1.6
+        Calcula tasa de precipitación (mm/h, float32) con el motor vectorizado
+        
+        Por defecto Z = 200R^1.6 (Marshall-Palmer) sobre `campo`; con `relacion`
+        o con una relación asignada a `nombre_radar` se puede usar otra Z-R,
+        R(KDP) o R(Z, ZDR), que toman sus campos del volumen.
         """
         if not self.pyart_enabled or radar is None:
             return None
         
         try:
-            # Obtener datos de reflectividad
-            if campo not in radar.fields:
-                logger.error(f"Campo {campo} no disponible")
-                return None
-            
-            z_data = radar.fields[campo]['data']
-            
-            # Convertir dBZ a Z (lineal)
-            z_linear = 10 ** (z_data / 10.0)
-            
-            # Aplicar relación Z-R: Z = 200R^1.6
-            a = 200
-            b = 1.6
-            
-            # R = (Z/a)^(1/b)
-            rain_rate = (z_linear / a) ** (1 / b)
-            
-            # Enmascarar valores inválidos
-            rain_rate = np.ma.masked_where(z_data.mask, rain_rate)
+            nombre = relacion or self.motor_precipitacion.relacion_para(nombre_radar)
+            tipo = self.motor_precipitacion.relaciones[nombre]['tipo']
+            
+            if tipo == 'z':
+                # Obtener datos de reflectividad
+                if campo not in radar.fields:
+                    logger.error(f"Campo {campo} no disponible")
+                    return None
+                rain_rate = self.motor_precipitacion.tasa_desde_dbz(radar.fields[campo]['data'], nombre)
+            else:
+                rain_rate = self.motor_precipitacion.calcular(radar, nombre)
             
             # Crear campo de precipitación
             rain_dict = {
                 'data': rain_rate,
                 'units': 'mm/h',
                 'long_name': 'Tasa de precipitación',
-                'standard_name': 'rainfall_rate'
+                'standard_name': 'rainfall_rate',
+                'comment': f"Relación {nombre}"
             }
             
             # Agregar al radar
             radar.add_field('rainfall_rate', rain_dict, replace_existing=True)
             
-            logger.info("✅ Tasa de precipitación calculada")
+            logger.info(f"✅ Tasa de precipitación calculada ({nombre})")
             
             return rain_rate
             
@@ -13,6 +13,8 @@ from datetime import datetime
 import logging
 import sys
 
+from src.data_sources.ideam_inventario import InventarioRadar
+
 logger = logging.getLogger(__name__)
 
 # Información de radares (copiada para independencia del módulo)
@@ -61,6 +63,7 @@ class RadarDataProcessor:
     
     def __init__(self, data_dir="data/Radar_IDEAM"):
         self.data_dir = Path(data_dir)
+        self.inventario = InventarioRadar(self.data_dir)
         self.productos_radar = {
             'CAPPI': 'Constant Altitude Plan Position Indicator',
             'MAX': 'Reflectividad Máxima',
@@ -70,41 +73,37 @@ class RadarDataProcessor:
         }
     
     def leer_inventario(self):
-        """Lee el inventario de archivos disponibles"""
-        inventario_path = self.data_dir / 'inventario_radares.csv'
+        """Lee el inventario de archivos disponibles (reconciliado de forma incremental)"""
+        self.inventario.reconciliar()
+        inventario = self.inventario.consultar()
         
-        if not inventario_path.exists():
-            logger.warning("No se encuentra inventario. Ejecute primero el descargador.")
+        if inventario.empty:
+            logger.warning("No hay archivos en el inventario. Ejecute primero el descargador.")
             return None
         
-        return pd.read_csv(inventario_path)
+        inventario['distancia_medellin_km'] = inventario['radar'].map(
+            lambda r: RADARES_IDEAM.get(r, {}).get('distancia_medellin_km', 0)
+        )
+        return inventario
     
     def analizar_disponibilidad(self, radar='Barrancabermeja'):
         """Analiza la disponibilidad de datos por fecha"""
-        inventario = self.leer_inventario()
+        self.inventario.reconciliar(radar)
         
-        if inventario is None or inventario.empty:
-            print("⚠️  No hay datos disponibles")
-            return None
-        
-        # Filtrar por radar
-        datos_radar = inventario[inventario['radar'] == radar].copy()
+        # Agregación resuelta por el índice del inventario
+        resumen = self.inventario.resumen_por_fecha(radar)
         
-        if datos_radar.empty:
-            print(f"⚠️  No hay datos para el radar {radar}")
-            print(f"Radares disponibles: {inventario['radar'].unique().tolist()}")
+        if resumen.empty:
+            radares = self.inventario.radares()
+            if not radares:
+                print("⚠️  No hay datos disponibles")
+            else:
+                print(f"⚠️  No hay datos para el radar {radar}")
+                print(f"Radares disponibles: {radares}")
             return None
         
         # Convertir fechas
-        datos_radar['fecha'] = pd.to_datetime(datos_radar['fecha_directorio'])
-        
-        # Resumen
-        resumen = datos_radar.groupby('fecha').agg({
-            'archivo': 'count',
-            'tamaño_mb': 'sum'
-        }).reset_index()
-        
-        resumen.columns = ['fecha', 'num_archivos', 'tamaño_total_mb']
+        resumen['fecha'] = pd.to_datetime(resumen['fecha'], format='%Y%m%d')
         
         return resumen
     
@@ -278,13 +277,12 @@ class RadarDataProcessor:
     
     def listar_radares_con_datos(self):
         """Lista los radares que tienen datos descargados"""
-        inventario = self.leer_inventario()
+        self.inventario.reconciliar()
+        radares = self.inventario.radares()
         
-        if inventario is None or inventario.empty:
+        if not radares:
             print("⚠️  No hay datos descargados")
-            return []
         
-        radares = inventario['radar'].unique().tolist()
         return radares
 
 
@@ -362,18 +360,13 @@ class EnhancedClimateDashboard:
     
     def comparar_radares(self):
         """Compara estadísticas entre diferentes radares"""
-        inventario = self.processor.leer_inventario()
+        self.processor.inventario.reconciliar()
+        comparacion = self.processor.inventario.resumen_por_radar()
         
-        if inventario is None or inventario.empty:
+        if comparacion.empty:
             print("   ⚠️ No hay datos disponibles para comparar")
             return
         
-        # Agrupar por radar
-        comparacion = inventario.groupby('radar').agg({
-            'archivo': 'count',
-            'tamaño_mb': 'sum'
-        }).reset_index()
-        
         comparacion.columns = ['Radar', 'Archivos', 'Tamaño_MB']
         comparacion['Tamaño_MB'] = comparacion['Tamaño_MB'].round(2)
         
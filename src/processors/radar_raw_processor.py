@@ -9,10 +9,11 @@ import matplotlib.pyplot as plt
 import plotly.graph_objects as go
 from pathlib import Path
 from datetime import datetime
-import struct
-import gzip
 import logging
 
+from src.data_sources.ideam_inventario import InventarioRadar
+from src.processors.iris_raw import IrisRawFile, leer_metadatos
+
 logger = logging.getLogger(__name__)
 
 # Configuración de logging
@@ -27,6 +28,7 @@ class RadarRawProcessor:
     
     def __init__(self, data_dir="data/Radar_IDEAM"):
         self.data_dir = Path(data_dir)
+        self.inventario = InventarioRadar(self.data_dir)
         
         # Productos de radar disponibles
         self.productos = {
@@ -40,37 +42,65 @@ class RadarRawProcessor:
         
         logger.info(f"RadarRawProcessor inicializado para: {self.data_dir}")
     
-    def listar_archivos_raw(self, radar=None):
-        """Lista todos los archivos RAW disponibles"""
-        archivos = []
+    def listar_archivos_raw(self, radar=None, con_metadatos=False):
+        """
+        Lista todos los archivos RAW disponibles (desde el inventario incremental)
         
-        if radar:
-            radar_dirs = [self.data_dir / radar]
-        else:
-            radar_dirs = [d for d in self.data_dir.iterdir() if d.is_dir()]
+        Args:
+            radar: Nombre del radar (None = todos)
+            con_metadatos: Agrega sitio, inicio del volumen, barridos, momentos y
+                           elevaciones leyendo solo los encabezados IRIS de cada archivo
+        """
+        self.inventario.reconciliar(radar)
+        inventario = self.inventario.consultar(radar)
         
-        for radar_dir in radar_dirs:
-            if not radar_dir.exists():
-                continue
-                
-            for fecha_dir in radar_dir.iterdir():
-                if fecha_dir.is_dir():
-                    for archivo in fecha_dir.iterdir():
-                        if archivo.suffix.upper() in ['.RAW', '.GZ', ''] and archivo.is_file():
-                            archivos.append({
-                                'radar': radar_dir.name,
-                                'fecha': fecha_dir.name,
-                                'archivo': archivo.name,
-                                'ruta': archivo,
-                                'tamaño_mb': archivo.stat().st_size / (1024 * 1024)
-                            })
-        
-        return pd.DataFrame(archivos)
+        if inventario.empty:
+            return pd.DataFrame()
+        
+        sufijos = inventario['archivo'].map(lambda nombre: Path(nombre).suffix.upper())
+        inventario = inventario[sufijos.isin(['.RAW', '.GZ', ''])]
+        
+        archivos = pd.DataFrame({
+            'radar': inventario['radar'],
+            'fecha': inventario['fecha_directorio'],
+            'archivo': inventario['archivo'],
+            'ruta': inventario['ruta_completa'].map(Path),
+            'tamaño_mb': inventario['tamaño_mb']
+        }).reset_index(drop=True)
+        
+        if con_metadatos and not archivos.empty:
+            metadatos = pd.DataFrame([self._metadatos_encabezado(ruta) for ruta in archivos['ruta']])
+            archivos = pd.concat([archivos, metadatos], axis=1)
+        
+        return archivos
+    
+    @staticmethod
+    def _metadatos_encabezado(ruta):
+        """Metadatos IRIS del encabezado; vacío si el archivo no es IRIS o no se puede leer"""
+        try:
+            metadatos = leer_metadatos(ruta)
+        except (ValueError, OSError, EOFError) as e:
+            logger.debug(f"Sin encabezados IRIS en {Path(ruta).name}: {e}")
+            return {}
+        return {
+            'sitio': metadatos['sitio'],
+            'inicio_volumen': metadatos['inicio_volumen'],
+            'num_barridos': metadatos['num_barridos'],
+            'momentos': metadatos['momentos'],
+            'angulos_elevacion': metadatos['angulos_barrido'],
+        }
     
-    def leer_archivo_raw(self, ruta_archivo):
+    def leer_archivo_raw(self, ruta_archivo, momentos=None):
         """
-        Lee un archivo RAW de radar
-        Intenta diferentes métodos de lectura
+        Lee y decodifica un archivo RAW de radar (IRIS/Sigmet)
+        
+        El archivo se abre con memoria mapeada (los .gz se descomprimen una
+        vez) y se decodifica con IrisRawFile; 'volumen' queda en None si el
+        archivo no tiene formato IRIS.
+        
+        Args:
+            ruta_archivo: Archivo .RAW o .RAW.gz
+            momentos: Momentos a decodificar (None = todos)
         """
         ruta = Path(ruta_archivo)
         
@@ -81,21 +111,22 @@ class RadarRawProcessor:
         logger.info(f"Leyendo archivo: {ruta.name}")
         
         try:
-            # Verificar si está comprimido
-            if ruta.suffix == '.gz':
-                with gzip.open(ruta, 'rb') as f:
-                    datos = f.read()
-            else:
-                with open(ruta, 'rb') as f:
-                    datos = f.read()
+            try:
+                volumen = IrisRawFile(ruta, momentos=momentos)
+                datos = volumen.datos
+            except ValueError as e:
+                # Archivo no IRIS: se conserva el contenido crudo para la inspección básica
+                logger.warning(f"⚠️  {e}")
+                volumen = None
+                datos = IrisRawFile.leer_bytes(ruta)
             
             logger.info(f"Archivo leído exitosamente: {len(datos)} bytes")
             
-            # Intentar parsear header básico
-            metadata = self.extraer_metadata_basica(datos)
+            metadata = self.extraer_metadata_basica(datos, volumen)
             
             return {
                 'datos_raw': datos,
+                'volumen': volumen,
                 'metadata': metadata,
                 'ruta': ruta,
                 'tamaño': len(datos)
@@ -105,10 +136,10 @@ class RadarRawProcessor:
             logger.error(f"Error leyendo archivo: {e}")
             return None
     
-    def extraer_metadata_basica(self, datos):
+    def extraer_metadata_basica(self, datos, volumen=None):
         """
         Extrae metadata básica del archivo RAW
-        Formato IRIS tiene estructura específica
+        Con el volumen IRIS decodificado se toma de product_hdr e ingest_header
         """
         metadata = {
             'formato': 'Desconocido',
@@ -118,20 +149,22 @@ class RadarRawProcessor:
         }
         
         try:
-            # Los primeros bytes suelen contener información del formato
-            # Formato IRIS típicamente empieza con identificadores específicos
+            metadata['header_sample'] = bytes(datos[:100]).hex()[:50]
             
-            # Buscar patrones comunes en nombres de archivo
-            # Ejemplo: BAR241211010000.RAW
-            # Donde: BAR = radar, 241211 = YYMMDD, 010000 = HHMMSS
-            
-            header_bytes = datos[:100]
-            
-            # Intentar detectar timestamp en los primeros bytes
-            # (esto depende del formato específico IRIS/Sigmet)
-            
-            metadata['formato'] = 'IRIS/Sigmet (tentativo)'
-            metadata['header_sample'] = header_bytes.hex()[:50]
+            if volumen is not None:
+                producto = volumen.encabezado_producto
+                ingesta = volumen.encabezado_ingesta
+                metadata.update({
+                    'formato': f"IRIS/Sigmet {producto['version_iris']}".strip(),
+                    'timestamp': ingesta['inicio_volumen'],
+                    'radar': producto['sitio'],
+                    'latitud': producto['latitud'],
+                    'longitud': producto['longitud'],
+                    'altura_radar_m': producto['altura_radar_m'],
+                    'longitud_onda_cm': producto['longitud_onda_cm'],
+                    'num_barridos': len(volumen.barridos),
+                    'momentos': volumen.tipos_datos,
+                })
             
         except Exception as e:
             logger.debug(f"Error extrayendo metadata: {e}")
@@ -187,7 +220,7 @@ class RadarRawProcessor:
         
         analisis = {
             'tamaño_total': len(datos),
-            'primeros_bytes': datos[:50].hex(),
+            'primeros_bytes': bytes(datos[:50]).hex(),
             'patron_detectado': None,
             'bloques_posibles': []
         }
@@ -204,51 +237,38 @@ class RadarRawProcessor:
         
         return analisis
     
-    def extraer_reflectividad_simple(self, archivo_raw, max_intentos=10):
-        """
-        Intenta extraer datos de reflectividad de forma simple
-        Busca patrones típicos de datos de radar
+    def extraer_reflectividad_simple(self, archivo_raw, momento='DBZH'):
         """
-        datos = archivo_raw['datos_raw']
+        Estadísticas de reflectividad por barrido del volumen decodificado
         
-        # Los datos de reflectividad típicamente están en rangos específicos
-        # Valores típicos: -32 a 95 dBZ
+        Returns:
+            DataFrame con una fila por barrido (ángulo, rayos, máx/media dBZ,
+            cobertura) o None si el archivo no se pudo decodificar
+        """
+        volumen = archivo_raw.get('volumen')
         
-        reflectividad = []
+        if volumen is None or momento not in volumen.tipos_datos:
+            logger.warning("No se pudieron extraer valores de reflectividad")
+            return None
         
-        try:
-            # Intentar leer como valores de 8 bits o 16 bits
-            for offset in range(0, min(len(datos), 10000), 100):
-                try:
-                    # Leer como unsigned byte
-                    valor = struct.unpack('B', datos[offset:offset+1])[0]
-                    
-                    # Convertir a dBZ (factor de escala típico)
-                    dbz = (valor - 32) / 2.0  # Ejemplo de conversión común
-                    
-                    if -32 <= dbz <= 95:  # Rango válido
-                        reflectividad.append({
-                            'offset': offset,
-                            'valor_raw': valor,
-                            'dbz': dbz
-                        })
-                        
-                        if len(reflectividad) >= max_intentos:
-                            break
-                            
-                except:
-                    continue
+        filas = []
+        for barrido in volumen.barridos:
+            datos = barrido['momentos'].get(momento)
+            if datos is None:
+                continue
             
-            if reflectividad:
-                logger.info(f"Extraídos {len(reflectividad)} valores de reflectividad")
-                return pd.DataFrame(reflectividad)
-            else:
-                logger.warning("No se pudieron extraer valores de reflectividad")
-                return None
-                
-        except Exception as e:
-            logger.error(f"Error extrayendo reflectividad: {e}")
-            return None
+            validos = datos[np.isfinite(datos)]
+            filas.append({
+                'barrido': barrido['numero'],
+                'angulo_fijo': barrido['angulo_fijo'],
+                'rayos': barrido['rayos'],
+                'dbz_max': float(validos.max()) if validos.size else np.nan,
+                'dbz_media': float(validos.mean()) if validos.size else np.nan,
+                'cobertura_pct': 100 * validos.size / datos.size if datos.size else 0.0,
+            })
+        
+        logger.info(f"Reflectividad extraída de {len(filas)} barridos")
+        return pd.DataFrame(filas)
     
     def generar_reporte_archivo(self, ruta_archivo):
         """Genera un reporte completo de un archivo RAW"""
@@ -274,7 +294,8 @@ class RadarRawProcessor:
             'metadata': archivo_raw['metadata'],
             'estructura': estructura,
             'reflectividad_extraida': reflectividad is not None,
-            'num_valores_reflectividad': len(reflectividad) if reflectividad is not None else 0
+            'num_barridos_reflectividad': len(reflectividad) if reflectividad is not None else 0,
+            'dbz_max': reflectividad['dbz_max'].max() if reflectividad is not None and len(reflectividad) else None
         }
         
         return reporte
@@ -354,7 +375,8 @@ class RadarVisualizador:
         
         if reporte['reflectividad_extraida']:
             print(f"\n📊 Datos Extraídos:")
-            print(f"   Valores de reflectividad: {reporte['num_valores_reflectividad']}")
+            print(f"   Barridos con reflectividad: {reporte['num_barridos_reflectividad']}")
+            print(f"   Reflectividad máxima: {reporte['dbz_max']:.1f} dBZ")
         else:
             print(f"\n⚠️  No se pudieron extraer datos de reflectividad")
         
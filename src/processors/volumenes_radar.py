@@ -0,0 +1,323 @@
+"""
+Carga de volúmenes RAW de radares IDEAM a registros tabulares
+Extrae, por archivo, la información del nombre (radar, timestamp, tamaño) y
+la del volumen (encabezados IRIS y estadísticas de reflectividad), con caché
+persistente de lo ya decodificado y decodificación opcional en un pool de
+procesos. La usan los visualizadores de radar IDEAM.
+"""
+
+import math
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime
+import logging
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Caché persistente de volúmenes ya decodificados
+try:
+    from src.data_sources.ideam_inventario import CacheVolumenesRadar
+    CACHE_VOLUMENES_AVAILABLE = True
+except ImportError:
+    CACHE_VOLUMENES_AVAILABLE = False
+
+# Decodificador nativo IRIS (encabezados sin PyART)
+try:
+    from src.processors.iris_raw import IrisRawFile, leer_metadatos
+    IRIS_RAW_AVAILABLE = True
+except ImportError:
+    IRIS_RAW_AVAILABLE = False
+
+# PyART solo para archivos que no son IRIS
+try:
+    import pyart
+    PYART_AVAILABLE = True
+except ImportError:
+    PYART_AVAILABLE = False
+
+
+def _procesar_lote(archivos, estadisticas=True):
+    """Tarea del pool de procesos: (ruta, información del volumen) de un lote de archivos"""
+    datos = []
+    for archivo in archivos:
+        try:
+            datos.append((str(archivo), CargadorVolumenesRadar.info_volumen(archivo, estadisticas)))
+        except Exception as e:
+            logger.warning(f"⚠️  Error procesando {archivo.name}: {e}")
+    return datos
+
+
+class CargadorVolumenesRadar:
+    """Registros por volumen RAW (uno por archivo) para armar DataFrames de radar
+
+    Uso:
+        cache = CargadorVolumenesRadar.abrir_cache("data/Radar_IDEAM")
+        datos = CargadorVolumenesRadar.cargar(archivos, "Barrancabermeja", cache=cache)
+        df = pd.DataFrame(datos)
+    """
+
+    @staticmethod
+    def abrir_cache(data_dir):
+        """Caché de metadatos/estadísticas por volumen junto al inventario (None si no se puede abrir)"""
+        if not CACHE_VOLUMENES_AVAILABLE:
+            return None
+        try:
+            return CacheVolumenesRadar(data_dir)
+        except Exception as e:
+            logger.warning(f"⚠️  Caché de volúmenes no disponible: {e}")
+            return None
+
+    @staticmethod
+    def cargar(archivos, radar_name, estadisticas=True, paralelo=False,
+               max_workers=None, tamaño_lote=None, cache=None):
+        """
+        Información de cada archivo, decodificando solo los que no están en la caché
+
+        Args:
+            archivos: Archivos RAW, en el orden deseado
+            radar_name: Nombre del radar (ej: Barrancabermeja)
+            estadisticas: Si es False solo se leen los encabezados IRIS
+            paralelo: Repartir los archivos pendientes en un pool de procesos
+            max_workers: Procesos del pool (por defecto os.cpu_count())
+            tamaño_lote: Archivos por tarea enviada al pool
+            cache: CacheVolumenesRadar (None = decodificar todo)
+
+        Returns:
+            Lista de dicts (info_basica + info_volumen), en el orden de `archivos`;
+            los archivos que no se pudieron leer se omiten
+        """
+        # Volúmenes ya decodificados (mismo tamaño y mtime) se toman de la caché
+        volumenes = cache.consultar(archivos, estadisticas) if cache else {}
+        pendientes = [archivo for archivo in archivos if str(archivo) not in volumenes]
+
+        if cache:
+            logger.info(f"💾 Caché: {len(volumenes)} volúmenes reutilizados, {len(pendientes)} por decodificar")
+
+        # Decodificar solo los volúmenes nuevos o modificados
+        if paralelo and len(pendientes) > 1:
+            nuevos = CargadorVolumenesRadar.procesar_en_paralelo(pendientes, estadisticas,
+                                                                  max_workers, tamaño_lote)
+        else:
+            nuevos = []
+            for i, archivo in enumerate(pendientes):
+                if i % 50 == 0 and i > 0:
+                    logger.info(f"  Procesados {i}/{len(pendientes)} archivos...")
+
+                try:
+                    nuevos.append((str(archivo), CargadorVolumenesRadar.info_volumen(archivo, estadisticas)))
+                except Exception as e:
+                    logger.warning(f"⚠️  Error procesando {archivo.name}: {e}")
+
+        volumenes.update(nuevos)
+        if cache and nuevos:
+            cache.guardar(nuevos, estadisticas)
+
+        datos = []
+        for archivo in archivos:
+            if str(archivo) not in volumenes:
+                continue
+            try:
+                datos.append({**CargadorVolumenesRadar.info_basica(archivo, radar_name),
+                              **volumenes[str(archivo)]})
+            except OSError as e:
+                logger.warning(f"⚠️  Error procesando {archivo.name}: {e}")
+        return datos
+
+    @staticmethod
+    def procesar_en_paralelo(archivos, estadisticas=True, max_workers=None, tamaño_lote=None):
+        """
+        Decodifica los volúmenes en un pool de procesos
+
+        Los archivos se envían por lotes para amortizar la serialización entre
+        procesos; cada lote se incorpora apenas termina y el resultado final
+        conserva el orden de entrada.
+
+        Si un proceso muere (sin memoria, fallo nativo con un volumen dañado)
+        el pool queda roto y todos sus lotes pendientes fallan. Esos archivos
+        se reintentan uno por tarea en un pool nuevo, y los que lo vuelvan a
+        romper se procesan cada uno en un proceso propio: el archivo que mate
+        a su proceso se omite y se reporta, nunca se decodifica en el proceso
+        actual.
+
+        Returns:
+            Lista de tuplas (ruta, dict de info_volumen)
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        total = len(archivos)
+        if not tamaño_lote:
+            tamaño_lote = max(1, math.ceil(total / (max_workers * 4)))
+        lotes = [archivos[i:i + tamaño_lote] for i in range(0, total, tamaño_lote)]
+
+        logger.info(f"🚀 Procesando {total} archivos en {len(lotes)} lotes con {max_workers} procesos")
+
+        progreso = {'completados': 0, 'total': total, 'inicio': time.monotonic()}
+        volumenes, rotos = CargadorVolumenesRadar._ejecutar_lotes(lotes, estadisticas, max_workers, progreso)
+
+        if rotos:
+            sospechosos = [[archivo] for idx in rotos for archivo in lotes[idx]]
+            logger.warning(f"⚠️  Un proceso del pool terminó de forma anormal; se reintentan "
+                           f"{len(sospechosos)} archivos en un pool nuevo")
+            reintento, rotos = CargadorVolumenesRadar._ejecutar_lotes(sospechosos, estadisticas,
+                                                                      max_workers, progreso)
+            volumenes.update(reintento)
+
+            for idx in rotos:
+                aislado, roto = CargadorVolumenesRadar._ejecutar_lotes([sospechosos[idx]], estadisticas,
+                                                                       1, progreso)
+                if roto:
+                    logger.error(f"❌ {sospechosos[idx][0].name} termina el proceso que lo decodifica; se omite")
+                volumenes.update(aislado)
+
+        return [(str(archivo), volumenes[str(archivo)]) for archivo in archivos if str(archivo) in volumenes]
+
+    @staticmethod
+    def _ejecutar_lotes(lotes, estadisticas, max_workers, progreso):
+        """
+        Ejecuta los lotes en un pool nuevo
+
+        Returns:
+            (dict ruta -> volumen, índices de los lotes perdidos porque el pool se rompió)
+        """
+        volumenes = {}
+        rotos = []
+
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            futuros = {
+                executor.submit(_procesar_lote, lote, estadisticas): idx
+                for idx, lote in enumerate(lotes)
+            }
+
+            for futuro in as_completed(futuros):
+                idx = futuros[futuro]
+                try:
+                    resultado = futuro.result()
+                except BrokenProcessPool:
+                    rotos.append(idx)
+                    continue
+                except Exception as e:
+                    # El lote no llegó al pool (p. ej. no se pudo serializar la tarea)
+                    logger.warning(f"⚠️  Lote {idx} no se pudo enviar al pool ({e}); se procesa localmente")
+                    resultado = _procesar_lote(lotes[idx], estadisticas)
+
+                volumenes.update(resultado)
+                progreso['completados'] += len(lotes[idx])
+                transcurrido = max(time.monotonic() - progreso['inicio'], 1e-6)
+                logger.info(f"  Procesados {progreso['completados']}/{progreso['total']} archivos "
+                            f"({progreso['completados'] / transcurrido:.1f} archivos/s)")
+
+        return volumenes, sorted(rotos)
+
+    @staticmethod
+    def info_basica(archivo, radar_name):
+        """Información que sale del nombre y del stat() del archivo, sin abrirlo"""
+        tamaño = archivo.stat().st_size
+        info = {
+            'radar': radar_name,
+            'archivo': archivo.name,
+            'ruta': str(archivo),
+            'tamaño_bytes': tamaño,
+            'tamaño_mb': tamaño / (1024 * 1024)
+        }
+
+        # Extraer timestamp del nombre (formato: BARYYMMDDHHMMSSsss)
+        timestamp = CargadorVolumenesRadar.extraer_timestamp_ideam(archivo.name)
+        info['timestamp'] = timestamp
+
+        if timestamp:
+            info['fecha'] = timestamp.date()
+            info['hora'] = timestamp.hour
+            info['minuto'] = timestamp.minute
+            info['segundo'] = timestamp.second
+
+        # Extraer prefijo de radar
+        prefijo_match = re.match(r'^([A-Z]{3})', archivo.name)
+        if prefijo_match:
+            info['prefijo'] = prefijo_match.group(1)
+
+        return info
+
+    @staticmethod
+    def info_volumen(archivo, estadisticas=True):
+        """
+        Información que requiere leer el volumen (lo que se guarda en la caché)
+
+        Los metadatos salen de los encabezados IRIS sin decodificar los rayos;
+        las estadísticas de reflectividad (opcionales) requieren el volumen
+        completo y se calculan con el decodificador nativo o, si el archivo no
+        es IRIS, con PyART.
+        """
+        info = {}
+
+        # Metadatos desde los encabezados (solo los primeros 12 KB del archivo)
+        es_iris = False
+        if IRIS_RAW_AVAILABLE:
+            try:
+                metadatos = leer_metadatos(archivo)
+                info['sitio'] = metadatos['sitio']
+                info['inicio_volumen'] = metadatos['inicio_volumen']
+                info['campos_disponibles'] = metadatos['momentos']
+                info['num_sweeps'] = metadatos['num_barridos']
+                info['angulos_elevacion'] = metadatos['angulos_barrido']
+                es_iris = True
+            except (ValueError, OSError, EOFError) as e:
+                logger.debug(f"Sin encabezados IRIS: {e}")
+
+        if not estadisticas:
+            return info
+
+        if es_iris:
+            try:
+                volumen = IrisRawFile(archivo, momentos=['DBZH'])
+                resumen = volumen.estadisticas('DBZH')
+                info['reflectividad_max'] = resumen['max']
+                info['reflectividad_mean'] = resumen['media']
+                info['reflectividad_std'] = resumen['std']
+                info['cobertura_pct'] = resumen['cobertura_pct']
+            except (KeyError, ValueError) as e:
+                logger.debug(f"Sin reflectividad en {archivo.name}: {e}")
+
+        # Si PyART está disponible, intentar extraer datos meteorológicos
+        elif PYART_AVAILABLE:
+            try:
+                radar_data = pyart.io.read(str(archivo))
+                info['campos_disponibles'] = list(radar_data.fields.keys())
+                info['num_sweeps'] = radar_data.nsweeps
+
+                # Extraer estadísticas de reflectividad si está disponible
+                field_name = None
+                for possible_name in ['reflectivity', 'DBZH', 'DBZ', 'REF']:
+                    if possible_name in radar_data.fields:
+                        field_name = possible_name
+                        break
+
+                if field_name:
+                    reflectividad = radar_data.fields[field_name]['data']
+                    info['reflectividad_max'] = float(np.ma.max(reflectividad))
+                    info['reflectividad_mean'] = float(np.ma.mean(reflectividad))
+                    info['reflectividad_std'] = float(np.ma.std(reflectividad))
+                    info['cobertura_pct'] = (np.ma.count(reflectividad) / reflectividad.size) * 100
+
+            except Exception as e:
+                logger.debug(f"No se pudo leer con PyART: {e}")
+
+        return info
+
+    @staticmethod
+    def extraer_timestamp_ideam(filename):
+        """Extrae timestamp del formato IDEAM (BARYYMMDDHHMMSSsss)"""
+        try:
+            # Formato: BAR251209000005 -> BAR + YYMMDD + HHMMSS
+            match = re.search(r'([A-Z]{3})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', filename)
+            if match:
+                prefijo, yy, mm, dd, hh, mi, ss = match.groups()
+                year = 2000 + int(yy)
+                return datetime(year, int(mm), int(dd), int(hh), int(mi), int(ss))
+        except Exception as e:
+            logger.debug(f"Error extrayendo timestamp: {e}")
+
+        return None
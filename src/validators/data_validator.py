@@ -5,7 +5,7 @@ Detecta anomalías, valores faltantes y outliers
 
 import pandas as pd
 import numpy as np
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Optional, Union
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,6 +24,9 @@ class DataValidator:
         'cloudiness_percent': (0, 100),
     }
     
+    # Bit de cada variable en la columna de marcas de validate_all
+    FLAG_BITS = {col: 1 << i for i, col in enumerate(VALID_RANGES)}
+    
     @staticmethod
     def validate_range(df: pd.DataFrame, column: str, 
                       min_val: float, max_val: float) -> Tuple[pd.DataFrame, Dict]:
@@ -53,24 +56,60 @@ class DataValidator:
         return df[mask], report
     
     @staticmethod
-    def validate_all(df: pd.DataFrame, remove_outliers: bool = True) -> Tuple[pd.DataFrame, Dict]:
+    def validate_all(df: pd.DataFrame, remove_outliers: bool = True,
+                     flag_column: Optional[str] = None) -> Tuple[pd.DataFrame, Dict]:
         """
         Valida todo el DataFrame contra rangos conocidos
         
+        Calcula en una sola pasada vectorizada la máscara combinada de todas
+        las variables y filtra una única vez. Como en validate_range, un
+        valor nulo no cumple el rango.
+        
+        Args:
+            df: DataFrame a validar
+            remove_outliers: Eliminar las filas con algún valor fuera de rango
+            flag_column: Si se indica, agrega esta columna con una máscara de
+                         bits (FLAG_BITS) de las variables fuera de rango por fila
+        
         Returns:
             (DataFrame validado, reporte completo)
         """
+        columns = [col for col in DataValidator.VALID_RANGES if col in df.columns]
+        if not columns or df.empty:
+            return df, {}
+        
         initial_len = len(df)
+        limits = np.array([DataValidator.VALID_RANGES[col] for col in columns], dtype='float64')
+        values = np.column_stack([
+            pd.to_numeric(df[col], errors='coerce').to_numpy(dtype='float64', na_value=np.nan)
+            for col in columns
+        ])
+        
+        # NaN da False en ambas comparaciones, así que cuenta como fuera de rango
+        invalid = ~((values >= limits[:, 0]) & (values <= limits[:, 1]))
+        counts = invalid.sum(axis=0)
+        
         reports = {}
+        for col, count in zip(columns, counts):
+            reports[col] = {
+                'column': col,
+                'valid_range': DataValidator.VALID_RANGES[col],
+                'outliers_count': int(count),
+                'outliers_percent': round(100 * count / initial_len, 2),
+            }
+            if count > 0:
+                logger.warning(f"{col}: {count} outliers detectados "
+                              f"({reports[col]['outliers_percent']}%)")
         
-        for column, (min_val, max_val) in DataValidator.VALID_RANGES.items():
-            if column in df.columns:
-                df, report = DataValidator.validate_range(df, column, min_val, max_val)
-                reports[column] = report
+        if flag_column:
+            bits = np.array([DataValidator.FLAG_BITS[col] for col in columns], dtype='uint8')
+            df = df.assign(**{flag_column: np.bitwise_or.reduce(invalid * bits, axis=1).astype('uint8')})
         
         if remove_outliers:
-            removed = initial_len - len(df)
+            bad_rows = invalid.any(axis=1)
+            removed = int(bad_rows.sum())
             if removed > 0:
+                df = df[~bad_rows]
                 logger.info(f"Eliminadas {removed} filas con outliers ({100*removed/initial_len:.1f}%)")
         
         return df, reports
@@ -108,26 +147,39 @@ class DataValidator:
         return duplicates
     
     @staticmethod
-    def fill_missing(df: pd.DataFrame, method: str = 'forward') -> pd.DataFrame:
+    def fill_missing(df: pd.DataFrame, method: str = 'forward',
+                     group_by: Optional[List[str]] = None,
+                     time_column: str = 'timestamp',
+                     max_gap: Optional[Union[str, pd.Timedelta, int]] = None) -> pd.DataFrame:
         """
-        Rellena datos faltantes
+        Rellena datos faltantes por grupo (location, source)
+        
+        Los huecos nunca se rellenan con valores de otra ubicación o fuente.
+        Si hay columna de tiempo la interpolación es proporcional al tiempo
+        transcurrido, no a la posición de la fila.
         
         Args:
             method: 'forward' (last observation), 'linear', 'mean', 'drop'
+            group_by: Columnas de grupo (por defecto las de ['location', 'source'] presentes)
+            time_column: Columna de tiempo que ordena cada grupo
+            max_gap: Hueco máximo a rellenar ('6h', Timedelta; filas si no hay columna
+                     de tiempo). En 'linear' es la distancia entre las observaciones que
+                     rodean el hueco; en 'forward' la distancia a la observación usada
         """
         initial_nulls = df.isna().sum().sum()
         
-        if method == 'forward':
-            df = df.fillna(method='ffill').fillna(method='bfill')
-        elif method == 'linear':
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            for col in numeric_cols:
-                if df[col].isna().any():
-                    df[col] = df[col].interpolate(method='linear')
+        keys = [col for col in (group_by if group_by is not None else ['location', 'source'])
+                if col in df.columns]
+        
+        if method in ('forward', 'linear'):
+            df = DataValidator._fill_gaps(df, method, keys, time_column, max_gap)
         elif method == 'mean':
-            numeric_cols = df.select_dtypes(include=['number']).columns
-            for col in numeric_cols:
-                df[col].fillna(df[col].mean(), inplace=True)
+            numeric_cols = df.select_dtypes(include=['number']).columns.difference(keys)
+            if keys:
+                means = df.groupby(keys, sort=False, dropna=False)[list(numeric_cols)].transform('mean')
+            else:
+                means = df[numeric_cols].mean()
+            df = df.assign(**df[numeric_cols].fillna(means))
         elif method == 'drop':
             df = df.dropna()
         
@@ -137,3 +189,89 @@ class DataValidator:
             logger.info(f"Nulos rellenados: {initial_nulls} → {final_nulls} ({method})")
         
         return df
+    
+    @staticmethod
+    def _fill_gaps(df: pd.DataFrame, method: str, keys: List[str],
+                   time_column: str, max_gap) -> pd.DataFrame:
+        """
+        Relleno 'forward'/'linear' vectorizado
+        
+        Ordena una vez por grupo y tiempo y obtiene, con un único groupby
+        ffill/bfill sobre las posiciones válidas, la observación anterior y
+        siguiente de cada hueco en todas las columnas a la vez.
+        """
+        if method == 'linear':
+            candidates = df.select_dtypes(include=['number']).columns
+        else:
+            candidates = df.columns
+        columns = [col for col in candidates
+                   if col not in keys and col != time_column and df[col].isna().any()]
+        if not columns:
+            return df
+        
+        n = len(df)
+        has_time = time_column in df.columns
+        frame = df[keys].reset_index(drop=True)
+        
+        if has_time:
+            times = pd.to_datetime(df[time_column], errors='coerce').reset_index(drop=True)
+            frame['_t'] = times
+            t_all = times.to_numpy(dtype='datetime64[ns]').astype('int64').astype('float64')
+            t_all[times.isna().to_numpy()] = np.nan
+            gap = pd.Timedelta(max_gap).value if max_gap is not None else None
+        else:
+            t_all = np.arange(n, dtype='float64')
+            gap = float(max_gap) if max_gap is not None else None
+        
+        sort_cols = keys + (['_t'] if has_time else [])
+        orden = (frame.sort_values(sort_cols, kind='stable', na_position='last').index.to_numpy()
+                 if sort_cols else np.arange(n))
+        t = t_all[orden]
+        
+        if keys:
+            grupo = frame.iloc[orden].groupby(keys, sort=False, dropna=False).ngroup().to_numpy()
+        else:
+            grupo = np.zeros(n, dtype='int64')
+        
+        # Posición (en el orden por grupo y tiempo) de la última y próxima observación válida
+        validas = df[columns].notna().to_numpy()[orden] & ~np.isnan(t)[:, None]
+        posiciones = pd.DataFrame(np.where(validas, np.arange(n, dtype='float64')[:, None], np.nan))
+        por_grupo = posiciones.groupby(grupo, sort=False)
+        previas = por_grupo.ffill().to_numpy()
+        siguientes = por_grupo.bfill().to_numpy()
+        
+        df = df.copy()
+        for j, col in enumerate(columns):
+            faltan = ~validas[:, j] & df[col].isna().to_numpy()[orden]
+            prev, sig = previas[:, j], siguientes[:, j]
+            
+            if method == 'linear':
+                filas = np.flatnonzero(faltan & ~np.isnan(prev) & ~np.isnan(sig) & ~np.isnan(t))
+                p, q = prev[filas].astype('int64'), sig[filas].astype('int64')
+                span = t[q] - t[p]
+                if gap is not None:
+                    dentro = span <= gap
+                    filas, p, q, span = filas[dentro], p[dentro], q[dentro], span[dentro]
+                
+                valores = df[col].to_numpy(dtype='float64', na_value=np.nan)[orden]
+                fraccion = np.divide(t[filas] - t[p], span, out=np.zeros(len(filas)), where=span > 0)
+                valores[filas] = valores[p] + (valores[q] - valores[p]) * fraccion
+                
+                resultado = np.empty(n)
+                resultado[orden] = valores
+                df[col] = resultado
+            else:
+                # Última observación del grupo; los huecos iniciales toman la siguiente
+                fuente = np.arange(n)
+                for vecina in (prev, sig):
+                    filas = np.flatnonzero(faltan & ~np.isnan(vecina))
+                    origen = vecina[filas].astype('int64')
+                    if gap is not None:
+                        dentro = np.abs(t[filas] - t[origen]) <= gap
+                        filas, origen = filas[dentro], origen[dentro]
+                    fuente[orden[filas]] = orden[origen]
+                    faltan[filas] = False
+                
+                df[col] = df[col].iloc[fuente].array
+        
+        return df
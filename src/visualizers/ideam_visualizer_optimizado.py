@@ -19,6 +19,8 @@ import warnings
 import logging
 import re
 
+from src.processors.volumenes_radar import CargadorVolumenesRadar
+
 warnings.filterwarnings('ignore')
 
 # Configurar logging
@@ -84,13 +86,21 @@ class IDEAMRadarVisualizer:
         
         return radares
     
-    def cargar_datos_radar(self, radar_name, limite=None):
+    def cargar_datos_radar(self, radar_name, limite=None, estadisticas=True,
+                           paralelo=False, max_workers=None, tamaño_lote=None, usar_cache=True):
         """
         Carga y procesa archivos de radar en DataFrame trabajable
         
         Args:
             radar_name: Nombre del radar (ej: Barrancabermeja)
             limite: Número máximo de archivos a procesar (None = todos)
+            estadisticas: Si es False solo se leen los encabezados IRIS (sitio,
+                          barridos, momentos, elevaciones), sin decodificar datos
+            paralelo: Repartir los archivos en un pool de procesos
+            max_workers: Procesos del pool (por defecto os.cpu_count())
+            tamaño_lote: Archivos por tarea enviada al pool (por defecto ~4 lotes por proceso)
+            usar_cache: Reutilizar lo ya calculado para archivos sin cambios
+                        (caché SQLite junto al inventario); solo se decodifican los nuevos
         
         Returns:
             DataFrame con datos procesados del radar
@@ -116,19 +126,10 @@ class IDEAMRadarVisualizer:
         
         logger.info(f"📂 Archivos encontrados: {len(archivos_raw)}")
         
-        # Procesar archivos y crear DataFrame
-        datos = []
-        
-        for i, archivo in enumerate(archivos_raw):
-            if i % 50 == 0 and i > 0:
-                logger.info(f"  Procesados {i}/{len(archivos_raw)} archivos...")
-            
-            try:
-                info = self._extraer_info_archivo(archivo, radar_name)
-                datos.append(info)
-                
-            except Exception as e:
-                logger.warning(f"⚠️  Error procesando {archivo.name}: {e}")
+        # Solo se decodifican los volúmenes que no están en la caché
+        cache = CargadorVolumenesRadar.abrir_cache(self.data_dir) if usar_cache else None
+        datos = CargadorVolumenesRadar.cargar(archivos_raw, radar_name, estadisticas, paralelo,
+                                              max_workers, tamaño_lote, cache)
         
         if datos:
             self.df_radar = pd.DataFrame(datos)
@@ -139,76 +140,26 @@ class IDEAMRadarVisualizer:
         logger.warning("❌ No se pudieron cargar datos")
         return None
     
-    def _extraer_info_archivo(self, archivo, radar_name):
+    @staticmethod
+    def _extraer_info_archivo(archivo, radar_name, estadisticas=True):
         """Extrae información completa del archivo de radar"""
-        info = {
-            'radar': radar_name,
-            'archivo': archivo.name,
-            'ruta': str(archivo),
-            'tamaño_bytes': archivo.stat().st_size,
-            'tamaño_mb': archivo.stat().st_size / (1024 * 1024)
-        }
-        
-        # Extraer timestamp del nombre (formato: BARYYMMDDHHMMSSsss)
-        timestamp = self._extraer_timestamp_ideam(archivo.name)
-        info['timestamp'] = timestamp
-        
-        if timestamp:
-            info['fecha'] = timestamp.date()
-            info['hora'] = timestamp.hour
-            info['minuto'] = timestamp.minute
-            info['segundo'] = timestamp.second
-        
-        # Extraer prefijo de radar
-        prefijo_match = re.match(r'^([A-Z]{3})', archivo.name)
-        if prefijo_match:
-            info['prefijo'] = prefijo_match.group(1)
-        
-        # Si PyART está disponible, intentar extraer datos meteorológicos
-        if PYART_AVAILABLE:
-            try:
-                radar_data = pyart.io.read(str(archivo))
-                info['campos_disponibles'] = list(radar_data.fields.keys())
-                info['num_sweeps'] = radar_data.nsweeps
-                
-                # Extraer estadísticas de reflectividad si está disponible
-                field_name = None
-                for possible_name in ['reflectivity', 'DBZH', 'DBZ', 'REF']:
-                    if possible_name in radar_data.fields:
-                        field_name = possible_name
-                        break
-                
-                if field_name:
-                    reflectividad = radar_data.fields[field_name]['data']
-                    info['reflectividad_max'] = float(np.ma.max(reflectividad))
-                    info['reflectividad_mean'] = float(np.ma.mean(reflectividad))
-                    info['reflectividad_std'] = float(np.ma.std(reflectividad))
-                    info['cobertura_pct'] = (np.ma.count(reflectividad) / reflectividad.size) * 100
-                    
-            except Exception as e:
-                logger.debug(f"No se pudo leer con PyART: {e}")
-        
-        return info
+        return {**CargadorVolumenesRadar.info_basica(archivo, radar_name),
+                **CargadorVolumenesRadar.info_volumen(archivo, estadisticas)}
     
-    def _extraer_timestamp_ideam(self, filename):
+    @staticmethod
+    def _extraer_timestamp_ideam(filename):
         """Extrae timestamp del formato IDEAM (BARYYMMDDHHMMSSsss)"""
-        try:
-            # Formato: BAR251209000005 -> BAR + YYMMDD + HHMMSS
-            match = re.search(r'([A-Z]{3})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})(\d{2})', filename)
-            if match:
-                prefijo, yy, mm, dd, hh, mi, ss = match.groups()
-                year = 2000 + int(yy)
-                return datetime(year, int(mm), int(dd), int(hh), int(mi), int(ss))
-        except Exception as e:
-            logger.debug(f"Error extrayendo timestamp: {e}")
-        
-        return None
+        return CargadorVolumenesRadar.extraer_timestamp_ideam(filename)
     
     def _enriquecer_dataframe(self):
         """Agrega columnas calculadas al DataFrame"""
         if self.df_radar is None:
             return
         
+        # Los volúmenes que vienen de la caché traen el inicio como texto
+        if 'inicio_volumen' in self.df_radar.columns:
+            self.df_radar['inicio_volumen'] = pd.to_datetime(self.df_radar['inicio_volumen'], errors='coerce').astype('datetime64[ns]')
+        
         # Ordenar por timestamp
         if 'timestamp' in self.df_radar.columns:
             self.df_radar = self.df_radar.sort_values('timestamp').reset_index(drop=True)
@@ -78,6 +78,37 @@ class OpenMeteoVisualizer:
         
         return self.df_hourly, self.df_daily
     
+    def cargar_desde_almacen(self, almacen_dir="data/parquet", ciudades=None,
+                             inicio=None, fin=None):
+        """
+        Carga datos horarios de Open-Meteo desde el almacén Parquet
+        
+        Solo lee la partición de Open-Meteo, las ciudades y fechas pedidas y
+        las columnas que usan las gráficas (no carga datos diarios).
+        """
+        from src.data_loaders.parquet_store import ParquetStore
+        
+        df = ParquetStore(almacen_dir).read(
+            columns=['timestamp', 'location', 'temperature_C', 'humidity_percent', 'windspeed_ms'],
+            providers=['openmeteo'], locations=ciudades, start=inicio, end=fin
+        )
+        
+        if df.empty:
+            print(f"⚠️ No hay datos de Open-Meteo en {almacen_dir}")
+            return None
+        
+        self.df_hourly = df.rename(columns={
+            'timestamp': 'time',
+            'location': 'ciudad',
+            'temperature_C': 'temperatura',
+            'humidity_percent': 'humedad',
+            'windspeed_ms': 'wind_speed_10m'
+        })
+        self.df_hourly['ciudad'] = self.df_hourly['ciudad'].astype(str)
+        self._procesar_hourly()
+        print(f"✅ Datos horarios (Parquet): {len(self.df_hourly)} registros")
+        return self.df_hourly
+    
     def _procesar_hourly(self):
         """Procesa datos horarios"""
         if self.df_hourly is None:
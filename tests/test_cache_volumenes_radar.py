@@ -0,0 +1,100 @@
+"""
+Pruebas de la caché persistente de volúmenes de radar
+"""
+
+from pathlib import Path
+import os
+import sqlite3
+import sys
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.data_sources import ideam_inventario
+from src.data_sources.ideam_inventario import CacheVolumenesRadar
+from src.processors.volumenes_radar import CargadorVolumenesRadar
+from src.visualizers.ideam_visualizer import IDEAMRadarVisualizer
+from test_iris_raw import escribir_raw, datos_prueba
+
+
+def _crear_volumenes(base, n=3):
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    carpeta = base / "Barrancabermeja" / "2024-12-11"
+    carpeta.mkdir(parents=True)
+    return [escribir_raw(carpeta / f"BAR2412110{i}0000.RAW", dbz2, rhohv2, dbz8) for i in range(n)]
+
+
+def test_solo_decodifica_archivos_nuevos(tmp_path, monkeypatch):
+    archivos = _crear_volumenes(tmp_path)
+    decodificados = []
+    original = CargadorVolumenesRadar.info_volumen
+
+    def contar(archivo, estadisticas=True):
+        decodificados.append(archivo.name)
+        return original(archivo, estadisticas)
+
+    monkeypatch.setattr(CargadorVolumenesRadar, 'info_volumen', staticmethod(contar))
+
+    primero = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar("Barrancabermeja")
+    assert len(decodificados) == 3
+
+    # Segunda apertura: todo sale de la caché
+    segundo = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar("Barrancabermeja")
+    assert len(decodificados) == 3
+    assert segundo['reflectividad_max'].equals(primero['reflectividad_max'])
+    assert segundo['inicio_volumen'].equals(primero['inicio_volumen'])
+    assert list(segundo['campos_disponibles'].iloc[0]) == list(primero['campos_disponibles'].iloc[0])
+
+    # Un archivo modificado y uno nuevo se vuelven a decodificar
+    os.utime(archivos[0], ns=(0, archivos[0].stat().st_mtime_ns + 10 ** 9))
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    escribir_raw(archivos[0].parent / "BAR241211090000.RAW", dbz2, rhohv2, dbz8)
+    tercero = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar("Barrancabermeja")
+    assert len(tercero) == 4
+    assert sorted(decodificados[3:]) == ["BAR241211000000.RAW", "BAR241211090000.RAW"]
+
+
+def test_entradas_sin_estadisticas_no_sirven_para_estadisticas(tmp_path):
+    archivo = _crear_volumenes(tmp_path, n=1)[0]
+    cache = CacheVolumenesRadar(tmp_path)
+
+    cache.guardar([(archivo, {'num_sweeps': 2})], estadisticas=False)
+    assert cache.consultar([archivo], estadisticas=False) == {str(archivo): {'num_sweeps': 2}}
+    assert cache.consultar([archivo], estadisticas=True) == {}
+
+    archivo.unlink()
+    assert cache.purgar() == 1
+
+
+def test_otra_version_o_ruta_relativa(tmp_path, monkeypatch):
+    archivo = _crear_volumenes(tmp_path, n=1)[0]
+    cache = CacheVolumenesRadar(tmp_path)
+    cache.guardar([(archivo, {'num_sweeps': 2})])
+
+    # La misma ruta escrita de forma relativa encuentra la entrada
+    monkeypatch.chdir(archivo.parent)
+    relativa = Path(archivo.name)
+    assert cache.consultar([relativa]) == {str(relativa): {'num_sweeps': 2}}
+
+    # Un cambio de versión invalida lo calculado antes
+    monkeypatch.setattr(ideam_inventario, 'VERSION_CACHE', ideam_inventario.VERSION_CACHE + 1)
+    assert cache.consultar([archivo]) == {}
+
+
+def test_base_sin_columna_version(tmp_path):
+    archivo = _crear_volumenes(tmp_path, n=1)[0]
+    ruta_db = tmp_path / "inventario_radares.sqlite"
+    with sqlite3.connect(ruta_db) as conn:
+        conn.execute("CREATE TABLE volumenes (ruta TEXT PRIMARY KEY, tamaño_bytes INTEGER NOT NULL, "
+                     "mtime_ns INTEGER NOT NULL, con_estadisticas INTEGER NOT NULL, datos TEXT NOT NULL)")
+        stat = archivo.stat()
+        conn.execute("INSERT INTO volumenes VALUES (?, ?, ?, 1, '{}')",
+                     (str(archivo.resolve()), stat.st_size, stat.st_mtime_ns))
+    conn.close()
+
+    cache = CacheVolumenesRadar(tmp_path)
+    assert cache.consultar([archivo]) == {}
+    cache.guardar([(archivo, {'num_sweeps': 2})])
+    assert cache.consultar([archivo]) == {str(archivo): {'num_sweeps': 2}}
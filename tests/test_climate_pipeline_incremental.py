@@ -0,0 +1,93 @@
+"""
+Pruebas de la ejecución incremental de ClimateDataPipeline
+"""
+
+from pathlib import Path
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.pipelines import ClimateDataPipeline
+
+
+def escribir_consulta(directorio, ciudad, inicio, temperaturas, sufijo):
+    datos = {
+        "location": ciudad,
+        "openmeteo": {
+            "hourly": {
+                "time": [str(t) for t in pd.date_range(inicio, periods=len(temperaturas), freq="h")],
+                "temperature_2m": temperaturas,
+            }
+        }
+    }
+    ruta = directorio / f"consulta_completa_{ciudad}_{sufijo}.json"
+    ruta.write_text(json.dumps(datos))
+    return ruta
+
+
+def test_solo_procesa_lo_nuevo_con_contexto(tmp_path):
+    escribir_consulta(tmp_path, "Medellin", "2024-01-01 00:00", [10.0, 11.0, 12.0], "a")
+    salida = tmp_path / "procesado"
+
+    primera = ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False)
+    assert len(primera) == 3
+
+    # Sin cambios no se procesa nada
+    assert ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False).empty
+
+    # Archivo nuevo que repite una hora ya procesada y empieza con un hueco
+    nuevo = escribir_consulta(tmp_path, "Medellin", "2024-01-01 02:00", [99.0, None, 16.0], "b")
+    os.utime(nuevo, ns=(nuevo.stat().st_atime_ns, nuevo.stat().st_mtime_ns + 10**9))
+
+    segunda = ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False)
+    assert segunda['timestamp'].tolist() == list(pd.date_range("2024-01-01 03:00", periods=2, freq="h"))
+    # 03:00 se interpola entre 12.0 (ya procesado) y 16.0
+    assert np.allclose(segunda['temperature_C'], [14.0, 16.0])
+
+    dataset = pd.read_parquet(salida / "dataset")
+    assert len(dataset) == 5
+
+    estado = json.loads((salida / "watermarks.json").read_text())
+    assert estado['watermarks'] == {"openmeteo|Medellin": "2024-01-01T04:00:00"}
+
+
+def test_archivo_con_mtime_antiguo_se_procesa(tmp_path):
+    escribir_consulta(tmp_path, "Medellin", "2024-01-01 00:00", [10.0, 11.0, 12.0], "a")
+    salida = tmp_path / "procesado"
+    assert len(ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False)) == 3
+
+    # Copiado con su mtime original, anterior al del archivo ya procesado
+    copiado = escribir_consulta(tmp_path, "Bogota", "2024-01-01 00:00", [8.0, 9.0], "b")
+    os.utime(copiado, ns=(0, 10**18))
+
+    segunda = ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False)
+    assert segunda['location'].tolist() == ["Bogota", "Bogota"]
+    assert ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False).empty
+
+
+def test_caida_antes_de_guardar_estado_no_duplica(tmp_path, monkeypatch):
+    escribir_consulta(tmp_path, "Medellin", "2024-01-01 00:00", [10.0, 11.0, 12.0], "a")
+    salida = tmp_path / "procesado"
+
+    def caida(*args, **kwargs):
+        raise KeyboardInterrupt("proceso interrumpido")
+
+    # Las filas llegan al dataset pero ni el estado ni el manifiesto se actualizan
+    with monkeypatch.context() as m:
+        m.setattr(ClimateDataPipeline, "_save_state", staticmethod(caida))
+        with pytest.raises(KeyboardInterrupt):
+            ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False)
+    assert len(pd.read_parquet(salida / "dataset")) == 3
+
+    assert ClimateDataPipeline(tmp_path).execute_incremental(salida, validate=False).empty
+    assert len(pd.read_parquet(salida / "dataset")) == 3
+    estado = json.loads((salida / "watermarks.json").read_text())
+    assert estado['watermarks'] == {"openmeteo|Medellin": "2024-01-01T02:00:00"}
@@ -0,0 +1,83 @@
+"""
+Pruebas del modo por lotes de ClimateDataPipeline
+"""
+
+from pathlib import Path
+import json
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.pipelines import ClimateDataPipeline
+
+
+def escribir_consultas(directorio, horas=48):
+    for i, ciudad in enumerate(["Medellin", "Bogota", "Cali"]):
+        datos = {
+            "location": ciudad,
+            "openmeteo": {
+                "hourly": {
+                    "time": [str(t) for t in pd.date_range("2024-01-01", periods=horas, freq="h")],
+                    "temperature_2m": [float(i * 10 + h % 7) for h in range(horas)],
+                    "relative_humidity_2m": [80.0] * horas,
+                }
+            }
+        }
+        (directorio / f"consulta_completa_{ciudad}_20240101_000000.json").write_text(json.dumps(datos))
+
+    # Repetición de Cali en otro archivo: sus filas son duplicadas
+    (directorio / "consulta_completa_Cali_20240102_000000.json").write_text(
+        (directorio / "consulta_completa_Cali_20240101_000000.json").read_text()
+    )
+
+
+def test_lotes_deduplican_entre_lotes(tmp_path):
+    escribir_consultas(tmp_path)
+    pipeline = ClimateDataPipeline(tmp_path)
+
+    salida = pipeline.execute_streaming(tmp_path / "salida", batch_rows=40)
+    df = pd.read_parquet(salida)
+
+    assert len(list(salida.glob("part-*.parquet"))) > 1
+    assert len(df) == 3 * 48
+    assert not df.duplicated(subset=['timestamp', 'location']).any()
+
+
+def test_resampleo_por_intervalos_igual_a_execute(tmp_path):
+    escribir_consultas(tmp_path)
+    pipeline = ClimateDataPipeline(tmp_path)
+
+    esperado = pipeline.execute(resample_freq='D')
+    salida = pipeline.execute_streaming(tmp_path / "salida", resample_freq='D', batch_rows=40)
+    obtenido = pd.read_parquet(salida)
+
+    assert len(obtenido) == len(esperado)
+    assert np.allclose(obtenido['temperature_C'], esperado['temperature_C'])
+
+
+def test_deduplicacion_con_muchos_lotes_pequenos(tmp_path):
+    """Lotes de pocas filas: cada clave se conserva una sola vez en todo el recorrido"""
+    escribir_consultas(tmp_path, horas=200)
+    salida = ClimateDataPipeline(tmp_path).execute_streaming(tmp_path / "salida", batch_rows=7)
+    df = pd.read_parquet(salida)
+
+    assert len(df) == 3 * 200
+    assert not df.duplicated(subset=['timestamp', 'location']).any()
+
+
+def test_deduplicate_batch_actualiza_vistos():
+    vistos = set()
+    claves = pd.DataFrame({"timestamp": pd.date_range("2024-01-01", periods=4, freq="h").repeat(2),
+                           "location": ["A", "B"] * 4})
+    total = 0
+    for inicio in range(0, len(claves), 3):
+        lote = pd.concat([claves.iloc[inicio:inicio + 3], claves.iloc[:1]])
+        sin_duplicados, _ = ClimateDataPipeline._deduplicate_batch(lote, ["timestamp", "location"], vistos)
+        total += len(sin_duplicados)
+
+    assert total == len(vistos) == 8
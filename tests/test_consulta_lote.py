@@ -0,0 +1,113 @@
+"""
+Pruebas de la consulta por lotes de ClimAPIManager con clientes simulados
+"""
+
+from pathlib import Path
+import sys
+import threading
+import time
+
+import pandas as pd
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from main import ClimAPIManager
+
+
+class OpenMeteoFalso:
+    """Responde pronósticos horarios fijos y registra la concurrencia máxima"""
+
+    def __init__(self):
+        self.llamadas = []
+        self.activas = 0
+        self.max_activas = 0
+        self._lock = threading.Lock()
+
+    def get_forecast_batch(self, locations, days=7, save_data=True):
+        assert save_data is False
+        with self._lock:
+            self.llamadas.append([(loc["lat"], loc["lon"]) for loc in locations])
+            self.activas += 1
+            self.max_activas = max(self.max_activas, self.activas)
+        time.sleep(0.05)
+        with self._lock:
+            self.activas -= 1
+
+        fechas = pd.date_range("2024-01-10", periods=3, freq="h", tz="UTC")
+        hourly = pd.concat([
+            pd.DataFrame({"location": loc["name"], "date": fechas,
+                          "temperature_2m": [20.0, 21.0, 22.0]})
+            for loc in locations
+        ], ignore_index=True)
+        return {"hourly": hourly}
+
+
+@pytest.fixture
+def manager(tmp_path):
+    manager = ClimAPIManager.__new__(ClimAPIManager)
+    manager.data_dir = tmp_path
+    manager.meteoblue = manager.openweather = manager.meteosource = None
+    manager.openmeteo = OpenMeteoFalso()
+    manager.LOTE_OPENMETEO = 2
+    manager.almacen = None
+    return manager
+
+
+def test_consulta_lote_agrupa_coordenadas(manager, tmp_path):
+    """Las coordenadas repetidas se consultan una vez y se respeta la concurrencia"""
+    csv = tmp_path / "ubicaciones.csv"
+    filas = [f"Municipio{i},{4 + i / 10},-75.5" for i in range(8)]
+    filas.append("Alias,4.0,-75.5")
+    csv.write_text("nombre,lat,lon\n" + "\n".join(filas) + "\n")
+
+    salida = tmp_path / "lote.parquet"
+    resultado = manager.consulta_lote(csv, concurrencia={"openmeteo": 2}, salida=salida)
+
+    coordenadas = [c for llamada in manager.openmeteo.llamadas for c in llamada]
+    assert len(manager.openmeteo.llamadas) == 4
+    assert len(coordenadas) == len(set(coordenadas)) == 8
+    assert manager.openmeteo.max_activas == 2
+    assert len(resultado) == 9 * 3
+    assert set(resultado.loc[resultado["location"] == "Alias", "temperature_C"]) == {20.0, 21.0, 22.0}
+
+    guardado = pd.read_parquet(salida)
+    assert list(guardado.columns[:5]) == ["timestamp", "source", "location", "lat", "lon"]
+    assert guardado["timestamp"].dt.tz is None
+
+
+def _proveedores_simulados(manager, demora_meteoblue):
+    """Proveedores que responden al instante salvo Meteoblue, que tarda `demora_meteoblue`"""
+    def lento(*args, **kwargs):
+        time.sleep(demora_meteoblue)
+        return {"proveedor": "meteoblue"}
+
+    manager.archivar_json = False
+    manager.consultar_meteoblue = lento
+    manager.consultar_openmeteo = lambda *args, **kwargs: {"proveedor": "openmeteo"}
+    manager.consultar_openweather = lambda *args, **kwargs: {"proveedor": "openweather"}
+    manager.consultar_meteosource = lambda *args, **kwargs: {"proveedor": "meteosource"}
+
+
+def test_consulta_paralela_no_espera_al_proveedor_lento(manager):
+    _proveedores_simulados(manager, demora_meteoblue=2)
+
+    inicio = time.monotonic()
+    resultados = manager.consulta_completa(6.25, -75.56, "Medellin", paralelo=True,
+                                           timeouts={"meteoblue": 0.2})
+    assert time.monotonic() - inicio < 1.5
+
+    assert resultados["meteoblue"] is None
+    assert resultados["sin_respuesta"] == ["meteoblue"]
+    for proveedor in ("openmeteo", "openweather", "meteosource"):
+        assert resultados[proveedor] == {"proveedor": proveedor}
+
+
+def test_consulta_secuencial_sin_clave_sin_respuesta(manager):
+    _proveedores_simulados(manager, demora_meteoblue=0)
+
+    resultados = manager.consulta_completa(6.25, -75.56, "Medellin")
+    assert "sin_respuesta" not in resultados
+    assert resultados["meteoblue"] == {"proveedor": "meteoblue"}
@@ -0,0 +1,86 @@
+"""
+Pruebas de la validación vectorizada de DataValidator
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.validators import DataValidator
+
+
+def datos_prueba():
+    return pd.DataFrame({
+        'temperature_C': [15, 20, -100, 30, np.nan],
+        'humidity_percent': [60, 120, 80, 90, 70],
+        'estacion': ['a', 'b', 'c', 'd', 'e'],
+    })
+
+
+def test_equivale_a_validate_range_encadenado():
+    df = datos_prueba()
+
+    esperado = df
+    for col in ['temperature_C', 'humidity_percent']:
+        esperado, _ = DataValidator.validate_range(esperado, col, *DataValidator.VALID_RANGES[col])
+
+    validado, reportes = DataValidator.validate_all(df)
+    pd.testing.assert_frame_equal(validado, esperado)
+    assert reportes['temperature_C']['outliers_count'] == 2
+    assert reportes['humidity_percent']['outliers_count'] == 1
+
+
+def test_marcas_sin_eliminar_filas():
+    df = datos_prueba()
+
+    marcado, _ = DataValidator.validate_all(df, remove_outliers=False, flag_column='flags')
+    bit_temp = DataValidator.FLAG_BITS['temperature_C']
+    bit_hum = DataValidator.FLAG_BITS['humidity_percent']
+
+    assert len(marcado) == len(df)
+    assert marcado['flags'].tolist() == [0, bit_hum, bit_temp, 0, bit_temp]
+    assert 'flags' not in df.columns
+
+
+def serie_dos_ciudades():
+    horas = pd.to_datetime(['2024-01-01 00:00', '2024-01-01 01:00', '2024-01-01 03:00',
+                            '2024-01-01 04:00', '2024-01-01 10:00'])
+    return pd.DataFrame({
+        'timestamp': list(horas) * 2,
+        'location': ['Medellin'] * 5 + ['Bogota'] * 5,
+        'temperature_C': [10.0, np.nan, 13.0, np.nan, 20.0,
+                          np.nan, 100.0, np.nan, 200.0, np.nan],
+    })
+
+
+def test_interpolacion_por_grupo_y_tiempo():
+    df = serie_dos_ciudades()
+    # Desordenar para comprobar que se ordena por grupo y tiempo
+    df = df.sample(frac=1, random_state=0)
+
+    lleno = DataValidator.fill_missing(df, method='linear', max_gap='4h')
+    temps = lleno.sort_index()['temperature_C'].tolist()
+
+    # 01:00 está a 1/3 entre 00:00 y 03:00; el hueco 04:00 está entre 03:00 y 10:00 (> 4 h)
+    assert np.allclose(temps[:3], [10.0, 11.0, 13.0]) and temps[4] == 20.0
+    assert np.isnan(temps[3])
+    # Bogotá no toma valores de Medellín: los extremos quedan nulos
+    assert np.isnan(temps[5]) and np.isnan(temps[9])
+    assert temps[7] == 100.0 + 100.0 * (2 / 3)
+
+
+def test_relleno_hacia_adelante_por_grupo():
+    df = serie_dos_ciudades()
+
+    lleno = DataValidator.fill_missing(df, method='forward')
+    assert lleno['temperature_C'].tolist() == [10.0, 10.0, 13.0, 13.0, 20.0,
+                                               100.0, 100.0, 100.0, 200.0, 200.0]
+
+    medias = DataValidator.fill_missing(df, method='mean')
+    assert medias['temperature_C'].tolist()[5] == 150.0
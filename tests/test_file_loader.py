@@ -0,0 +1,66 @@
+"""
+Pruebas de la lectura rápida de CSV/TXT en FileLoader
+"""
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_loaders.file_loader import FileLoader
+
+
+def escribir_csv(ruta, sep=',', filas=100):
+    df = pd.DataFrame({
+        'fecha': pd.date_range('2024-01-01', periods=filas, freq='h').strftime('%Y-%m-%d %H:%M'),
+        'estacion': ['EST1'] * filas,
+        'temperatura': [20.0 + i % 5 for i in range(filas)],
+        'humedad': list(range(filas)),
+    })
+    df.to_csv(ruta, sep=sep, index=False)
+    return df
+
+
+def test_detecta_delimitador_y_columnas(tmp_path):
+    ruta = tmp_path / "siata.txt"
+    escribir_csv(ruta, sep=';')
+
+    assert FileLoader.sniff_delimiter(ruta) == ';'
+
+    df = FileLoader.load_file(ruta, usecols=['estacion', 'temperatura'], dtype={'temperatura': 'float32'})
+    assert list(df.columns) == ['estacion', 'temperatura']
+    assert df['temperatura'].dtype == 'float32'
+    assert len(df) == 100
+
+
+def test_lectura_por_bloques(tmp_path):
+    ruta = tmp_path / "grande.csv"
+    original = escribir_csv(ruta, sep='\t', filas=250)
+
+    bloques = list(FileLoader.iter_file(ruta, chunksize=100, usecols=['humedad']))
+    assert [len(b) for b in bloques] == [100, 100, 50]
+    assert pd.concat(bloques)['humedad'].tolist() == original['humedad'].tolist()
+
+
+def test_directorio_en_paralelo(tmp_path):
+    for i in range(5):
+        escribir_csv(tmp_path / f"archivo_{i}.csv", filas=10 + i)
+
+    resultado = FileLoader.load_directory(tmp_path, "*.csv", max_workers=3)
+    assert {nombre: len(df) for nombre, df in resultado.items()} == {f"archivo_{i}": 10 + i for i in range(5)}
+
+
+def test_estandarizacion_memoizada_y_por_fuente():
+    df = pd.DataFrame(columns=['timestamp', 'Temp_Max', 'Temp_Min', 'HR', 'codigo'])
+
+    FileLoader.register_mapping('prueba', {'hr': 'humidity_percent'})
+    resultado = FileLoader.standardize_columns(df, source='prueba')
+
+    assert list(resultado.columns) == ['timestamp', 'temperature_C', 'Temp_Min', 'humidity_percent', 'codigo']
+    assert FileLoader.unmapped_columns(df, source='prueba') == ['Temp_Min', 'codigo']
+    assert ('prueba', tuple(df.columns)) in FileLoader._mapping_cache
+    assert FileLoader.unmapped_columns(df) == ['Temp_Min', 'HR', 'codigo']
@@ -0,0 +1,56 @@
+"""
+Pruebas del transporte HTTP compartido con una sesión simulada
+"""
+
+from pathlib import Path
+import sys
+import time
+
+import requests
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_sources.http_transport import TokenBucket, TransporteHTTP
+
+
+class SesionFalsa(requests.Session):
+    """Devuelve los códigos de estado indicados en orden"""
+
+    def __init__(self, estados):
+        super().__init__()
+        self.estados = list(estados)
+        self.llamadas = []
+
+    def get(self, url, **kwargs):
+        self.llamadas.append(kwargs)
+        response = requests.Response()
+        response.status_code = self.estados.pop(0)
+        response.headers["Retry-After"] = "0"
+        return response
+
+
+def test_reintenta_errores_transitorios():
+    """429/5xx se reintentan, los 4xx definitivos no, y todo queda en las métricas"""
+    sesion = SesionFalsa([503, 429, 200, 404])
+    http = TransporteHTTP("prueba", reintentos=3, backoff=0, timeout=7, session=sesion)
+
+    assert http.get("https://ejemplo").status_code == 200
+    assert http.get("https://ejemplo").status_code == 404
+    assert all(llamada["timeout"] == 7 for llamada in sesion.llamadas)
+
+    metricas = http.metricas()
+    assert metricas["peticiones"] == 4
+    assert metricas["reintentos"] == 2
+    assert metricas["errores"] == 3
+    assert "latencia_p95_ms" in metricas
+
+
+def test_token_bucket_limita_la_tasa():
+    bucket = TokenBucket(tasa=20, capacidad=2)
+    inicio = time.monotonic()
+    for _ in range(6):
+        bucket.adquirir()
+    # 2 tokens de ráfaga + 4 a 20/s ≈ 0.2 s
+    assert time.monotonic() - inicio >= 0.18
@@ -0,0 +1,59 @@
+"""
+Pruebas del índice local de listados S3 de radares IDEAM
+"""
+
+from pathlib import Path
+from datetime import datetime, timedelta
+import sqlite3
+import sys
+import time
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_sources.ideam_indice_s3 import IndiceListadoS3
+
+
+def _archivo(key):
+    return {'key': key, 'size': 1000, 'last_modified': None}
+
+
+def _fechar_listado(indice, radar, fecha, actualizado):
+    with sqlite3.connect(indice.ruta_db) as conn:
+        conn.execute("UPDATE listados SET actualizado = ? WHERE radar = ? AND dia = ?",
+                     (actualizado.timestamp(), radar, indice._dia(fecha)))
+    conn.close()
+
+
+def test_listado_parcial_de_dia_antiguo_expira(tmp_path):
+    indice = IndiceListadoS3(tmp_path / "indice.sqlite", ttl=3600, dias_inmutables=2)
+    dia = datetime(2024, 1, 10)
+    indice.guardar("Barrancabermeja", dia, [_archivo("l2_data/2024/01/10/Barrancabermeja/BAR240110000000.RAW")])
+
+    # Listado tomado mientras el día aún se publicaba: caduca aunque el día sea antiguo
+    _fechar_listado(indice, "Barrancabermeja", dia, dia + timedelta(hours=12))
+    assert indice.obtener("Barrancabermeja", dia) is None
+
+    # Listado tomado después del cierre del día: no expira
+    _fechar_listado(indice, "Barrancabermeja", dia, dia + timedelta(days=3, hours=1))
+    assert len(indice.obtener("Barrancabermeja", dia)) == 1
+
+
+def test_ultimo_dia_con_datos(tmp_path):
+    indice = IndiceListadoS3(tmp_path / "indice.sqlite", ttl=3600)
+    hoy = datetime.now()
+    ayer = hoy - timedelta(days=1)
+    antiguo = hoy - timedelta(days=30)
+
+    indice.guardar("Barrancabermeja", hoy, [])
+    indice.guardar("Barrancabermeja", antiguo, [_archivo("antiguo.RAW")])
+    assert indice.ultimo_dia_con_datos(hoy - timedelta(days=2)) is None
+
+    indice.guardar("Barrancabermeja", ayer, [_archivo("a.RAW"), _archivo("b.RAW")])
+    dia, n_archivos, _ = indice.ultimo_dia_con_datos(hoy - timedelta(days=2))
+    assert (dia, n_archivos) == (indice._dia(ayer), 2)
+
+    # Un listado vencido no cuenta como evidencia de datos recientes
+    _fechar_listado(indice, "Barrancabermeja", ayer, datetime.fromtimestamp(time.time() - 7200))
+    assert indice.ultimo_dia_con_datos(hoy - timedelta(days=2)) is None
@@ -0,0 +1,157 @@
+"""
+Pruebas del descargador de radares IDEAM contra un S3 local (moto)
+"""
+
+from pathlib import Path
+from datetime import datetime
+import sys
+
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+boto3 = pytest.importorskip("boto3")
+moto = pytest.importorskip("moto")
+
+from src.data_sources.ideam_radar_downloader import IDEAMRadarDownloader
+
+BUCKET = "s3-radaresideam-test"
+FECHAS = [datetime(2024, 1, 10), datetime(2024, 1, 11)]
+
+
+@pytest.fixture
+def s3(monkeypatch):
+    """Bucket simulado con volúmenes de Barrancabermeja para dos días"""
+    monkeypatch.setenv("AWS_ACCESS_KEY_ID", "testing")
+    monkeypatch.setenv("AWS_SECRET_ACCESS_KEY", "testing")
+
+    with moto.mock_aws():
+        cliente = boto3.client("s3", region_name="us-east-1")
+        cliente.create_bucket(Bucket=BUCKET)
+
+        for fecha in FECHAS:
+            for minuto in range(0, 30, 5):
+                key = (f"l2_data/{fecha:%Y/%m/%d}/Barrancabermeja/"
+                       f"BAR{fecha:%y%m%d}00{minuto:02d}00.RAW")
+                cliente.put_object(Bucket=BUCKET, Key=key, Body=b"x" * (1000 + minuto))
+
+        yield cliente
+
+
+def test_descarga_paralela(s3, tmp_path):
+    """La descarga paralela respeta el esquema radar/YYYYMMDD/ y el orden"""
+    downloader = IDEAMRadarDownloader(base_dir=tmp_path, max_workers=4,
+                                      s3_client=s3, bucket_name=BUCKET)
+
+    archivos = downloader.descargar_rango_fechas(
+        "Barrancabermeja", FECHAS[0], FECHAS[-1], paralelo=True
+    )
+
+    assert len(archivos) == 12
+    assert [a['archivo'] for a in archivos] == sorted(a['archivo'] for a in archivos)
+
+    for archivo in archivos:
+        ruta = Path(archivo['ruta_local'])
+        assert ruta.parent == tmp_path / "Barrancabermeja" / archivo['fecha'].strftime("%Y%m%d")
+        assert ruta.stat().st_size == round(archivo['tamaño_mb'] * 1024 * 1024)
+
+
+def test_descarga_paralela_omite_existentes(s3, tmp_path):
+    """Los archivos completos no se vuelven a descargar y los truncados sí"""
+    downloader = IDEAMRadarDownloader(base_dir=tmp_path, max_workers=4,
+                                      s3_client=s3, bucket_name=BUCKET)
+
+    primera = downloader.descargar_rango_fechas(
+        "Barrancabermeja", FECHAS[0], FECHAS[0], paralelo=True, max_archivos=3
+    )
+    assert len(primera) == 3
+
+    completo = Path(primera[0]['ruta_local'])
+    mtime = completo.stat().st_mtime_ns
+
+    truncado = Path(primera[1]['ruta_local'])
+    tamaño = truncado.stat().st_size
+    truncado.write_bytes(b"x" * 10)
+
+    segunda = downloader.descargar_rango_fechas(
+        "Barrancabermeja", FECHAS[0], FECHAS[0], paralelo=True, max_archivos=3
+    )
+    assert len(segunda) == 3
+    assert completo.stat().st_mtime_ns == mtime
+    assert truncado.stat().st_size == tamaño
+
+
+def test_reanuda_descarga_interrumpida(s3, tmp_path, monkeypatch):
+    """Un .part de una descarga interrumpida se completa con un GET por rango"""
+    key = "l2_data/2024/01/10/Barrancabermeja/BAR240110120000.RAW"
+    contenido = bytes(range(256)) * 40
+    s3.put_object(Bucket=BUCKET, Key=key, Body=contenido)
+
+    downloader = IDEAMRadarDownloader(base_dir=tmp_path, s3_client=s3, bucket_name=BUCKET)
+    destino = downloader._ruta_local("Barrancabermeja", key, FECHAS[0])
+    parcial = downloader._ruta_parcial(destino)
+    parcial.parent.mkdir(parents=True)
+    parcial.write_bytes(contenido[:3000])
+
+    rangos = []
+    get_object = s3.get_object
+
+    def get_object_espia(**kwargs):
+        rangos.append(kwargs.get("Range"))
+        return get_object(**kwargs)
+
+    monkeypatch.setattr(s3, "get_object", get_object_espia)
+
+    ruta = downloader.descargar_archivo("Barrancabermeja", key, FECHAS[0],
+                                        tamaño_esperado=len(contenido))
+
+    assert ruta == destino
+    assert ruta.read_bytes() == contenido
+    assert rangos == ["bytes=3000-"]
+    assert not parcial.exists()
+
+
+def test_listado_paginado_e_indexado(s3, tmp_path, monkeypatch):
+    """El listado sigue la paginación y las consultas repetidas usan el índice"""
+    for segundo in range(40):
+        key = f"l2_data/2024/01/10/Barrancabermeja/BAR2401101000{segundo:02d}.RAW"
+        s3.put_object(Bucket=BUCKET, Key=key, Body=b"y")
+
+    downloader = IDEAMRadarDownloader(base_dir=tmp_path, s3_client=s3, bucket_name=BUCKET)
+    paginar = s3.get_paginator("list_objects_v2").paginate
+    llamadas = []
+
+    class Paginador:
+        """Fuerza páginas de 10 objetos y cuenta los listados contra S3"""
+        def paginate(self, **kwargs):
+            llamadas.append(kwargs)
+            return paginar(PaginationConfig={"PageSize": 10}, **kwargs)
+
+    monkeypatch.setattr(s3, "get_paginator", lambda nombre: Paginador())
+
+    archivos = downloader.listar_archivos_disponibles("Barrancabermeja", FECHAS[0])
+    assert len(archivos) == 46
+
+    assert downloader.verificar_disponibilidad("Barrancabermeja", FECHAS[0])
+    assert len(downloader.listar_archivos_disponibles("Barrancabermeja", FECHAS[0], limite=5)) == 5
+    assert len(llamadas) == 1
+
+
+def test_inventario_incremental(s3, tmp_path):
+    """Las descargas quedan inventariadas y solo se revisan los días modificados"""
+    downloader = IDEAMRadarDownloader(base_dir=tmp_path, max_workers=4,
+                                      s3_client=s3, bucket_name=BUCKET)
+    downloader.descargar_rango_fechas("Barrancabermeja", FECHAS[0], FECHAS[-1], paralelo=True)
+
+    assert len(downloader.inventario.consultar("Barrancabermeja")) == 12
+    assert downloader.inventario.reconciliar() == 2
+    assert downloader.inventario.reconciliar() == 0
+
+    (tmp_path / "Barrancabermeja" / "20240111" / "BAR240111120000.RAW").write_bytes(b"z")
+    assert downloader.inventario.reconciliar() == 1
+
+    inventario = downloader.generar_inventario("Barrancabermeja")
+    assert len(inventario) == 13
+    assert set(inventario['fecha_directorio']) == {"20240110", "20240111"}
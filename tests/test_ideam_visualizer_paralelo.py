@@ -0,0 +1,68 @@
+"""
+Pruebas de la carga paralela (pool de procesos) de IDEAMRadarVisualizer
+"""
+
+from pathlib import Path
+import multiprocessing
+import os
+import sys
+
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+sys.path.insert(0, str(Path(__file__).parent))
+
+from src.processors.volumenes_radar import CargadorVolumenesRadar
+from src.visualizers.ideam_visualizer import IDEAMRadarVisualizer
+from test_iris_raw import escribir_raw, datos_prueba
+
+
+def _crear_volumenes(base, n=6):
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    carpeta = base / "Barrancabermeja" / "2024-12-11"
+    carpeta.mkdir(parents=True)
+    for i in range(n):
+        escribir_raw(carpeta / f"BAR2412110{i}0000.RAW", dbz2, rhohv2, dbz8)
+    # Archivo corrupto: no debe tumbar la carga
+    (carpeta / "BAR241211090000.RAW").write_bytes(b'\x00' * 64)
+
+
+def test_paralelo_igual_a_serial(tmp_path):
+    _crear_volumenes(tmp_path)
+
+    serial = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar("Barrancabermeja", usar_cache=False)
+    paralelo = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar(
+        "Barrancabermeja", paralelo=True, max_workers=2, tamaño_lote=2, usar_cache=False)
+
+    assert len(paralelo) == len(serial) == 7
+    assert list(paralelo['archivo']) == list(serial['archivo'])
+    assert paralelo['reflectividad_max'].equals(serial['reflectividad_max'])
+    assert paralelo['num_sweeps'].dropna().eq(2).all()
+
+
+@pytest.mark.skipif(multiprocessing.get_start_method() != 'fork',
+                    reason="el parche del decodificador solo llega a los workers con fork")
+def test_proceso_que_muere_no_degrada_a_serial(tmp_path, monkeypatch):
+    """Un volumen que mata al worker se omite; el resto se reintenta en pools nuevos"""
+    _crear_volumenes(tmp_path)
+    original = CargadorVolumenesRadar.info_volumen
+    padre = os.getpid()
+    en_padre = []
+
+    def decodificar(archivo, estadisticas=True):
+        if os.getpid() == padre:
+            en_padre.append(archivo.name)
+        if archivo.name == "BAR241211020000.RAW":
+            os._exit(1)   # simula un fallo nativo o el OOM killer
+        return original(archivo, estadisticas)
+
+    monkeypatch.setattr(CargadorVolumenesRadar, 'info_volumen', staticmethod(decodificar))
+
+    df = IDEAMRadarVisualizer(tmp_path).cargar_datos_radar(
+        "Barrancabermeja", paralelo=True, max_workers=2, tamaño_lote=3, usar_cache=False)
+
+    assert en_padre == []
+    assert len(df) == 6
+    assert "BAR241211020000.RAW" not in set(df['archivo'])
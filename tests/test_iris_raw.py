@@ -0,0 +1,185 @@
+"""
+Pruebas del decodificador nativo de archivos RAW IRIS/Sigmet
+"""
+
+from pathlib import Path
+import gzip
+import struct
+import sys
+
+import numpy as np
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.processors.iris_raw import IrisRawFile, TAMAÑO_REGISTRO, leer_metadatos
+
+N_RAYOS, N_BINS = 4, 10
+DBZ2, RHOHV2, DBZ = 9, 20, 2
+
+
+def _ymds(buf, pos, año=2024, mes=12, dia=11, segundos=3600):
+    struct.pack_into('<iHhhh', buf, pos, segundos, 0, año, mes, dia)
+
+
+def _rle(palabras):
+    """Codifica un rayo: tramo de datos (bit alto) + fin de rayo"""
+    palabras = np.asarray(palabras, dtype='<u2')
+    return np.concatenate([[0x8000 | len(palabras)], palabras, [1]]).astype('<u2')
+
+
+def escribir_raw(ruta, valores_dbz2, valores_rhohv, valores_dbz8):
+    encabezados = bytearray(2 * TAMAÑO_REGISTRO)
+    struct.pack_into('<h', encabezados, 0, 27)                              # product_hdr
+    fin = 12 + 320
+    encabezados[fin:fin + 3] = b'BAR'
+    struct.pack_into('<I', encabezados, fin + 108, int(7.07 / 360 * 2 ** 32))
+    struct.pack_into('<I', encabezados, fin + 112, int((360 - 73.85) / 360 * 2 ** 32))
+    struct.pack_into('<i', encabezados, fin + 120, 1000)                    # PRF
+    struct.pack_into('<i', encabezados, fin + 148, 533)                     # λ = 5.33 cm
+    struct.pack_into('<i', encabezados, fin + 164, N_BINS)
+
+    conf = TAMAÑO_REGISTRO + 12
+    _ymds(encabezados, conf + 88)
+    task = conf + 480
+    dsp = task + 12 + 120
+    struct.pack_into('<I', encabezados, dsp + 4, (1 << DBZ2) | (1 << RHOHV2) | (1 << DBZ))
+    rango = task + 12 + 120 + 320 + 320
+    struct.pack_into('<iihhii', encabezados, rango, 100000, 100000 + 25000 * N_BINS, N_BINS, N_BINS, 25000, 25000)
+    scan = rango + 160
+    struct.pack_into('<HhhhHHH', encabezados, scan, 4, 0, 0, 2, 0, 0, int(0.5 / 360 * 65536))   # PPI, 2 barridos
+    struct.pack_into('<H', encabezados, scan + 14, int(1.5 / 360 * 65536))
+
+    # Tipos en orden de bit: DBZ (8 bits), DBZ2, RHOHV2
+    tipos = [(DBZ, 8), (DBZ2, 16), (RHOHV2, 16)]
+    idh = bytearray()
+    for tipo, bits in tipos:
+        bloque = bytearray(76)
+        struct.pack_into('<h', bloque, 0, 24)
+        _ymds(bloque, 12)
+        struct.pack_into('<hhhhhHhH', bloque, 24, 1, N_RAYOS, 0, N_RAYOS, N_RAYOS,
+                         int(0.5 / 360 * 65536), bits, tipo)
+        idh += bloque
+
+    flujo = []
+    for r in range(N_RAYOS):
+        az = int(r * 90 / 360 * 65536)
+        az_fin = int((r * 90 + 1) / 360 * 65536)
+        el = int(0.5 / 360 * 65536)
+        for datos in (np.asarray(valores_dbz8[r], dtype='u1').view('<u2'), valores_dbz2[r], valores_rhohv[r]):
+            flujo.append(_rle([az, el, az_fin, el, N_BINS, r] + list(datos)))
+    flujo = np.concatenate(flujo).tobytes()
+
+    # Registros de datos: raw_prod_bhdr (12 bytes) + contenido; el primero lleva los ingest_data_header
+    contenido = bytes(idh) + flujo
+    registros = bytearray()
+    numero = 2
+    while contenido:
+        util = TAMAÑO_REGISTRO - 12
+        bhdr = struct.pack('<hhhhhh', numero, 1, 0, 0, 0, 0)
+        registros += bhdr + contenido[:util].ljust(util, b'\x00')
+        contenido = contenido[util:]
+        numero += 1
+
+    ruta.write_bytes(bytes(encabezados) + bytes(registros))
+    return ruta
+
+
+def datos_prueba():
+    rng = np.random.default_rng(0)
+    dbz = rng.uniform(-10, 60, (N_RAYOS, N_BINS)).round(2)
+    rhohv = rng.uniform(0.8, 1.0, (N_RAYOS, N_BINS))
+    dbz2 = np.round(dbz * 100 + 32768).astype('<u2')
+    dbz2[0, 3] = 0                                   # bin sin dato
+    rhohv2 = np.round(rhohv * 65533 + 1).astype('<u2')
+    dbz8 = np.clip(np.round(dbz * 2 + 64), 1, 255).astype('u1')
+    return dbz, rhohv, dbz2, rhohv2, dbz8
+
+
+def test_decodifica_momentos_y_geometria(tmp_path):
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    ruta = escribir_raw(tmp_path / "BAR241211010000.RAW", dbz2, rhohv2, dbz8)
+
+    volumen = IrisRawFile(ruta)
+
+    assert volumen.encabezado_producto['sitio'] == 'BAR'
+    assert abs(volumen.encabezado_producto['longitud'] + 73.85) < 1e-6
+    assert set(volumen.tipos_datos) == {'DBZH', 'RHOHV'}
+    assert len(volumen.barridos) == 1
+
+    barrido = volumen.barridos[0]
+    assert barrido['rayos'] == N_RAYOS
+    assert np.allclose(barrido['azimut'], [0.5, 90.5, 180.5, 270.5], atol=0.01)
+    assert abs(barrido['angulo_fijo'] - 0.5) < 0.01
+
+    reflectividad = volumen.momento('DBZH')
+    assert np.isnan(reflectividad[0, 3])
+    assert np.allclose(np.delete(reflectividad.ravel(), 3), np.delete(dbz.ravel(), 3), atol=1e-3)
+
+    obtenido = volumen.momento('RHOHV')
+    assert obtenido.shape == (N_RAYOS, N_BINS)
+    assert np.allclose(obtenido, rhohv, atol=1e-4)
+    assert np.isclose(volumen.rangos_m()[0], 1000.0)
+
+
+def test_gzip_y_bins_sin_dato(tmp_path):
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    ruta = escribir_raw(tmp_path / "BAR241211010000.RAW", dbz2, rhohv2, dbz8)
+    comprimido = tmp_path / "BAR241211010000.RAW.gz"
+    comprimido.write_bytes(gzip.compress(ruta.read_bytes()))
+
+    volumen = IrisRawFile(comprimido, momentos=['DBZH'])
+    estadisticas = volumen.estadisticas('DBZH')
+
+    assert estadisticas['cobertura_pct'] < 100
+    assert 'RHOHV' not in volumen.barridos[0]['momentos']
+
+
+def test_metadatos_solo_encabezados(tmp_path):
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    ruta = escribir_raw(tmp_path / "BAR241211010000.RAW", dbz2, rhohv2, dbz8)
+    comprimido = tmp_path / "BAR241211010000.RAW.gz"
+    comprimido.write_bytes(gzip.compress(ruta.read_bytes()))
+
+    for archivo in (ruta, comprimido):
+        metadatos = leer_metadatos(archivo)
+        assert metadatos['sitio'] == 'BAR'
+        assert metadatos['inicio_volumen'] == np.datetime64('2024-12-11T01:00:00')
+        assert metadatos['modo_barrido'] == 'PPI'
+        assert metadatos['num_barridos'] == 2
+        assert np.allclose(metadatos['angulos_barrido'], [0.5, 1.5], atol=0.01)
+        assert set(metadatos['momentos']) == {'DBZH', 'RHOHV'}
+
+    volumen = IrisRawFile(ruta, solo_encabezados=True)
+    assert volumen.barridos == []
+    assert len(volumen._datos) == 2 * TAMAÑO_REGISTRO
+
+
+def test_rechaza_archivo_no_iris(tmp_path):
+    ruta = tmp_path / "BAR241211010000.RAW"
+    ruta.write_bytes(b'\x00' * (2 * TAMAÑO_REGISTRO))
+    with pytest.raises(ValueError):
+        leer_metadatos(ruta)
+
+
+def test_leer_archivo_raw_descomprime_una_vez(tmp_path, monkeypatch):
+    from src.processors import iris_raw
+    from src.processors.radar_raw_processor import RadarRawProcessor
+
+    dbz, rhohv, dbz2, rhohv2, dbz8 = datos_prueba()
+    ruta = escribir_raw(tmp_path / "BAR241211010000.RAW", dbz2, rhohv2, dbz8)
+    comprimido = tmp_path / "BAR241211010000.RAW.gz"
+    comprimido.write_bytes(gzip.compress(ruta.read_bytes()))
+
+    aperturas = []
+    original = iris_raw.gzip.open
+    monkeypatch.setattr(iris_raw.gzip, 'open', lambda *a, **k: aperturas.append(a[0]) or original(*a, **k))
+
+    resultado = RadarRawProcessor(tmp_path / "radar").leer_archivo_raw(comprimido)
+
+    assert len(aperturas) == 1
+    assert resultado['datos_raw'] is resultado['volumen'].datos
+    assert resultado['tamaño'] == ruta.stat().st_size
+    assert resultado['metadata']['radar'] == 'BAR'
@@ -0,0 +1,60 @@
+"""
+Pruebas de la carga paralela y por lotes de JSONDataLoader
+"""
+
+from pathlib import Path
+import json
+import sys
+
+import pandas as pd
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_loaders import json_loader
+from src.data_loaders.json_loader import JSONDataLoader
+
+
+def escribir_consultas(directorio, cantidad=12, horas=24):
+    for i in range(cantidad):
+        datos = {
+            "location": f"Ciudad{i}",
+            "openmeteo": {
+                "hourly": {
+                    "time": [f"2024-01-{10 + i // 24:02d}T{h:02d}:00" for h in range(horas)],
+                    "temperature_2m": [float(i)] * horas,
+                    "relative_humidity_2m": [80.0] * horas,
+                }
+            }
+        }
+        (directorio / f"consulta_completa_Ciudad{i}_20240110_{i:06d}.json").write_text(json.dumps(datos))
+
+
+def test_paralelo_equivale_a_secuencial(tmp_path):
+    escribir_consultas(tmp_path)
+
+    secuencial = JSONDataLoader.load_from_directory(tmp_path, "consulta_completa_*.json", max_workers=1)
+    paralelo = JSONDataLoader.load_from_directory(tmp_path, "consulta_completa_*.json", max_workers=2)
+
+    assert len(secuencial) == 12 * 24
+    pd.testing.assert_frame_equal(secuencial, paralelo)
+
+
+def test_lotes_acotados(tmp_path):
+    escribir_consultas(tmp_path)
+
+    lotes = list(JSONDataLoader.iter_from_directory(tmp_path, batch_rows=50, max_workers=1))
+    assert [len(lote) for lote in lotes] == [72] * 4
+    assert set(lotes[0]["source"]) == {"openmeteo"}
+
+
+def test_secuencial_por_defecto(tmp_path, monkeypatch):
+    """Sin max_workers no se crea ningún pool de procesos"""
+    escribir_consultas(tmp_path)
+
+    def sin_pool(*args, **kwargs):
+        raise AssertionError("no se pidió paralelismo")
+
+    monkeypatch.setattr(json_loader, "ProcessPoolExecutor", sin_pool)
+    assert len(JSONDataLoader.load_from_directory(tmp_path, "consulta_completa_*.json")) == 12 * 24
@@ -0,0 +1,60 @@
+"""
+Pruebas de la carga incremental de UnifiedDataLoader con LoadManifest
+"""
+
+from pathlib import Path
+import json
+import os
+import sys
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_loaders.unified_loader import UnifiedDataLoader
+
+
+def escribir_consulta(directorio, ciudad, temperatura=20.0, horas=6):
+    datos = {
+        "location": ciudad,
+        "openmeteo": {
+            "hourly": {
+                "time": [f"2024-01-10T{h:02d}:00" for h in range(horas)],
+                "temperature_2m": [temperatura] * horas,
+            }
+        }
+    }
+    ruta = directorio / f"consulta_completa_{ciudad}_20240110_000000.json"
+    ruta.write_text(json.dumps(datos))
+    return ruta
+
+
+def test_solo_reparsea_archivos_modificados(tmp_path):
+    escribir_consulta(tmp_path, "Medellin")
+    ruta = escribir_consulta(tmp_path, "Bogota")
+
+    loader = UnifiedDataLoader(tmp_path)
+    assert len(loader.load_all(remove_nulls=False)) == 12
+
+    manifiesto = loader.manifest
+    parsear = lambda kind: manifiesto.sync(kind, tmp_path.glob("*.json"), lambda files: [])
+    assert parsear('json') == 0
+
+    escribir_consulta(tmp_path, "Bogota", temperatura=30.0)
+    os.utime(ruta, ns=(ruta.stat().st_atime_ns, ruta.stat().st_mtime_ns + 10**9))
+
+    df = UnifiedDataLoader(tmp_path).load_location("Bogota")
+    assert len(df) == 6
+    assert (df['temperature_C'] == 30.0).all()
+
+
+def test_filtros_sin_abrir_otros_archivos(tmp_path):
+    escribir_consulta(tmp_path, "Medellin")
+    escribir_consulta(tmp_path, "Bogota")
+
+    loader = UnifiedDataLoader(tmp_path)
+    loader._sync_manifest()
+
+    entradas = loader.manifest.entries(kind='json', location="medell")
+    assert [e['location'] for e in entradas] == ["Medellin"]
+    assert UnifiedDataLoader.get_available_sources(tmp_path) == ["openmeteo"]
@@ -0,0 +1,114 @@
+"""
+Pruebas del backfill histórico por bloques de Open-Meteo con un cliente simulado
+"""
+
+from pathlib import Path
+import sys
+import threading
+
+import pandas as pd
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+pytest.importorskip("pyarrow")
+
+from src.data_sources.open_meteo_backfill import OpenMeteoBackfill
+
+
+class ClienteHistoricoFalso:
+    """Devuelve una serie horaria constante por bloque y puede fallar a propósito"""
+
+    def __init__(self, fallar=()):
+        self.bloques = []
+        self.fallar = set(fallar)
+        self._lock = threading.Lock()
+
+    def get_historical(self, lat, lon, start_date, end_date, location_name="location",
+                       hourly_vars=None, daily_vars=None, save_data=True):
+        with self._lock:
+            self.bloques.append((location_name, start_date, end_date))
+        if (location_name, start_date) in self.fallar:
+            raise TimeoutError("timeout simulado")
+
+        fechas = pd.date_range(start_date, f"{end_date} 23:00", freq="h", tz="UTC")
+        return {"hourly": pd.DataFrame({"date": fechas, "temperature_2m": lat})}
+
+
+def test_backfill_reanuda_bloques_faltantes(tmp_path):
+    """Solo se vuelven a pedir los bloques que no quedaron guardados"""
+    locations = [{"name": "Medellin", "lat": 6.2, "lon": -75.6},
+                 {"name": "Bogota", "lat": 4.7, "lon": -74.1}]
+
+    cliente = ClienteHistoricoFalso(fallar={("Bogota", "2021-01-01")})
+    backfill = OpenMeteoBackfill(cliente, output_dir=tmp_path, peticiones_por_minuto=0)
+
+    resumen = backfill.backfill(locations, "2020-06-01", "2022-02-28")
+    assert resumen["descargados"] == 5
+    assert resumen["fallidos"] == [("Bogota", "2021-01-01", "2021-12-31")]
+
+    cliente.fallar.clear()
+    cliente.bloques.clear()
+    resumen = backfill.backfill(locations, "2020-06-01", "2022-02-28")
+    assert cliente.bloques == [("Bogota", "2021-01-01", "2021-12-31")]
+    assert resumen["omitidos"] == 5
+
+    medellin = backfill.leer("Medellin")
+    horas = pd.date_range("2020-06-01", "2022-02-28 23:00", freq="h", tz="UTC")
+    assert len(medellin) == len(horas)
+    assert medellin["date"].is_monotonic_increasing
+    assert len(backfill.leer()) == 2 * len(horas)
+
+
+def test_dividir_rango_por_mes():
+    bloques = OpenMeteoBackfill.dividir_rango("2024-01-15", "2024-03-10", "month")
+    assert [(str(a), str(b)) for a, b in bloques] == [
+        ("2024-01-15", "2024-01-31"), ("2024-02-01", "2024-02-29"), ("2024-03-01", "2024-03-10")
+    ]
+
+
+def test_extender_end_date_no_duplica(tmp_path):
+    """Ejecuciones diarias con end_date creciente reemplazan el archivo del período"""
+    locations = [{"name": "Medellin", "lat": 6.2, "lon": -75.6}]
+    cliente = ClienteHistoricoFalso()
+    backfill = OpenMeteoBackfill(cliente, output_dir=tmp_path, peticiones_por_minuto=0)
+
+    backfill.backfill(locations, "2023-03-10", "2024-01-10", frecuencia="month")
+    cliente.bloques.clear()
+    backfill.backfill(locations, "2023-03-01", "2024-01-20", frecuencia="month")
+
+    # Solo se vuelven a pedir el mes que empezaba más tarde y el último, con lo ya guardado
+    assert sorted(cliente.bloques) == [("Medellin", "2023-03-01", "2023-03-31"),
+                                       ("Medellin", "2024-01-01", "2024-01-20")]
+
+    medellin = backfill.leer("Medellin")
+    assert not medellin["date"].duplicated().any()
+    horas = pd.date_range("2023-03-01", "2024-01-20 23:00", freq="h", tz="UTC")
+    assert len(medellin) == len(horas)
+    assert len(list(tmp_path.rglob("*.parquet"))) == 11
+
+
+def test_mezclar_frecuencias_no_duplica(tmp_path):
+    """Un anual absorbe los mensuales de su año y los mensuales posteriores se resuelven sobre él"""
+    locations = [{"name": "Medellin", "lat": 6.2, "lon": -75.6}]
+    cliente = ClienteHistoricoFalso()
+    backfill = OpenMeteoBackfill(cliente, output_dir=tmp_path, peticiones_por_minuto=0)
+
+    backfill.backfill(locations, "2023-01-01", "2023-03-31", frecuencia="month")
+    backfill.backfill(locations, "2023-03-10", "2023-06-30", frecuencia="year")
+    assert [r.name for r in tmp_path.rglob("*.parquet")] == ["2023.parquet"]
+    horas = pd.date_range("2023-01-01", "2023-06-30 23:00", freq="h", tz="UTC")
+    assert len(backfill.leer("Medellin")) == len(horas)
+
+    # Meses ya cubiertos por el anual se omiten; los que no, lo extienden
+    cliente.bloques.clear()
+    resumen = backfill.backfill(locations, "2023-02-01", "2023-08-31", frecuencia="month")
+    assert resumen["omitidos"] == 5
+    assert cliente.bloques == [("Medellin", "2023-01-01", "2023-08-31")]
+    assert [r.name for r in tmp_path.rglob("*.parquet")] == ["2023.parquet"]
+
+    medellin = backfill.leer("Medellin")
+    assert not medellin["date"].duplicated().any()
+    assert len(medellin) == len(pd.date_range("2023-01-01", "2023-08-31 23:00", freq="h"))
@@ -0,0 +1,96 @@
+"""
+Pruebas de las consultas multi-coordenada de OpenMeteoClient con respuestas simuladas
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+pytest.importorskip("openmeteo_requests")
+
+from src.data_sources.open_meteo import OpenMeteoClient
+
+INICIO = 1704844800  # 2024-01-10 00:00 UTC
+
+
+class Variable:
+    def __init__(self, valores):
+        self.valores = valores
+
+    def ValuesAsNumpy(self):
+        return self.valores
+
+
+class Bloque:
+    """Imita Hourly()/Daily() del SDK de Open-Meteo"""
+
+    def __init__(self, pasos, intervalo, base):
+        self.pasos, self.intervalo, self.base = pasos, intervalo, base
+
+    def Time(self):
+        return INICIO
+
+    def TimeEnd(self):
+        return INICIO + self.pasos * self.intervalo
+
+    def Interval(self):
+        return self.intervalo
+
+    def Variables(self, i):
+        return Variable(np.full(self.pasos, self.base + i, dtype=np.float32))
+
+
+class Respuesta:
+    def __init__(self, lat, lon):
+        self.lat, self.lon = lat, lon
+
+    def Latitude(self):
+        return self.lat
+
+    def Longitude(self):
+        return self.lon
+
+    def Elevation(self):
+        return 1000.0
+
+    def UtcOffsetSeconds(self):
+        return -18000
+
+    def Hourly(self):
+        return Bloque(24, 3600, self.lat)
+
+    def Daily(self):
+        return Bloque(1, 86400, self.lat)
+
+
+class ClienteFalso:
+    def __init__(self):
+        self.peticiones = []
+
+    def weather_api(self, url, params):
+        self.peticiones.append(params)
+        return [Respuesta(lat, lon) for lat, lon in zip(params["latitude"], params["longitude"])]
+
+
+def test_forecast_batch_agrupa_peticiones(tmp_path):
+    """N ubicaciones se consultan en bloques y se decodifican en formato largo"""
+    client = OpenMeteoClient(data_dir=tmp_path)
+    client.client = ClienteFalso()
+
+    locations = [{"name": f"Estacion{i}", "lat": float(i), "lon": -75.0} for i in range(7)]
+    result = client.get_forecast_batch(locations, chunk_size=3, save_data=False)
+
+    assert [len(p["latitude"]) for p in client.client.peticiones] == [3, 3, 1]
+    assert len(result["locations"]) == 7
+    assert len(result["hourly"]) == 7 * 24
+    assert len(result["daily"]) == 7
+
+    estacion = result["hourly"][result["hourly"]["location"] == "Estacion5"]
+    assert (estacion["temperature_2m"] == 5.0).all()
+    assert (estacion["relative_humidity_2m"] == 6.0).all()
@@ -0,0 +1,105 @@
+"""
+Pruebas del almacén Parquet particionado y su lectura desde UnifiedDataLoader
+"""
+
+from pathlib import Path
+import sys
+
+import pandas as pd
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+pytest.importorskip("pyarrow")
+
+from src.data_loaders import ParquetStore, UnifiedDataLoader, parquet_store
+
+
+def registros(source, location, inicio, horas=48):
+    return pd.DataFrame({
+        "timestamp": pd.date_range(inicio, periods=horas, freq="h"),
+        "source": source,
+        "location": location,
+        "temperature_C": 20.0,
+        "humidity_percent": 80.0,
+    })
+
+
+def test_lectura_por_particiones_y_columnas(tmp_path):
+    """Solo se leen las particiones y columnas pedidas"""
+    store = ParquetStore(tmp_path / "parquet")
+    store.append(registros("openmeteo", "Medellín", "2024-01-10"))
+    store.append(registros("openmeteo", "Bogota", "2024-01-10"))
+    store.append(registros("meteoblue", "Medellín", "2024-01-10"))
+
+    assert len(store.partitions()) == 6
+
+    df = store.read(columns=["timestamp", "location", "temperature_C"],
+                    providers=["openmeteo"], locations=["Medellín"], start="2024-01-11")
+    assert list(df.columns) == ["timestamp", "location", "temperature_C"]
+    assert len(df) == 24
+    assert df["location"].dtype == "category"
+    assert df["timestamp"].is_monotonic_increasing
+
+    loader = UnifiedDataLoader(tmp_path)
+    assert set(loader.load_source("meteoblue", from_store=True)["source"]) == {"meteoblue"}
+    assert len(loader.load_location("medell", from_store=True)) == 2 * 48
+
+
+def test_json_no_se_oculta_tras_el_almacen(tmp_path):
+    """Sin from_store las consultas siguen leyendo los JSON aunque exista el almacén"""
+    ParquetStore(tmp_path / "parquet").append(registros("openmeteo", "Medellin", "2024-01-10", horas=3))
+    (tmp_path / "consulta_completa_Medellin_a.json").write_text(
+        '{"location": "Medellin", "openmeteo": {"hourly": {"time": ["2023-06-01T00:00"], '
+        '"temperature_2m": [18.0]}}}'
+    )
+
+    loader = UnifiedDataLoader(tmp_path)
+    assert len(loader.load_location("medell")) == 1
+    assert len(loader.load_source("openmeteo")) == 1
+    assert len(loader.load_location("medell", from_store=True)) == 3
+
+
+def test_columnas_que_aparecen_en_appends_posteriores(tmp_path):
+    """Columnas ausentes en el primer archivo escrito se leen igual (NaN donde faltan)"""
+    store = ParquetStore(tmp_path / "parquet")
+    sin_humedad = registros("meteoblue", "Medellín", "2024-01-10", horas=3).drop(columns=["humidity_percent"])
+    store.append(sin_humedad)
+    con_humedad = registros("openmeteo", "Medellín", "2024-01-10", horas=3)
+    con_humedad["cloudiness_percent"] = 50
+    store.append(con_humedad)
+
+    df = store.read(columns=["timestamp", "provider", "humidity_percent", "cloudiness_percent"])
+    assert len(df) == 6
+    por_proveedor = df.groupby("provider", observed=True)["humidity_percent"].count()
+    assert por_proveedor["openmeteo"] == 3
+    assert por_proveedor["meteoblue"] == 0
+    assert df["cloudiness_percent"].notna().sum() == 3
+
+    assert {"humidity_percent", "cloudiness_percent", "temperature_C"} <= set(store.read().columns)
+
+
+def test_solo_lee_pies_de_pagina_de_particiones_filtradas(tmp_path, monkeypatch):
+    """Los filtros de partición se aplican antes de abrir archivos"""
+    store = ParquetStore(tmp_path / "parquet")
+    for ciudad in ("Medellín", "Bogota", "Cali"):
+        store.append(registros("openmeteo", ciudad, "2024-01-10"))
+    store.append(registros("meteoblue", "Medellín", "2024-01-10").drop(columns=["humidity_percent"]))
+
+    leidos = []
+    original = parquet_store.pq.read_schema
+
+    def contar(ruta, *args, **kwargs):
+        leidos.append(ruta)
+        return original(ruta, *args, **kwargs)
+
+    monkeypatch.setattr(parquet_store.pq, "read_schema", contar)
+
+    df = store.read(columns=["timestamp", "humidity_percent"], providers=["meteoblue"], end="2024-01-10")
+    assert len(leidos) == 1
+    assert len(df) == 24
+    assert df["humidity_percent"].isna().all()
+
+    assert store.read(providers=["openmeteo"], locations=["Pasto"]).empty
@@ -0,0 +1,68 @@
+"""
+Pruebas de las métricas por etapa del pipeline
+"""
+
+from pathlib import Path
+import json
+import sys
+
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.pipelines import ClimateDataPipeline, PipelineMetrics
+
+
+def test_etapas_registradas_y_exportadas(tmp_path):
+    datos = {
+        "location": "Medellin",
+        "openmeteo": {"hourly": {"time": [f"2024-01-01T{h:02d}:00" for h in range(24)],
+                                 "temperature_2m": [20.0] * 24}},
+    }
+    (tmp_path / "consulta_completa_Medellin_20240101_000000.json").write_text(json.dumps(datos))
+
+    pipeline = ClimateDataPipeline(tmp_path, profile_stage='validate')
+    pipeline.execute(resample_freq='D')
+
+    registros = pipeline.metrics.to_dataframe()
+    assert list(registros['stage']) == ['load', 'validate', 'fill', 'dedup', 'resample']
+    assert registros.set_index('stage').loc['resample', 'rows_out'] == 1
+    assert (registros['wall_s'] >= 0).all()
+    assert 'validate_all' in pipeline.metrics.profiles['validate']
+
+    ruta = pipeline.metrics.write_jsonl(tmp_path / "metricas.jsonl", run_id="prueba")
+    lineas = [json.loads(l) for l in ruta.read_text().splitlines()]
+    assert lineas[0]['run_id'] == "prueba" and lineas[0]['stage'] == 'load'
+
+    texto = pipeline.metrics.to_prometheus()
+    assert 'climate_pipeline_wall_seconds{stage="fill"}' in texto
+
+
+def test_resumen_acumula_etapas_repetidas():
+    metrics = PipelineMetrics()
+    for filas in (10, 20):
+        with metrics.stage('validate', rows_in=filas) as etapa:
+            etapa['rows_out'] = filas - 1
+
+    resumen = metrics.summary().set_index('stage')
+    assert resumen.loc['validate', 'runs'] == 2
+    assert resumen.loc['validate', 'rows_out'] == 28
+
+
+def test_pico_rss_absoluto():
+    """El pico de RSS se reporta en valor absoluto y no baja entre etapas"""
+    metrics = PipelineMetrics()
+    with metrics.stage('carga'):
+        bloque = b'\x01' * (64 * 1024 * 1024)
+    del bloque
+    with metrics.stage('despues'):
+        pass
+
+    registros = metrics.to_dataframe().set_index('stage')['peak_rss_mb']
+    if registros.isna().all():
+        pytest.skip("resource no disponible en esta plataforma")
+    assert registros['carga'] >= 64
+    assert registros['despues'] >= registros['carga']
+    assert metrics.summary().set_index('stage').loc['despues', 'peak_rss_mb'] == registros['despues']
@@ -0,0 +1,115 @@
+"""
+Pruebas del motor vectorizado de tasa de precipitación
+"""
+
+from pathlib import Path
+import sys
+
+import numpy as np
+import pytest
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.processors.precipitacion_radar import RainRateEngine
+from src.processors.radar_advanced_processor import RadarAdvancedProcessor
+
+
+class RadarFalso:
+    """Lo mínimo de pyart.core.Radar que usa calcular_precipitacion"""
+
+    def __init__(self, **campos):
+        self.fields = {nombre: {'data': datos} for nombre, datos in campos.items()}
+
+    def add_field(self, nombre, campo, replace_existing=False):
+        self.fields[nombre] = campo
+
+
+def _dbz():
+    rng = np.random.default_rng(1)
+    return rng.uniform(-10, 65, (360, 500))
+
+
+def test_z_r_igual_a_la_formula_en_float64():
+    dbz = _dbz()
+    motor = RainRateEngine()
+
+    tasa = motor.tasa_desde_dbz(dbz)
+    esperada = (10 ** (dbz / 10) / 200) ** (1 / 1.6)
+
+    assert tasa.dtype == np.float32
+    assert np.allclose(tasa, esperada, rtol=1e-5)
+
+
+def test_salida_reutilizada_y_mascara():
+    dbz = np.ma.masked_less(_dbz(), 0)
+    motor = RainRateEngine()
+    salida = np.empty(dbz.shape, dtype='float32')
+
+    tasa = motor.tasa_desde_dbz(dbz, 'rosenfeld_tropical', salida=salida)
+
+    assert np.shares_memory(tasa, salida)
+    assert np.array_equal(np.ma.getmaskarray(tasa), dbz.mask)
+    esperada = (10 ** (dbz.compressed() / 10) / 250) ** (1 / 1.2)
+    assert np.allclose(tasa.compressed(), esperada, rtol=1e-5)
+
+
+def test_tabla_de_codigos_iris():
+    motor = RainRateEngine()
+    codigos = np.array([[0, 32768 + 2000, 32768 + 4550, 65535]], dtype='uint16')
+
+    tasa = motor.tasa_desde_codigos(codigos, bits=16)
+
+    assert np.isnan(tasa[0, 0]) and np.isnan(tasa[0, 3])
+    assert np.allclose(tasa[0, 1:3], motor.tasa_desde_dbz(np.array([20.0, 45.5])), rtol=1e-6)
+
+    codigos8 = np.array([0, 64 + 40, 64 + 91], dtype='uint8')
+    tasa8 = motor.tasa_desde_codigos(codigos8, bits=8)
+    assert np.isnan(tasa8[0])
+    assert np.allclose(tasa8[1:], motor.tasa_desde_dbz(np.array([20.0, 45.5])), rtol=1e-6)
+
+
+def test_kdp_y_z_zdr():
+    motor = RainRateEngine()
+    kdp = np.array([-0.5, 0.0, 1.0, 2.5, np.nan])
+    tasa = motor.tasa_desde_kdp(kdp)
+    assert np.allclose(tasa[:4], [0, 0, 40.5, 40.5 * 2.5 ** 0.85], rtol=1e-5)
+    assert np.isnan(tasa[4])
+
+    dbz, zdr = np.array([30.0, 45.0]), np.array([0.5, 1.5])
+    tasa = motor.tasa_desde_z_zdr(dbz, zdr)
+    esperada = 0.0067 * (10 ** (dbz / 10)) ** 0.927 * (10 ** (zdr / 10)) ** -3.43
+    assert np.allclose(tasa, esperada, rtol=1e-5)
+
+
+def test_relacion_por_radar_y_fuentes():
+    motor = RainRateEngine(relaciones_por_radar={'Carimagua': 'rosenfeld_tropical'})
+    motor.registrar_relacion('local', 'z', a=180, b=1.5)
+    motor.asignar_relacion('Munchique', 'local')
+    dbz = _dbz()[:2, :5]
+
+    assert np.allclose(motor.calcular({'DBZH': dbz}, radar='Carimagua'),
+                       (10 ** (dbz / 10) / 250) ** (1 / 1.2), rtol=1e-5)
+    assert np.allclose(motor.calcular(RadarFalso(reflectivity=dbz), radar='Munchique'),
+                       (10 ** (dbz / 10) / 180) ** (1 / 1.5), rtol=1e-5)
+
+    with pytest.raises(KeyError):
+        motor.calcular({'DBZH': dbz}, relacion='kdp_bringi')
+    with pytest.raises(KeyError):
+        motor.asignar_relacion('Guaviare', 'no_existe')
+
+
+def test_calcular_precipitacion_pyart():
+    procesador = RadarAdvancedProcessor(relaciones_por_radar={'Carimagua': 'kdp_bringi'})
+    procesador.pyart_enabled = True
+    dbz = np.ma.masked_invalid(np.array([[20.0, np.nan]]))
+    radar = RadarFalso(reflectivity=dbz, KDP=np.array([[1.0, 2.0]]))
+
+    tasa = procesador.calcular_precipitacion(radar)
+    assert np.isclose(tasa[0, 0], (100 / 200) ** (1 / 1.6), rtol=1e-5)
+    assert tasa.mask[0, 1]
+    assert radar.fields['rainfall_rate']['units'] == 'mm/h'
+
+    tasa = procesador.calcular_precipitacion(radar, nombre_radar='Carimagua')
+    assert np.allclose(tasa, [[40.5, 40.5 * 2 ** 0.85]], rtol=1e-5)
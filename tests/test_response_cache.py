@@ -0,0 +1,69 @@
+"""
+Pruebas de la caché de respuestas HTTP compartida
+"""
+
+from pathlib import Path
+import sys
+
+import requests
+
+# Agregar directorio raíz al path
+raiz = Path(__file__).parent.parent
+sys.path.insert(0, str(raiz))
+
+from src.data_sources.http_transport import TransporteHTTP
+from src.data_sources.response_cache import CacheRespuestas
+
+
+class SesionContador(requests.Session):
+    """Responde siempre 200 con un JSON distinto por llamada"""
+
+    def __init__(self):
+        super().__init__()
+        self.llamadas = 0
+
+    def get(self, url, **kwargs):
+        self.llamadas += 1
+        response = requests.Response()
+        response.status_code = 200
+        response.headers["Content-Type"] = "application/json"
+        response._content = f'{{"llamada": {self.llamadas}}}'.encode()
+        return response
+
+
+def test_transporte_sirve_desde_cache(tmp_path):
+    """Coordenadas casi iguales y credenciales distintas comparten la entrada"""
+    cache = CacheRespuestas(tmp_path / "cache.sqlite")
+    sesion = SesionContador()
+    http = TransporteHTTP("openweather", session=sesion, cache=cache)
+    url = "https://api.openweathermap.org/data/2.5/forecast"
+
+    primera = http.get(url, params={"lat": 6.24501, "lon": -75.5715, "appid": "a"})
+    segunda = http.get(url, params={"lat": 6.24499, "lon": -75.5715, "appid": "b"})
+    http.get(url, params={"lat": 4.711, "lon": -74.0721, "appid": "a"})
+
+    assert sesion.llamadas == 2
+    assert segunda.json() == primera.json() == {"llamada": 1}
+    assert segunda.headers["X-Cache"] == "HIT"
+
+    metricas = http.metricas()
+    assert (metricas["cache_hits"], metricas["cache_misses"]) == (1, 2)
+    assert cache.ttl_para("openweather", "api.openweathermap.org/data/2.5/weather") == 600
+
+
+def test_expiracion_y_desalojo_lru(tmp_path):
+    cache = CacheRespuestas(tmp_path / "cache.sqlite", max_mb=2500 / 1048576,
+                            ttl={"prueba": [("/viejo", -1), ("", 3600)]})
+
+    cache.guardar("prueba", "vencida", "host/viejo", b"x")
+    assert cache.obtener("prueba", "vencida") is None
+
+    for clave in ("a", "b", "c"):
+        cache.guardar("prueba", clave, "host/datos", b"x" * 1000)
+        if clave == "b":
+            cache.obtener("prueba", "a")  # "a" pasa a ser la más reciente
+
+    assert cache.obtener("prueba", "b") is None
+    assert cache.obtener("prueba", "a") is not None
+    assert cache.obtener("prueba", "c") is not None
+    assert cache.estadisticas("prueba")["desalojadas"] == 1